@@ -0,0 +1,45 @@
+import time
+
+from core import metrics
+
+
+class RequestMetricsMiddleware:
+    """Records latency and request/response body sizes of every API request, per route template.
+
+    Pure ASGI, so streamed responses are measured until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "received": 0, "sent": 0}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["sent"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            # Set by the router once a route matched; the template keeps label cardinality bounded.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            metrics.http_request_duration.observe(time.perf_counter() - started,
+                                                  method=method, route=route, status=state["status"])
+            metrics.http_request_size.observe(state["received"], method=method, route=route)
+            metrics.http_response_size.observe(state["sent"], method=method, route=route)
@@ -0,0 +1,72 @@
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from core.jobs import job_manager, SUCCEEDED, FINISHED_STATUSES
+
+# Comment lines sent while nothing changes keep proxies from closing idle event streams.
+SSE_KEEPALIVE_SECONDS = 15
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Background Jobs"]
+)
+
+
+def _get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Завдання '{job_id}' не знайдено")
+    return job
+
+
+@router.get("")
+async def list_jobs():
+    return [job.to_dict() for job in job_manager.list()]
+
+
+@router.get("/{job_id}")
+async def read_job(job_id: str):
+    return _get_job(job_id).to_dict()
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-sent events: the job's status is pushed on every change, until it finishes."""
+    job = _get_job(job_id)
+
+    async def events():
+        revision = None
+        while True:
+            if revision != job.revision:
+                revision = job.revision
+                finished = job.status in FINISHED_STATUSES
+                event = "done" if finished else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+                if finished:
+                    return
+            elif await request.is_disconnected():
+                return
+            else:
+                yield ": keep-alive\n\n"
+            await job.wait_for_change(revision, SSE_KEEPALIVE_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/{job_id}/result")
+async def read_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Завдання ще виконується (статус: {job.status})")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=job.error or f"Завдання завершилось зі статусом {job.status}")
+    return job.result
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Завдання '{job_id}' не знайдено")
+    return job.to_dict()
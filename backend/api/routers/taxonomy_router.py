@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Header
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from core.config import settings
-import tempfile
-import os
+from core.jobs import job_manager, JobQueueFull
+import asyncio
+import hashlib
 import io
-from typing import List
+from typing import List, Optional
 import logging
 import traceback
 from db import graphdb_ops
-from llm.client import generate_taxonomy_with_llm
+from db.tree_cache import etag_matches
+from llm.client import generate_taxonomy_with_llm, stream_taxonomy_statements
+from llm.validation import validate_taxonomy_ttl, to_ntriples, validated_ntriples_batches
 from api import schemas
 
 router = APIRouter(
@@ -18,20 +21,37 @@ router = APIRouter(
 logger = logging.getLogger(__name__)
 
 
-@router.get("/taxonomy-tree")
-async def read_taxonomy_tree():
-    try:
-        bindings = graphdb_ops.get_taxonomy_hierarchy()
-        print("Debug: read_taxonomy_tree - Получены bindings из get_taxonomy_hierarchy:")
-        print(bindings)
+def _changes_response(message, changes):
+    return {"message": message, "version": changes[-1]["version"], "changes": changes}
 
-        if not bindings:
-            return []
-        tree_data = graphdb_ops.build_hierarchy_tree(bindings)
-        print("Debug: read_taxonomy_tree - Результат build_hierarchy_tree:")
-        print(tree_data)
 
-        return tree_data
+@router.get("/taxonomy-tree")
+async def read_taxonomy_tree(format: str = Query("tree", regex="^(tree|dag)$"),
+                             if_none_match: Optional[str] = Header(None)):
+    try:
+        if format == "dag":
+            body, version = await graphdb_ops.get_taxonomy_dag()
+            etag = graphdb_ops.tree_cache.stream_etag(version, "dag")
+            headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Taxonomy-Version": str(version)}
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        if settings.taxonomy_tree_streaming:
+            etag = graphdb_ops.tree_cache.stream_etag()
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+            stream = await graphdb_ops.open_taxonomy_tree_stream()
+            headers = {"ETag": stream.etag, "Cache-Control": "no-cache", "X-Taxonomy-Version": str(stream.version)}
+            return StreamingResponse(stream.chunks, media_type="application/json", headers=headers)
+
+        cached_tree = await graphdb_ops.get_cached_taxonomy_tree()
+        headers = {"ETag": cached_tree.etag, "Cache-Control": "no-cache",
+                   "X-Taxonomy-Version": str(cached_tree.version)}
+
+        if etag_matches(if_none_match, cached_tree.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached_tree.body, media_type="application/json", headers=headers)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -39,39 +59,194 @@ async def read_taxonomy_tree():
                             detail=f"Ошибка при обработке запроса: {e}")
 
 
-@router.post("/clear_repository")
-async def clear_repository_endpoint():
-    if graphdb_ops.clear_graphdb_repository(settings.graphdb_statements_endpoint):
-        return {"message": "Репозиторій успішно очищено"}
-    else:
-        raise HTTPException(status_code=500, detail="Не вдалося очистити репозиторій")
+@router.get("/taxonomy-tree/changes")
+async def read_taxonomy_tree_changes(since: int = Query(..., ge=0)):
+    return graphdb_ops.tree_cache.changes_since(since)
 
 
-@router.post("/import_taxonomy")
-async def import_taxonomy_endpoint(file: UploadFile = File(...)):
+@router.get("/taxonomy-graph")
+async def read_taxonomy_graph(root: Optional[str] = None,
+                              max_depth: Optional[int] = Query(None, ge=0),
+                              max_nodes: Optional[int] = Query(None, ge=1),
+                              layout: bool = False,
+                              offset: int = Query(0, ge=0),
+                              if_none_match: Optional[str] = Header(None)):
+    if max_nodes is None:
+        max_nodes = settings.taxonomy_graph_default_max_nodes
+    # Only pages through the top-level concepts of the whole taxonomy.
+    if root is not None:
+        offset = 0
+    try:
+        body, version = await graphdb_ops.get_taxonomy_graph(root, max_depth, max_nodes, layout, offset)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при побудові графа таксономії: {e}")
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Концепт '{root}' не знайдено")
+
+    variant = hashlib.sha1(repr((root, max_depth, max_nodes, layout, offset)).encode("utf-8")).hexdigest()[:12]
+    etag = graphdb_ops.tree_cache.stream_etag(version, variant)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Taxonomy-Version": str(version)}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/taxonomy-tree/roots")
+async def read_root_concepts(cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
     try:
-        if not file.filename.endswith((".ttl", ".rdf")):
-            raise HTTPException(status_code=400, detail="Непідтримуваний формат файлу. Використовуйте .ttl або .rdf")
+        return await graphdb_ops.get_root_concepts_page(cursor, limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при отриманні кореневих концептів: {e}")
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp_file:
-            contents = await file.read()
-            tmp_file.write(contents)
-            tmp_file_path = tmp_file.name
 
-        graphdb_ops.import_taxonomy_to_graphdb(tmp_file_path, settings.graphdb_statements_endpoint)
+@router.get("/taxonomy-tree/children")
+async def read_child_concepts(uri: str, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    try:
+        return await graphdb_ops.get_child_concepts_page(uri, cursor, limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при отриманні дочірніх концептів: {e}")
+
+
+@router.get("/concept")
+async def read_concept_details(uri: str):
+    try:
+        details = await graphdb_ops.get_concept_details(uri)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при отриманні концепту: {e}")
+    if details is None:
+        raise HTTPException(status_code=404, detail=f"Концепт '{uri}' не знайдено")
+    return details
+
+
+@router.get("/concept/ancestors")
+async def read_concept_ancestors(uri: str):
+    try:
+        ancestors = await graphdb_ops.get_concept_ancestors(uri)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при отриманні предків концепту: {e}")
+    if ancestors is None:
+        raise HTTPException(status_code=404, detail=f"Концепт '{uri}' не знайдено")
+    return {"uri": uri, "depth": len(ancestors), "ancestors": ancestors}
+
 
-        os.remove(tmp_file_path)
+@router.get("/concept/descendants")
+async def read_concept_descendants(uri: str,
+                                   max_depth: Optional[int] = Query(None, ge=1),
+                                   offset: int = Query(0, ge=0),
+                                   limit: int = Query(1000, ge=1, le=10000)):
+    try:
+        page = await graphdb_ops.get_concept_descendants(uri, max_depth, offset, limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при отриманні нащадків концепту: {e}")
+    if page is None:
+        raise HTTPException(status_code=404, detail=f"Концепт '{uri}' не знайдено")
+    return {"uri": uri, "offset": offset, **page}
 
-        return JSONResponse(content={"message": f"Таксономія з файлу '{file.filename}' успішно імпортована"})
 
+@router.get("/concept/subtree-count")
+async def read_concept_subtree_count(uri: str):
+    try:
+        info = await graphdb_ops.get_concept_hierarchy_info(uri)
     except HTTPException as e:
-        raise
+        raise e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Помилка при імпорті таксономії: {e}")
+        raise HTTPException(status_code=500, detail=f"Помилка при підрахунку піддерева концепту: {e}")
+    if info is None:
+        raise HTTPException(status_code=404, detail=f"Концепт '{uri}' не знайдено")
+    return info
 
 
-@router.post("/create_taxonomy_from_corpus_llm")
-async def create_taxonomy_from_corpus_llm_endpoint(files: List[UploadFile] = File(...)):
+@router.get("/search")
+async def search_concepts_endpoint(q: str = Query(..., min_length=1, max_length=200),
+                                   lang: Optional[str] = Query(None, max_length=20),
+                                   limit: int = Query(20, ge=1, le=100),
+                                   under: Optional[str] = None):
+    try:
+        result = await graphdb_ops.search_concepts(q, lang, limit, under)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при пошуку концептів: {e}")
+    return {"query": q, **result}
+
+
+@router.post("/clear_repository")
+async def clear_repository_endpoint():
+    if await graphdb_ops.clear_graphdb_repository(settings.graphdb_statements_endpoint):
+        return {"message": "Репозиторій успішно очищено"}
+    else:
+        raise HTTPException(status_code=500, detail="Не вдалося очистити репозиторій")
+
+
+def _take_upload_file(file: UploadFile):
+    """Moves the upload's spooled file from the request to the caller, who must close it.
+
+    A background job outlives the request, and FastAPI closes (deleting their spool) the
+    request's UploadFiles when it ends: the UploadFile is left holding an empty stand-in
+    instead, so the job reads the spool Starlette already wrote rather than a second copy.
+    """
+    spooled, file.file = file.file, io.BytesIO()
+    spooled.seek(0)
+    return spooled
+
+
+async def _read_upload_chunks(spooled):
+    while chunk := await asyncio.to_thread(spooled.read, settings.import_chunk_size_bytes):
+        yield chunk
+
+
+def _submit_job(kind, run, cleanup=None):
+    try:
+        job = job_manager.submit(kind, run, cleanup)
+    except JobQueueFull:
+        if cleanup is not None:
+            cleanup()
+        raise HTTPException(status_code=503, detail="Черга завдань переповнена, спробуйте пізніше.",
+                            headers={"Retry-After": "30"})
+    return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status,
+                                                  "status_url": f"/jobs/{job.id}"},
+                        headers={"Location": f"/jobs/{job.id}"})
+
+
+@router.post("/import_taxonomy", status_code=202)
+async def import_taxonomy_endpoint(file: UploadFile = File(...)):
+    try:
+        content_type, gzipped = graphdb_ops.rdf_import_format(file.filename)
+    except ValueError:
+        raise HTTPException(status_code=400,
+                            detail="Непідтримуваний формат файлу. Використовуйте .ttl, .rdf, .owl або .nt "
+                                   "(можна стиснути у .gz)")
+
+    total_bytes = file.size or 1
+    spooled = _take_upload_file(file)
+
+    async def run(job):
+        job.report(message="Очікування черги імпорту в GraphDB")
+        async with job_manager.slot("graphdb_load"):
+            job.report(message="Імпорт у GraphDB")
+            stats = await graphdb_ops.import_taxonomy_stream_to_graphdb(
+                _read_upload_chunks(spooled), content_type, settings.graphdb_statements_endpoint,
+                gzipped=gzipped, progress=lambda received: job.report(received / total_bytes))
+        return {"message": f"Таксономія з файлу '{file.filename}' успішно імпортована", "stats": stats}
+
+    return _submit_job("import", run, cleanup=spooled.close)
+
+
+@router.post("/create_taxonomy_from_corpus_llm", status_code=202)
+async def create_taxonomy_from_corpus_llm_endpoint(files: List[UploadFile] = File(...),
+                                                   stream: bool = Query(False)):
     logger.info(f"Request to create taxonomy from corpus with {len(files)} file(s).")
     corpus_text_parts = []
     processed_filenames = []
@@ -99,51 +274,83 @@ async def create_taxonomy_from_corpus_llm_endpoint(files: List[UploadFile] = Fil
     logger.info(
         f"Combined corpus text from {len(processed_filenames)} files ({', '.join(processed_filenames)}), length: {len(combined_corpus_text)} chars.")
 
-    try:
-        ttl_taxonomy_data_str = await generate_taxonomy_with_llm(combined_corpus_text)
-
-        if not ttl_taxonomy_data_str or not ttl_taxonomy_data_str.strip().startswith("@prefix"):
-            logger.error(f"LLM did not return valid TTL data. Response: {ttl_taxonomy_data_str[:500]}")
+    async def run_streaming(job):
+        job.report(0.05, "Очікування черги імпорту в GraphDB")
+        async with job_manager.slot("graphdb_load"):
+            job.report(message="Генерація таксономії ЛЛМ з потоковим імпортом у GraphDB")
+            batches = validated_ntriples_batches(stream_taxonomy_statements(combined_corpus_text),
+                                                 batch_size=settings.llm_stream_batch_statements,
+                                                 flush_interval_seconds=settings.llm_stream_flush_interval_seconds)
+            stats = await graphdb_ops.import_ntriples_batches_to_graphdb(
+                batches, settings.graphdb_statements_endpoint,
+                progress=lambda totals: job.report(message=f"Імпортовано концептів: {totals['concepts']}", **totals)
+            )
+        if not stats["concepts"]:
             raise HTTPException(status_code=500, detail="ЛЛМ не згенерувала валідну таксономію у форматі TTL.")
+        logger.info("Streamed taxonomy from LLM imported successfully into GraphDB.")
+        return {"message": "Таксономія успішно створена з корпусу документів та імпортована.", "stats": stats}
 
-        ttl_taxonomy_bytes = ttl_taxonomy_data_str.encode('utf-8')
+    async def run(job):
+        try:
+            if stream:
+                return await run_streaming(job)
+
+            job.report(0.05, "Генерація таксономії ЛЛМ")
+            ttl_taxonomy_data_str = await generate_taxonomy_with_llm(combined_corpus_text)
+
+            if not ttl_taxonomy_data_str or not ttl_taxonomy_data_str.strip():
+                logger.error("LLM did not return any TTL data.")
+                raise HTTPException(status_code=500, detail="ЛЛМ не згенерувала валідну таксономію у форматі TTL.")
+
+            job.report(0.75, "Перевірка таксономії")
+            taxonomy_graph, validation = await asyncio.to_thread(validate_taxonomy_ttl, ttl_taxonomy_data_str)
+            ntriples_bytes = await asyncio.to_thread(to_ntriples, taxonomy_graph)
+
+            job.report(0.8, "Очікування черги імпорту в GraphDB", validation=validation)
+            async with job_manager.slot("graphdb_load"):
+                job.report(message="Імпорт у GraphDB")
+                stats = await graphdb_ops.import_taxonomy_to_graphdb(
+                    file_path=None,  # Not using file_path
+                    graphdb_endpoint_statements=settings.graphdb_statements_endpoint,
+                    file_content_bytes=ntriples_bytes,
+                    content_type='application/n-triples'  # validated and normalized LLM output
+                )
+            logger.info("Taxonomy from LLM imported successfully into GraphDB.")
+            return {"message": "Таксономія успішно створена з корпусу документів та імпортована.", "stats": stats,
+                    "validation": validation}
+
+        except ValueError as ve:  # Catch specific errors from LLM util
+            logger.error(f"ValueError from LLM processing: {ve}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Помилка генерації таксономії ЛЛМ: {ve}")
+        except HTTPException as e:  # Re-raise known HTTPExceptions
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during LLM taxonomy creation: {e}\n{traceback.format_exc()}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Неочікувана помилка при створенні таксономії з корпусу: {e}")
 
-        graphdb_ops.import_taxonomy_to_graphdb(
-            file_path=None,  # Not using file_path
-            graphdb_endpoint_statements=settings.graphdb_statements_endpoint,
-            file_content_bytes=ttl_taxonomy_bytes,
-            content_type='application/x-turtle'  # LLM output is TTL
-        )
-        logger.info("Taxonomy from LLM imported successfully into GraphDB.")
-        return JSONResponse(content={"message": "Таксономія успішно створена з корпусу документів та імпортована."})
-
-    except ValueError as ve:  # Catch specific errors from LLM util
-        logger.error(f"ValueError from LLM processing: {ve}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Помилка генерації таксономії ЛЛМ: {ve}")
-    except HTTPException as e:  # Re-raise known HTTPExceptions
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error during LLM taxonomy creation: {e}\n{traceback.format_exc()}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Неочікувана помилка при створенні таксономії з корпусу: {e}")
+    return _submit_job("llm_generation", run)
 
 
 @router.get("/export_taxonomy")
-async def export_taxonomy_endpoint(format: str = Query(..., regex="^(ttl|rdf)$")):
+async def export_taxonomy_endpoint(format: str = Query(..., regex="^(ttl|rdf|nt|jsonld)$"),
+                                   root: Optional[str] = None,
+                                   gzip: bool = False):
     try:
-        content = graphdb_ops.export_taxonomy(format)
-
-        if format == "ttl":
-            content_type = "application/x-turtle"
-            filename = "taxonomy.ttl"
-        else:
-            content_type = "application/rdf+xml"
-            filename = "taxonomy.rdf"
-
-        return StreamingResponse(io.BytesIO(content.encode()), media_type=content_type,
-                                 headers={"Content-Disposition": f"attachment;filename={filename}"})
-
+        chunks = await graphdb_ops.open_taxonomy_export(format, root, gzip)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при експорті таксономії: {e}")
+    if chunks is None:
+        raise HTTPException(status_code=404, detail=f"Концепт '{root}' не знайдено")
+
+    content_type, extension = graphdb_ops.EXPORT_FORMATS[format]
+    filename = f"taxonomy.{extension}"
+    if gzip:
+        content_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(chunks, media_type=content_type,
+                             headers={"Content-Disposition": f"attachment;filename={filename}"})
 
 
 @router.post("/add_topconcept")
@@ -151,10 +358,9 @@ async def add_topconcept_endpoint(request: schemas.AddTopConceptRequest):
     try:
         concept_name = request.concept_name
         concept_uri = f"http://example.org/taxonomy/{concept_name}"
-        print(
-            f"Debug: concept_uri={concept_uri}, concept_name={concept_name}")
-        graphdb_ops.add_top_concept_to_graphdb(concept_uri, settings.graphdb_statements_endpoint)
-        return {"message": f"Топ концепт '{concept_name}' успішно додано"}
+        logger.debug(f"Adding top concept <{concept_uri}> (name '{concept_name}').")
+        change = await graphdb_ops.add_top_concept_to_graphdb(concept_uri, settings.graphdb_statements_endpoint)
+        return _changes_response(f"Топ концепт '{concept_name}' успішно додано", [change])
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -167,9 +373,10 @@ async def add_subconcept_endpoint(request: schemas.AddSubConceptRequest):
         concept_name = request.concept_name
         parent_concept_uri = request.parent_concept_uri
         concept_uri = f"http://example.org/taxonomy/{concept_name}"
-        print(f"Debug: concept_uri={concept_uri}, concept_name={concept_name}, parent_concept_uri={parent_concept_uri}")
-        graphdb_ops.add_subconcept_to_graphdb(concept_uri, parent_concept_uri, settings.graphdb_statements_endpoint)
-        return {"message": f"Концепт '{concept_name}' успішно додано"}
+        logger.debug(f"Adding concept <{concept_uri}> (name '{concept_name}') under <{parent_concept_uri}>.")
+        change = await graphdb_ops.add_subconcept_to_graphdb(concept_uri, parent_concept_uri,
+                                                             settings.graphdb_statements_endpoint)
+        return _changes_response(f"Концепт '{concept_name}' успішно додано", [change])
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -180,25 +387,39 @@ async def add_subconcept_endpoint(request: schemas.AddSubConceptRequest):
 async def delete_concept_endpoint(request: schemas.DeleteConceptRequest):
     try:
         concept_uri = request.concept_uri
-        graphdb_ops.delete_concept_from_graphdb(concept_uri, settings.graphdb_statements_endpoint)
-        return {"message": f"Концепт '{concept_uri}' успішно видалено"}
+        change, removed = await graphdb_ops.delete_concept_subtree_from_graphdb(
+            concept_uri, settings.graphdb_statements_endpoint)
+        return {**_changes_response(f"Концепт '{concept_uri}' успішно видалено", [change]), "removed": removed}
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при видаленні концепту: {e}")
 
 
+@router.get("/delete_concept/preview")
+async def preview_delete_concept_endpoint(uri: str, sample: int = Query(20, ge=0, le=200)):
+    try:
+        preview = await graphdb_ops.preview_concept_deletion(uri, sample)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при оцінці видалення концепту: {e}")
+    if not preview["exists"]:
+        raise HTTPException(status_code=404, detail=f"Концепт '{uri}' не знайдено")
+    return preview
+
+
 @router.post("/add_concept_label")
 async def add_concept_label_endpoint(request: schemas.ConceptLiteralRequest):
     try:
         logger.debug(f"Adding label to {request.concept_uri}: '{request.literal.value}'@{request.literal.lang}")
-        graphdb_ops.add_rdfs_label_to_graphdb(
+        change = await graphdb_ops.add_rdfs_label_to_graphdb(
             concept_uri=request.concept_uri,
             label_value=request.literal.value,
             label_lang=request.literal.lang,
             graphdb_endpoint=settings.graphdb_statements_endpoint
         )
-        return {"message": f"Мітку '{request.literal.value}' успішно додано до концепту '{request.concept_uri}'"}
+        return _changes_response(f"Мітку '{request.literal.value}' успішно додано до концепту '{request.concept_uri}'", [change])
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -210,13 +431,13 @@ async def add_concept_label_endpoint(request: schemas.ConceptLiteralRequest):
 async def delete_concept_label_endpoint(request: schemas.ConceptLiteralRequest):
     try:
         logger.debug(f"Deleting label from {request.concept_uri}: '{request.literal.value}'@{request.literal.lang}")
-        graphdb_ops.delete_rdfs_label_from_graphdb(
+        change = await graphdb_ops.delete_rdfs_label_from_graphdb(
             concept_uri=request.concept_uri,
             label_value=request.literal.value,
             label_lang=request.literal.lang,
             graphdb_endpoint=settings.graphdb_statements_endpoint
         )
-        return {"message": f"Мітку '{request.literal.value}' успішно видалено з концепту '{request.concept_uri}'"}
+        return _changes_response(f"Мітку '{request.literal.value}' успішно видалено з концепту '{request.concept_uri}'", [change])
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -229,21 +450,15 @@ async def update_concept_label_endpoint(request: schemas.ConceptLiteralUpdateReq
     try:
         logger.debug(
             f"Updating label for {request.concept_uri}: old='{request.old_literal.value}'@{request.old_literal.lang}, new='{request.new_literal.value}'@{request.new_literal.lang}")
-        # Step 1: Delete the old label
-        graphdb_ops.delete_rdfs_label_from_graphdb(
+        changes = await graphdb_ops.update_rdfs_label_in_graphdb(
             concept_uri=request.concept_uri,
-            label_value=request.old_literal.value,
-            label_lang=request.old_literal.lang,
+            old_value=request.old_literal.value,
+            old_lang=request.old_literal.lang,
+            new_value=request.new_literal.value,
+            new_lang=request.new_literal.lang,
             graphdb_endpoint=settings.graphdb_statements_endpoint
         )
-        # Step 2: Add the new label
-        graphdb_ops.add_rdfs_label_to_graphdb(
-            concept_uri=request.concept_uri,
-            label_value=request.new_literal.value,
-            label_lang=request.new_literal.lang,
-            graphdb_endpoint=settings.graphdb_statements_endpoint
-        )
-        return {"message": f"Мітку для концепту '{request.concept_uri}' успішно оновлено"}
+        return _changes_response(f"Мітку для концепту '{request.concept_uri}' успішно оновлено", changes)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -256,13 +471,13 @@ async def update_concept_label_endpoint(request: schemas.ConceptLiteralUpdateReq
 async def add_concept_definition_endpoint(request: schemas.ConceptLiteralRequest):
     try:
         logger.debug(f"Adding definition to {request.concept_uri}: '{request.literal.value}'@{request.literal.lang}")
-        graphdb_ops.add_rdfs_comment_to_graphdb(
+        change = await graphdb_ops.add_rdfs_comment_to_graphdb(
             concept_uri=request.concept_uri,
             comment_value=request.literal.value,
             comment_lang=request.literal.lang,
             graphdb_endpoint=settings.graphdb_statements_endpoint
         )
-        return {"message": f"Визначення успішно додано до концепту '{request.concept_uri}'"}
+        return _changes_response(f"Визначення успішно додано до концепту '{request.concept_uri}'", [change])
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -275,13 +490,13 @@ async def delete_concept_definition_endpoint(request: schemas.ConceptLiteralRequ
     try:
         logger.debug(
             f"Deleting definition from {request.concept_uri}: '{request.literal.value}'@{request.literal.lang}")
-        graphdb_ops.delete_rdfs_comment_from_graphdb(
+        change = await graphdb_ops.delete_rdfs_comment_from_graphdb(
             concept_uri=request.concept_uri,
             comment_value=request.literal.value,
             comment_lang=request.literal.lang,
             graphdb_endpoint=settings.graphdb_statements_endpoint
         )
-        return {"message": f"Визначення успішно видалено з концепту '{request.concept_uri}'"}
+        return _changes_response(f"Визначення успішно видалено з концепту '{request.concept_uri}'", [change])
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -294,23 +509,39 @@ async def update_concept_definition_endpoint(request: schemas.ConceptLiteralUpda
     try:
         logger.debug(
             f"Updating definition for {request.concept_uri}: old='{request.old_literal.value}'@{request.old_literal.lang}, new='{request.new_literal.value}'@{request.new_literal.lang}")
-        # Step 1: Delete the old definition
-        graphdb_ops.delete_rdfs_comment_from_graphdb(
-            concept_uri=request.concept_uri,
-            comment_value=request.old_literal.value,
-            comment_lang=request.old_literal.lang,
-            graphdb_endpoint=settings.graphdb_statements_endpoint
-        )
-        # Step 2: Add the new definition
-        graphdb_ops.add_rdfs_comment_to_graphdb(
+        changes = await graphdb_ops.update_rdfs_comment_in_graphdb(
             concept_uri=request.concept_uri,
-            comment_value=request.new_literal.value,
-            comment_lang=request.new_literal.lang,
+            old_value=request.old_literal.value,
+            old_lang=request.old_literal.lang,
+            new_value=request.new_literal.value,
+            new_lang=request.new_literal.lang,
             graphdb_endpoint=settings.graphdb_statements_endpoint
         )
-        return {"message": f"Визначення для концепту '{request.concept_uri}' успішно оновлено"}
+        return _changes_response(f"Визначення для концепту '{request.concept_uri}' успішно оновлено", changes)
     except HTTPException as e:
         raise e
     except Exception as e:
         logger.error(f"Error updating concept definition: {e}\n{traceback.format_exc()}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Помилка при оновленні визначення концепту: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Помилка при оновленні визначення концепту: {e}")
+
+
+@router.post("/batch")
+async def batch_endpoint(request: schemas.BatchRequest):
+    if len(request.operations) > settings.batch_max_operations:
+        raise HTTPException(status_code=400,
+                            detail=f"Забагато операцій у пакеті (максимум {settings.batch_max_operations}).")
+    try:
+        outcome = await graphdb_ops.execute_batch([operation.model_dump() for operation in request.operations],
+                                                  settings.graphdb_statements_endpoint)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error applying batch: {e}\n{traceback.format_exc()}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Помилка при виконанні пакета операцій: {e}")
+
+    if not outcome["applied"]:
+        raise HTTPException(status_code=422, detail={"message": "Пакет не застосовано: є невалідні операції.",
+                                                     "results": outcome["results"]})
+    return {**_changes_response(f"Пакет з {len(request.operations)} операцій успішно застосовано",
+                                outcome["changes"]),
+            "results": outcome["results"]}
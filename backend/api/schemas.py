@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class AddSubConceptRequest(BaseModel):
@@ -30,3 +30,37 @@ class ConceptLiteralUpdateRequest(BaseModel):
     concept_uri: str
     old_literal: LiteralData
     new_literal: LiteralData
+
+
+class BatchAddConcept(BaseModel):
+    op: Literal["add_concept"]
+    concept_name: str
+    parent_concept_uri: Optional[str] = None
+
+
+class BatchDeleteConcept(BaseModel):
+    op: Literal["delete_concept"]
+    concept_uri: str
+
+
+class BatchLiteralOperation(BaseModel):
+    op: Literal["add_label", "delete_label", "add_definition", "delete_definition"]
+    concept_uri: str
+    literal: LiteralData
+
+
+class BatchLiteralUpdate(BaseModel):
+    op: Literal["update_label", "update_definition"]
+    concept_uri: str
+    old_literal: LiteralData
+    new_literal: LiteralData
+
+
+BatchOperation = Annotated[
+    Union[BatchAddConcept, BatchDeleteConcept, BatchLiteralOperation, BatchLiteralUpdate],
+    Field(discriminator="op")
+]
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1)
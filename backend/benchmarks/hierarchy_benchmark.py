@@ -0,0 +1,153 @@
+"""Compare the grouped and flat hierarchy loading modes on synthetic taxonomies.
+
+Offline (default) the script synthesizes the bindings GraphDB would return for each
+mode and times the in-process tree assembly. With ``--live`` it loads the synthetic
+taxonomy into the configured repository (which is CLEARED first) and times the real
+SPARQL round trips as well.
+
+Run from the backend directory:
+    python -m benchmarks.hierarchy_benchmark --sizes 10000 50000 100000
+"""
+import argparse
+import asyncio
+import time
+
+from core.config import settings
+from db import graphdb_client, graphdb_ops
+
+LANGUAGES = ["uk", "en", "de", "fr", "pl", "es"]
+
+
+def synthetic_taxonomy(size, branching, languages):
+    prefix = settings.base_concept_uri_prefix
+    uris = [f"{prefix}Concept{i}" for i in range(size)]
+    parents = {uris[i]: uris[(i - 1) // branching] for i in range(1, size)}
+    langs = LANGUAGES[:languages]
+    labels = {uri: [(f"Label {uri.rsplit('/', 1)[-1]} {lang}", lang) for lang in langs] for uri in uris}
+    comments = {uri: [(f"Comment for {uri.rsplit('/', 1)[-1]} {lang}", lang) for lang in langs] for uri in uris}
+    return uris, parents, labels, comments
+
+
+def _concat(literals):
+    return "||".join(f"{value}|{lang}" for value, lang in literals)
+
+
+def grouped_bindings(uris, parents, labels, comments):
+    children = {}
+    for child, parent in parents.items():
+        children.setdefault(parent, []).append(child)
+
+    bindings = []
+    intermediate_rows = 0
+    for uri in uris:
+        class_part = {
+            "class": {"type": "uri", "value": uri},
+            "classLabelsInfo": {"type": "literal", "value": _concat(labels[uri])},
+            "classCommentsInfo": {"type": "literal", "value": _concat(comments[uri])},
+        }
+        class_rows = max(1, len(labels[uri])) * max(1, len(comments[uri]))
+        if uri not in children:
+            bindings.append(class_part)
+            intermediate_rows += class_rows
+            continue
+        for child in children[uri]:
+            bindings.append({
+                **class_part,
+                "subClass": {"type": "uri", "value": child},
+                "subClassLabelsInfo": {"type": "literal", "value": _concat(labels[child])},
+                "subClassCommentsInfo": {"type": "literal", "value": _concat(comments[child])},
+            })
+            intermediate_rows += class_rows * max(1, len(labels[child])) * max(1, len(comments[child]))
+    return bindings, intermediate_rows
+
+
+def flat_bindings(uris, parents, labels, comments):
+    parent_uris = set(parents.values())
+    edge_bindings = [{"class": {"type": "uri", "value": uri}} for uri in uris if uri not in parent_uris]
+    edge_bindings += [{"class": {"type": "uri", "value": parent}, "subClass": {"type": "uri", "value": child}}
+                      for child, parent in parents.items()]
+
+    def literal_rows(literals_by_uri, var):
+        return [{"class": {"type": "uri", "value": uri},
+                 var: {"type": "literal", "value": value, "xml:lang": lang}}
+                for uri, literals in literals_by_uri.items() for value, lang in literals]
+
+    return {
+        "edge_bindings": edge_bindings,
+        "label_bindings": literal_rows(labels, "label"),
+        "comment_bindings": literal_rows(comments, "comment"),
+    }
+
+
+def to_turtle(uris, parents, labels, comments):
+    lines = ["@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> ."]
+    for uri in uris:
+        lines.append(f"<{uri}> a rdfs:Class .")
+        if uri in parents:
+            lines.append(f"<{uri}> rdfs:subClassOf <{parents[uri]}> .")
+        lines.extend(f'<{uri}> rdfs:label "{value}"@{lang} .' for value, lang in labels[uri])
+        lines.extend(f'<{uri}> rdfs:comment "{value}"@{lang} .' for value, lang in comments[uri])
+    return "\n".join(lines).encode("utf-8")
+
+
+def _timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+async def _timed_async(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = await func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+async def query_live(turtle_bytes):
+    try:
+        await graphdb_ops.clear_graphdb_repository(settings.graphdb_statements_endpoint)
+        await graphdb_ops.import_taxonomy_to_graphdb(None, settings.graphdb_statements_endpoint,
+                                                     file_content_bytes=turtle_bytes, content_type="text/turtle")
+        grouped, grouped_query_s = await _timed_async(graphdb_ops.get_taxonomy_hierarchy)
+        flat, flat_query_s = await _timed_async(graphdb_ops.get_taxonomy_hierarchy_flat)
+        return grouped, grouped_query_s, flat, flat_query_s
+    finally:
+        await graphdb_client.close_client()
+
+
+def run(size, branching, languages, live):
+    uris, parents, labels, comments = synthetic_taxonomy(size, branching, languages)
+    print(f"\n{size} concepts, branching {branching}, {languages} language(s)")
+
+    if live:
+        grouped, grouped_query_s, flat, flat_query_s = asyncio.run(
+            query_live(to_turtle(uris, parents, labels, comments)))
+        print(f"  grouped query: {grouped_query_s * 1000:10.1f} ms  {len(grouped):>9} rows")
+        print(f"  flat queries:  {flat_query_s * 1000:10.1f} ms  {sum(map(len, flat.values())):>9} rows")
+    else:
+        grouped, intermediate_rows = grouped_bindings(uris, parents, labels, comments)
+        flat = flat_bindings(uris, parents, labels, comments)
+        print(f"  grouped rows: {len(grouped):>9} (pre-aggregation solutions: {intermediate_rows})")
+        print(f"  flat rows:    {sum(map(len, flat.values())):>9} "
+              f"({', '.join(f'{name}={len(rows)}' for name, rows in flat.items())})")
+
+    _, grouped_build_s = _timed(graphdb_ops.build_hierarchy_tree, grouped)
+    _, flat_build_s = _timed(graphdb_ops.build_hierarchy_tree_from_edges, **flat)
+    print(f"  grouped build: {grouped_build_s * 1000:10.1f} ms")
+    print(f"  flat build:    {flat_build_s * 1000:10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--branching", type=int, default=8)
+    parser.add_argument("--languages", type=int, default=4, choices=range(1, len(LANGUAGES) + 1))
+    parser.add_argument("--live", action="store_true",
+                        help="load into the configured GraphDB repository (clears it!) and time real queries")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.branching, args.languages, args.live)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Micro-benchmark of build_hierarchy_tree / build_hierarchy_tree_from_edges over synthetic bindings.
+
+Covers balanced, very wide (one parent with every concept as a child) and deep
+(single chain) taxonomies, since quadratic behaviour shows up on wide parents first.
+With ``--budget-us-per-row`` the script exits non-zero when the best run of any
+case exceeds the per-row budget, so it can gate a CI job.
+
+Run from the backend directory:
+    python -m benchmarks.tree_build_benchmark --size 20000 --budget-us-per-row 5
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.hierarchy_benchmark import synthetic_taxonomy, grouped_bindings, flat_bindings
+from db import graphdb_ops
+
+SHAPES = {
+    "balanced": lambda size: 8,
+    "wide": lambda size: size,
+    "deep": lambda size: 1,
+}
+
+
+def best_of(repeat, func, *args, **kwargs):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--languages", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-us-per-row", type=float, default=None)
+    args = parser.parse_args()
+
+    over_budget = []
+    for shape, branching in SHAPES.items():
+        uris, parents, labels, comments = synthetic_taxonomy(args.size, branching(args.size), args.languages)
+        grouped, _ = grouped_bindings(uris, parents, labels, comments)
+        flat = flat_bindings(uris, parents, labels, comments)
+        cases = {
+            "grouped": (len(grouped), best_of(args.repeat, graphdb_ops.build_hierarchy_tree, grouped)),
+            "flat": (sum(map(len, flat.values())),
+                     best_of(args.repeat, graphdb_ops.build_hierarchy_tree_from_edges, **flat)),
+        }
+        for mode, (rows, seconds) in cases.items():
+            us_per_row = seconds * 1e6 / rows
+            print(f"{shape:>8} {mode:>7}: {seconds * 1000:9.1f} ms  {rows:>8} rows  {us_per_row:6.2f} us/row")
+            if args.budget_us_per_row is not None and us_per_row > args.budget_us_per_row:
+                over_budget.append(f"{shape}/{mode}")
+
+    if over_budget:
+        print(f"Over budget ({args.budget_us_per_row} us/row): {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
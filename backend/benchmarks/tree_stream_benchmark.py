@@ -0,0 +1,80 @@
+"""Peak RSS of serving /taxonomy-tree with the legacy, buffered and streaming serializers.
+
+Each mode runs in its own subprocess (peak RSS is a per-process high-water mark):
+- legacy:    nested dict tree + FastAPI's jsonable_encoder + JSONResponse rendering
+- buffered:  the cached body, b"".join(model.iter_json())
+- streaming: model.iter_json() chunks consumed one at a time, as StreamingResponse does
+
+Run from the backend directory:
+    python -m benchmarks.tree_stream_benchmark --size 100000
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ("legacy", "buffered", "streaming")
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_model(size, branching, languages):
+    from benchmarks.hierarchy_benchmark import synthetic_taxonomy
+    from db.tree_model import TreeNode, TaxonomyTreeModel
+
+    uris, parents, labels, comments = synthetic_taxonomy(size, branching, languages)
+    nodes = {
+        uri: TreeNode(uri, uri.rsplit("/", 1)[-1],
+                      definitions=[{"value": value, "lang": lang} for value, lang in comments[uri]],
+                      labels=[{"value": value, "lang": lang} for value, lang in labels[uri]])
+        for uri in uris
+    }
+    for child, parent in parents.items():
+        nodes[parent].attach(nodes[child])
+    return TaxonomyTreeModel(nodes, [node for uri, node in nodes.items() if uri not in parents])
+
+
+def measure(mode, size, branching, languages):
+    model = build_model(size, branching, languages)
+    baseline_mb = _peak_rss_mb()
+    started = time.perf_counter()
+
+    if mode == "legacy":
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        payload_bytes = len(JSONResponse(jsonable_encoder(model.to_tree())).body)
+    elif mode == "buffered":
+        payload_bytes = len(b"".join(model.iter_json()))
+    else:
+        payload_bytes = sum(len(chunk) for chunk in model.iter_json())
+
+    elapsed = time.perf_counter() - started
+    print(f"{mode:>9}: {elapsed * 1000:9.1f} ms  payload {payload_bytes / 2**20:7.1f} MiB  "
+          f"peak RSS {baseline_mb:7.1f} -> {_peak_rss_mb():7.1f} MiB (+{_peak_rss_mb() - baseline_mb:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--branching", type=int, default=8)
+    parser.add_argument("--languages", type=int, default=2)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.size, args.branching, args.languages)
+        return
+
+    print(f"{args.size} concepts, branching {args.branching}, {args.languages} language(s)")
+    for mode in MODES:
+        subprocess.run([sys.executable, "-m", "benchmarks.tree_stream_benchmark", "--mode", mode,
+                        "--size", str(args.size), "--branching", str(args.branching),
+                        "--languages", str(args.languages)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,87 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
+    # Level of the application's loggers; DEBUG also logs every SPARQL request and its profile.
+    log_level: str = "INFO"
+
     # GraphDB
     graphdb_url: str = "http://localhost:7200"
     graphdb_repository: str = "animals"
     graphdb_default_graph: str = "http://example.org/graph/taxonomy"
+    # Shared async HTTP client (connection pool) used for all GraphDB traffic
+    graphdb_pool_max_connections: int = 20
+    graphdb_pool_max_keepalive_connections: int = 10
+    graphdb_pool_keepalive_expiry_seconds: float = 30
+    graphdb_connect_timeout_seconds: float = 5
+    graphdb_timeout_seconds: float = 120
+    # "flat": three narrow SELECTs (edges, labels, comments) assembled in-process;
+    # "grouped": the legacy single GROUP_CONCAT query.
+    graphdb_hierarchy_mode: Literal["flat", "grouped"] = "flat"
+    # Safety net for writes made outside this API; 0 keeps the cached tree until invalidated.
+    taxonomy_tree_cache_ttl_seconds: float = 300
+    # Number of tree changes kept for /taxonomy-tree/changes; older clients get a reset.
+    taxonomy_change_log_size: int = 1000
+    # Stream /taxonomy-tree node by node instead of caching the serialized body: lower peak
+    # memory on huge trees, at the cost of version-based rather than content-based ETags.
+    taxonomy_tree_streaming: bool = False
+    # /taxonomy-graph: concepts shown when the client sets no cap, and serialized views kept per version
+    taxonomy_graph_default_max_nodes: int = 2000
+    taxonomy_graph_cache_size: int = 32
+    # SPARQL requests slower than the threshold go to a rotating JSON-lines log (0 disables it),
+    # optionally with GraphDB's query plan, fetched by re-running the SELECT in explain mode.
+    # Relative paths resolve against the backend's working directory.
+    graphdb_slow_query_threshold_seconds: float = 1.0
+    graphdb_slow_query_log_file: str = "logs/slow_queries.log"
+    graphdb_slow_query_log_max_bytes: int = 10 * 1024 * 1024
+    graphdb_slow_query_log_backup_count: int = 5
+    graphdb_slow_query_explain: bool = False
+
+    # LLM: "gemini", "openai" (any OpenAI-compatible chat completions server, e.g. a local
+    # vLLM/Ollama) or "stub" (deterministic local generator for offline and load tests)
+    llm_provider: Literal["gemini", "openai", "stub"] = "gemini"
 
-    # LLM (Gemini)
-    gemini_api_key: str = Field(...)
+    # Gemini; the key is only needed when the Gemini provider is used
+    gemini_api_key: Optional[str] = None
     gemini_model_name: str = "gemini-2.5-flash-preview-04-17"
     gemini_max_output_tokens: int = 65500
 
+    # OpenAI-compatible endpoint
+    openai_base_url: str = "http://localhost:11434/v1"
+    openai_api_key: Optional[str] = None
+    openai_model_name: str = "llama3.1"
+    openai_max_output_tokens: int = 16384
+    openai_timeout_seconds: float = 600
+
+    # Stub: number of concepts generated, children per concept, simulated response time
+    llm_stub_concepts: int = 30
+    llm_stub_branching: int = 5
+    llm_stub_latency_seconds: float = 0
+
+    # Corpora larger than one chunk are generated chunk by chunk (map) and merged (reduce).
+    llm_chunk_max_tokens: int = 30000
+    llm_max_concurrency: int = 4
+    # Streaming generation (?stream=true): statements are imported in batches while the LLM writes.
+    llm_stream_batch_statements: int = 200
+    llm_stream_flush_interval_seconds: float = 2.0
+    # On-disk cache of generated (partial) taxonomies, keyed by corpus chunk, model and prompt version.
+    # Relative paths resolve against the backend's working directory; 0 bytes disables it.
+    llm_cache_dir: str = ".llm_cache"
+    llm_cache_max_bytes: int = 256 * 1024 * 1024
+
     base_concept_uri_prefix: str = "http://example.org/taxonomy/"
+    import_chunk_size_bytes: int = 1024 * 1024
+    batch_max_operations: int = 5000
+    # Cascading deletes remove a subtree this many concepts per update request, deepest first.
+    delete_batch_size: int = 500
+
+    # Background jobs (imports, LLM generation)
+    jobs_max_workers: int = 4
+    jobs_max_queued: int = 100
+    # Finished jobs kept for status/result polling; the oldest are forgotten first.
+    jobs_max_finished: int = 200
+    jobs_max_concurrent_graphdb_loads: int = 1
 
     @property
     def graphdb_query_endpoint(self) -> str:
@@ -23,6 +91,10 @@ class Settings(BaseSettings):
     def graphdb_statements_endpoint(self) -> str:
         return f"{self.graphdb_url}/repositories/{self.graphdb_repository}/statements"
 
+    @property
+    def graphdb_size_endpoint(self) -> str:
+        return f"{self.graphdb_url}/repositories/{self.graphdb_repository}/size"
+
     model_config = SettingsConfigDict(
         env_file="../.env",
         env_file_encoding='utf-8',
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    __slots__ = ("id", "kind", "status", "progress", "message", "details", "result", "error",
+                 "created_at", "started_at", "finished_at", "_run", "_cleanup", "_task", "_revision", "_changed")
+
+    def __init__(self, kind, run, cleanup=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = None
+        self.details = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._run = run
+        self._cleanup = cleanup
+        self._task = None
+        # Bumped on every change; waiters are woken by setting the current event, then replacing it.
+        self._revision = 0
+        self._changed = asyncio.Event()
+
+    def report(self, progress: Optional[float] = None, message: Optional[str] = None, **details):
+        """Called by the running job; progress is a fraction between 0 and 1, details are free-form counters."""
+        if progress is not None:
+            self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        self.details.update(details)
+        self.notify()
+
+    def notify(self):
+        self._revision += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    async def wait_for_change(self, revision: int, timeout: float) -> int:
+        """Waits until the job changes after the given revision, or the timeout passes; returns the current revision."""
+        if self._revision == revision:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._revision
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "message": self.message,
+            "details": self.details,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """In-process job queue served by a bounded pool of asyncio workers.
+
+    Jobs are coroutines taking their Job, through which they report progress.
+    The queue is bounded too: submit() raises JobQueueFull instead of accepting
+    unbounded work. Finished jobs are kept, oldest evicted first, so that their
+    status and result can still be polled for a while. State lives in this process
+    only; jobs do not survive a restart.
+
+    Named slots cap how many jobs run a given step at once (e.g. GraphDB loads),
+    independently of how many workers are busy with other steps.
+    """
+
+    def __init__(self, max_workers: int, max_queued: int, max_finished: int, slot_limits: Dict[str, int] = None):
+        self._max_workers = max_workers
+        self._max_queued = max_queued
+        self._max_finished = max_finished
+        self._slot_limits = slot_limits or {}
+        self._queue = None
+        self._slots = {}
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._workers = []
+
+    async def start(self):
+        # Queue and semaphores belong to the running event loop, so they are created here.
+        if not self._workers:
+            self._queue = asyncio.Queue(maxsize=self._max_queued)
+            self._slots = {name: asyncio.Semaphore(limit) for name, limit in self._slot_limits.items()}
+            self._workers = [asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+                             for i in range(self._max_workers)]
+            logger.info(f"Job manager started with {self._max_workers} workers.")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                job = self._queue.get_nowait()
+                await self._finish(job, CANCELLED, error="Server shut down before the job started.")
+            self._queue = None
+
+    @asynccontextmanager
+    async def slot(self, name: str):
+        semaphore = self._slots.get(name)
+        if semaphore is None:
+            yield
+            return
+        async with semaphore:
+            yield
+
+    def submit(self, kind: str, run: Callable[[Job], Awaitable], cleanup: Optional[Callable[[], None]] = None) -> Job:
+        """Queues run(job); cleanup, if given, is called exactly once when the job finishes or is dropped."""
+        if self._queue is None:
+            raise RuntimeError("Job manager is not running.")
+        job = Job(kind, run, cleanup)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Job queue is full ({self._max_queued} jobs waiting).")
+        self._jobs[job.id] = job
+        logger.info(f"Job {job.id} ({kind}) queued.")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        if job.status == QUEUED:
+            # Still in the queue: the worker that picks it up skips it.
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            job.notify()
+        elif job._task is not None:
+            job._task.cancel()
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == CANCELLED:
+                    await self._finish(job, CANCELLED)
+                    continue
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.notify()
+        job._task = asyncio.create_task(job._run(job))
+        try:
+            result = await asyncio.shield(job._task)
+        except asyncio.CancelledError:
+            if not job._task.cancelled():
+                # The worker itself is being stopped: take the job down with it.
+                job._task.cancel()
+                await asyncio.gather(job._task, return_exceptions=True)
+                await self._finish(job, CANCELLED, error="Server shut down while the job was running.")
+                raise
+            await self._finish(job, CANCELLED)
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+            await self._finish(job, FAILED, error=getattr(e, "detail", None) or str(e))
+        else:
+            job.result = result
+            job.progress = 1.0
+            await self._finish(job, SUCCEEDED)
+
+    async def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = job.finished_at or time.time()
+        job._task = None
+        if job._cleanup is not None:
+            try:
+                await asyncio.to_thread(job._cleanup)
+            except Exception as e:
+                logger.warning(f"Cleanup of job {job.id} failed: {e}")
+            job._cleanup = None
+        logger.info(f"Job {job.id} ({job.kind}) {status}.")
+        job.notify()
+
+        self._finished[job.id] = job
+        while len(self._finished) > self._max_finished:
+            evicted, _ = self._finished.popitem(last=False)
+            self._jobs.pop(evicted, None)
+
+
+job_manager = JobManager(
+    max_workers=settings.jobs_max_workers,
+    max_queued=settings.jobs_max_queued,
+    max_finished=settings.jobs_max_finished,
+    slot_limits={"graphdb_load": settings.jobs_max_concurrent_graphdb_loads}
+)
@@ -0,0 +1,180 @@
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = tuple(4 ** exponent * 256 for exponent in range(10))  # 256 B .. 64 MiB
+COUNT_BUCKETS = tuple(10 ** exponent for exponent in range(7))
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(sample name, formatted labels, value) of every sample to render."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, the +Inf bucket last, then sum.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """Metrics defined in this process, plus collectors computing samples at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """collector returns complete exposition lines (HELP, TYPE and samples)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# API
+http_request_duration = Histogram(
+    "taxonomy_http_request_duration_seconds",
+    "Time to serve an API request, until the last byte of the response body.",
+    ("method", "route", "status"))
+http_request_size = Histogram(
+    "taxonomy_http_request_size_bytes", "Size of API request bodies (uploads included).",
+    ("method", "route"), SIZE_BUCKETS)
+http_response_size = Histogram(
+    "taxonomy_http_response_size_bytes", "Size of API response bodies, streamed ones included.",
+    ("method", "route"), SIZE_BUCKETS)
+
+# GraphDB
+graphdb_request_duration = Histogram(
+    "taxonomy_graphdb_request_duration_seconds",
+    "Time of a GraphDB request, until its response body was read or closed.",
+    ("operation", "outcome"))
+graphdb_response_size = Histogram(
+    "taxonomy_graphdb_response_size_bytes", "Size of GraphDB response bodies.", ("operation",), SIZE_BUCKETS)
+
+# LLM
+llm_call_duration = Histogram(
+    "taxonomy_llm_call_duration_seconds", "Time of an LLM generation call, streamed ones until the last piece.",
+    ("provider", "mode", "outcome"), LATENCY_BUCKETS + (600, 1200))
+llm_tokens = Counter(
+    "taxonomy_llm_tokens_total", "Estimated prompt and completion tokens of LLM calls.", ("provider", "kind"))
+llm_cache_lookups = Counter(
+    "taxonomy_llm_cache_lookups_total", "LLM result cache lookups.", ("result",))
+
+# Taxonomy tree
+tree_load_duration = Histogram(
+    "taxonomy_tree_load_duration_seconds", "Time to load the tree model: GraphDB fetch and in-process build.",
+    ("mode", "stage"))
+tree_nodes = Histogram(
+    "taxonomy_tree_nodes", "Number of concepts in each loaded tree model.", (), COUNT_BUCKETS)
+tree_last_nodes = Gauge(
+    "taxonomy_tree_last_nodes", "Size of the most recently loaded tree model.", ("kind",))
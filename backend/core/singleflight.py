@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+# Every SingleFlight created, by name, for the status/metrics endpoints.
+_registry: Dict[str, "SingleFlight"] = {}
+
+
+class _StreamFlight:
+    __slots__ = ("opening", "subscribers", "pump")
+
+    def __init__(self):
+        self.opening: Optional[asyncio.Task] = None
+        self.subscribers = []
+        self.pump: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical reads: callers with the same key share one execution.
+
+    do() shares the awaited result (or exception) of one call among every caller that
+    arrives while it is running. stream() does the same for streamed bodies: callers
+    arriving before the first chunk is sent subscribe to the same source, each through
+    a small bounded queue, so memory stays constant and the slowest subscriber paces
+    the source. Later callers start a new flight. A caller that goes away never
+    cancels the flight for the others.
+    """
+
+    def __init__(self, name: str, stream_queue_size: int = 8):
+        self.name = name
+        self._stream_queue_size = stream_queue_size
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _StreamFlight] = {}
+        # The event loop only keeps weak references to tasks.
+        self._pumps = set()
+        self.requests = 0
+        self.executions = 0
+        self.deduplicated = 0
+        _registry[name] = self
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._calls) + len(self._streams)
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        self.requests += 1
+        task = self._calls.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(self._calls, key, done))
+        else:
+            self.deduplicated += 1
+            logger.debug(f"{self.name}: joined the in-flight call for {key!r}.")
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finished(flights, key, task):
+        if flights.get(key) is task:
+            del flights[key]
+        # Mark the exception retrieved: callers that were cancelled meanwhile never will.
+        if not task.cancelled():
+            task.exception()
+
+    async def stream(self, key: Hashable,
+                     open_stream: Callable[[], Awaitable[Optional[AsyncIterator[bytes]]]]) -> Optional[AsyncIterator[bytes]]:
+        """Subscribes to the stream opened by open_stream; errors raised while opening reach every caller.
+
+        Returns None if open_stream does.
+        """
+        self.requests += 1
+        flight = self._streams.get(key)
+        if flight is None:
+            self.executions += 1
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.opening = asyncio.ensure_future(open_stream())
+            flight.opening.add_done_callback(lambda done: self._opened(key, flight, done))
+        else:
+            self.deduplicated += 1
+            logger.debug(f"{self.name}: joined the in-flight stream for {key!r}.")
+
+        queue = asyncio.Queue(self._stream_queue_size)
+        flight.subscribers.append(queue)
+        try:
+            source = await asyncio.shield(flight.opening)
+        except BaseException:
+            self._unsubscribe(flight, queue)
+            raise
+        if source is None:
+            return None
+
+        subscription = self._subscription(flight, queue)
+        # A body generator that is never started does not run its finally block.
+        weakref.finalize(subscription, self._unsubscribe, flight, queue)
+        return subscription
+
+    def _opened(self, key, flight, task):
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            flight.pump = asyncio.ensure_future(self._pump(key, flight, task.result()))
+            self._pumps.add(flight.pump)
+            flight.pump.add_done_callback(self._pumps.discard)
+        # A flight that failed to open, or has nothing to stream, takes no more subscribers.
+        elif self._streams.get(key) is flight:
+            del self._streams[key]
+
+    async def _pump(self, key, flight, source):
+        # From the first chunk on, the flight takes no more subscribers.
+        if self._streams.get(key) is flight:
+            del self._streams[key]
+        try:
+            async for chunk in source:
+                # Everyone went away: stop reading, which also closes the source.
+                if not flight.subscribers:
+                    break
+                for queue in list(flight.subscribers):
+                    await queue.put(chunk)
+            end = _END
+        except Exception as e:
+            end = e
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+        for queue in list(flight.subscribers):
+            await queue.put(end)
+
+    async def _subscription(self, flight, queue):
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self._unsubscribe(flight, queue)
+
+    @staticmethod
+    def _unsubscribe(flight, queue):
+        if queue not in flight.subscribers:
+            return
+        flight.subscribers.remove(queue)
+        # Unblock the pump if it is waiting for room in this queue.
+        while not queue.empty():
+            queue.get_nowait()
+
+
+def all_stats() -> dict:
+    return {name: flight.stats() for name, flight in _registry.items()}
+
+
+def _render_metrics() -> List[str]:
+    lines = []
+    for field, kind, documentation in (
+            ("requests", "counter", "Reads that went through request coalescing."),
+            ("executions", "counter", "Coalesced reads actually executed against GraphDB."),
+            ("deduplicated", "counter", "Reads served by another caller's in-flight execution."),
+            ("in_flight", "gauge", "Executions currently in flight.")):
+        name = f"taxonomy_coalescing_{field}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{path="{path}"}} {stats[field]}' for path, stats in sorted(all_stats().items())]
+    return lines
+
+
+metrics.REGISTRY.register_collector(_render_metrics)
@@ -0,0 +1,204 @@
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Optional
+
+from db.tree_model import TaxonomyTreeModel, dumps_json
+
+# Radial layout: distance between depth rings, in the same units as react-force-graph coordinates.
+RING_SPACING = 80.0
+
+
+def _subtree_sizes(model: TaxonomyTreeModel, start_nodes) -> dict:
+    """Number of concepts in each subtree below start_nodes (the node itself included), by node id."""
+    sizes = {}
+    stack = [(node, False) for node in start_nodes]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            sizes[id(node)] = 1 + sum(sizes[id(child)] for child in node.children.values())
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in node.children.values())
+    return sizes
+
+
+def build_graph_view(model: TaxonomyTreeModel, root: Optional[str] = None, max_depth: Optional[int] = None,
+                     max_nodes: Optional[int] = None, layout: bool = False, offset: int = 0) -> Optional[dict]:
+    """Compact node/edge arrays of the taxonomy (or of the subtree under root), level of detail capped.
+
+    Concepts are expanded breadth-first, so the shallow levels are always shown first,
+    until max_depth (0 = the start concepts only) or max_nodes concepts are reached.
+    The children a concept could not show are folded into one aggregate node, with the
+    number of hidden direct children and hidden concepts overall; requesting the view
+    again with root set to that concept expands it. Top-level concepts that did not fit
+    have no parent to re-root at: their aggregate carries "nextOffset" instead, the
+    offset (number of top-level concepts skipped, without root) of the next page.
+
+    Nodes are referenced by their position in the "nodes" array and edges are flat
+    [parent, child, parent, child, ...] pairs of those positions, so URIs appear once.
+    "crossEdges" has, in the same form, the extra parent links of polyhierarchies
+    between shown concepts. Returns None if root is not a known concept.
+    """
+    if root is None:
+        start_nodes = list(model.roots.values())[offset:]
+    else:
+        start = model.nodes.get(root)
+        if start is None:
+            return None
+        start_nodes = [start]
+    sizes = _subtree_sizes(model, start_nodes)
+
+    nodes = []
+    edges = []
+    # Visible positions of expanded concepts' children, for the layout pass.
+    children_of = {}
+    start_ids = []
+    shown = {}
+
+    def add_aggregate(parent_id, hidden, depth):
+        aggregate_id = len(nodes)
+        hidden_concepts = sum(sizes[id(node)] for node in hidden)
+        nodes.append({
+            "id": aggregate_id,
+            "aggregate": True,
+            "title": f"+{hidden_concepts}",
+            "depth": depth,
+            "hiddenChildren": len(hidden),
+            "hiddenConcepts": hidden_concepts
+        })
+        if parent_id is None:
+            # Top-level concepts are expanded first and in order, so the hidden ones are the rest.
+            nodes[aggregate_id]["nextOffset"] = offset + len(start_ids)
+            start_ids.append(aggregate_id)
+        else:
+            edges.extend((parent_id, aggregate_id))
+            children_of.setdefault(parent_id, []).append(aggregate_id)
+
+    queue = deque([(None, start_nodes, 0)])
+    while queue:
+        parent_id, siblings, depth = queue.popleft()
+        hidden = []
+        for node in siblings:
+            if (max_depth is not None and depth > max_depth) or (max_nodes is not None and len(nodes) >= max_nodes):
+                hidden.append(node)
+                continue
+            node_id = len(nodes)
+            shown[node.key] = node_id
+            nodes.append({
+                "id": node_id,
+                "key": node.key,
+                "title": node.title,
+                "depth": depth,
+                "children": len(node.children),
+                "descendants": sizes[id(node)] - 1
+            })
+            if parent_id is None:
+                start_ids.append(node_id)
+            else:
+                edges.extend((parent_id, node_id))
+                children_of.setdefault(parent_id, []).append(node_id)
+            if node.children:
+                queue.append((node_id, list(node.children.values()), depth + 1))
+        if hidden:
+            add_aggregate(parent_id, hidden, depth)
+
+    cross_edges = []
+    for key, node_id in shown.items():
+        for parent_uri in model.extra_parents.get(key, ()):
+            if parent_uri in shown:
+                cross_edges.extend((shown[parent_uri], node_id))
+
+    if layout:
+        _radial_layout(nodes, start_ids, children_of)
+
+    return {
+        "root": root,
+        "offset": offset if root is None else 0,
+        "nodes": nodes,
+        "edges": edges,
+        "crossEdges": cross_edges,
+        "concepts": sum(sizes[id(node)] for node in start_nodes),
+        "shown": sum(1 for node in nodes if not node.get("aggregate")),
+        "truncated": any(node.get("aggregate") for node in nodes)
+    }
+
+
+def _radial_layout(nodes, start_ids, children_of):
+    """Initial coordinates: depth rings, each subtree given an angle proportional to its visible leaves.
+
+    Runs in O(nodes); the client only needs a few simulation ticks from here instead of a cold start.
+    """
+    leaves = {}
+    stack = [(node_id, False) for node_id in start_ids]
+    while stack:
+        node_id, children_done = stack.pop()
+        children = children_of.get(node_id, [])
+        if children_done or not children:
+            leaves[node_id] = sum(leaves[child] for child in children) or 1
+            continue
+        stack.append((node_id, True))
+        stack.extend((child, False) for child in children)
+
+    total = sum(leaves[node_id] for node_id in start_ids) or 1
+    # Several start concepts sit on the first ring around an empty center; a single one sits at the center.
+    offset = 0 if len(start_ids) == 1 else 1
+    stack = []
+    angle = 0.0
+    for node_id in start_ids:
+        span = 2 * math.pi * leaves[node_id] / total
+        stack.append((node_id, angle, span))
+        angle += span
+    while stack:
+        node_id, start_angle, span = stack.pop()
+        node = nodes[node_id]
+        radius = (node["depth"] + offset) * RING_SPACING
+        middle = start_angle + span / 2
+        node["x"] = round(radius * math.cos(middle), 1)
+        node["y"] = round(radius * math.sin(middle), 1)
+        children = children_of.get(node_id, [])
+        angle = start_angle
+        for child in children:
+            child_span = span * leaves[child] / leaves[node_id]
+            stack.append((child, angle, child_span))
+            angle += child_span
+
+
+class GraphViewCache:
+    """Serialized graph views of the current tree version, keyed by their parameters.
+
+    Entries of older versions are dropped as soon as a newer version is stored.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+
+    def get(self, version: int, params: tuple) -> Optional[bytes]:
+        with self._lock:
+            if version != self._version:
+                return None
+            body = self._entries.get(params)
+            if body is not None:
+                self._entries.move_to_end(params)
+            return body
+
+    def put(self, version: int, params: tuple, body: bytes):
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            if self._version is not None and version < self._version:
+                return
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+            self._entries[params] = body
+            self._entries.move_to_end(params)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def serialize_graph_view(view: dict, version: int) -> bytes:
+    return dumps_json({"version": version, **view})
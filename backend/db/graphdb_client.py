@@ -0,0 +1,123 @@
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from core import metrics
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def request_operation(request: httpx.Request) -> str:
+    """Coarse, low-cardinality kind of a GraphDB request, for metrics."""
+    path = request.url.path
+    if path.endswith("/size"):
+        return "size"
+    if path.endswith("/statements"):
+        if request.method == "GET":
+            return "export"
+        if request.headers.get("content-type", "").startswith("application/sparql-update"):
+            return "update"
+        return "import"
+    return "query"
+
+
+class _TimedStream(httpx.AsyncByteStream):
+    def __init__(self, stream, operation, started, outcome):
+        self._stream = stream
+        self._operation = operation
+        self._started = started
+        self._bytes = 0
+        self._outcome = outcome
+        self._recorded = False
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                self._bytes += len(chunk)
+                yield chunk
+        except Exception:
+            self._outcome = "error"
+            raise
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._recorded:
+                self._recorded = True
+                metrics.graphdb_request_duration.observe(time.perf_counter() - self._started,
+                                                         operation=self._operation, outcome=self._outcome)
+                metrics.graphdb_response_size.observe(self._bytes, operation=self._operation)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Times every GraphDB request, from sending it until its response body is closed."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = request_operation(request)
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            metrics.graphdb_request_duration.observe(time.perf_counter() - started,
+                                                     operation=operation, outcome="error")
+            raise
+        outcome = "error" if response.status_code >= 400 else "ok"
+        response.stream = _TimedStream(response.stream, operation, started, outcome)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _create_transport() -> httpx.AsyncBaseTransport:
+    return httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.graphdb_pool_max_connections,
+            max_keepalive_connections=settings.graphdb_pool_max_keepalive_connections,
+            keepalive_expiry=settings.graphdb_pool_keepalive_expiry_seconds
+        )
+    )
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(_create_transport()),
+        timeout=httpx.Timeout(
+            settings.graphdb_timeout_seconds,
+            connect=settings.graphdb_connect_timeout_seconds
+        )
+    )
+
+
+async def start_client():
+    global _client
+    if _client is None:
+        _client = _create_client()
+        logger.info(f"GraphDB client started (max {settings.graphdb_pool_max_connections} connections).")
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared, connection-pooled GraphDB client.
+
+    The app opens it at startup; scripts that use graphdb_ops outside the app get it lazily.
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
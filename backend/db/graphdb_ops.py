@@ -1,14 +1,49 @@
+import asyncio
+import re
+import time
+import zlib
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
 from typing import Optional
 from fastapi import HTTPException
-from SPARQLWrapper import SPARQLWrapper, JSON, TURTLE
-import requests
+import httpx
 import logging
 from urllib.parse import urlparse
+from core import metrics
 from core.config import settings
-import sparql_queries
+from core.singleflight import SingleFlight
+from db import sparql_queries
+from db.graphdb_client import get_client
+from db.graph_view import GraphViewCache, build_graph_view, serialize_graph_view
+from db.hierarchy_index import HierarchyIndex
+from db.query_profiler import QueryExecution, QueryHooks, SlowQueryLog, explain_query
+from db.search_index import TaxonomySearchIndex
+from db.tree_cache import TaxonomyTreeCache
+from db.tree_model import TreeNode, TaxonomyTreeModel, dumps_json
 
 logger = logging.getLogger(__name__)
 
+tree_cache = TaxonomyTreeCache(settings.taxonomy_tree_cache_ttl_seconds, settings.taxonomy_change_log_size)
+search_index = TaxonomySearchIndex()
+hierarchy_index = HierarchyIndex()
+graph_view_cache = GraphViewCache(settings.taxonomy_graph_cache_size)
+tree_loads = SingleFlight("taxonomy_tree_load")
+exports = SingleFlight("taxonomy_export")
+# Run after every SPARQL request sent from here (see QueryHooks); add one to profile queries.
+query_hooks = QueryHooks()
+
+
+def _invalidates_tree_cache(func):
+    # For bulk writes that cannot be expressed as a tree patch; invalidate even when
+    # the write fails, since a partially applied load may still have changed the graph.
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            tree_cache.invalidate()
+    return wrapper
+
 
 def parse_concat_results(concat_string):
     results = []
@@ -25,6 +60,7 @@ def parse_concat_results(concat_string):
     return results
 
 
+@lru_cache(maxsize=262144)
 def get_uri_display_name(uri_string: str) -> str:
     if not uri_string:
         return ""
@@ -52,257 +88,1021 @@ def get_uri_display_name(uri_string: str) -> str:
     return uri_string
 
 
-def get_taxonomy_hierarchy():
-    sparql = SPARQLWrapper(settings.graphdb_query_endpoint)
-    sparql.setQuery(sparql_queries.get_taxonomy_hierarchy_query())
-    sparql.setReturnFormat(JSON)
+async def explain_query_plan(query: str) -> Optional[str]:
+    """GraphDB's plan for a SELECT (its explain pseudo-graph), or None if the query cannot be explained."""
+    explain = explain_query(query)
+    if explain is None:
+        return None
+    response = await get_client().post(settings.graphdb_query_endpoint, data={"query": explain},
+                                       headers={"Accept": "application/sparql-results+json"})
+    response.raise_for_status()
+    # One row whose only value is the plan.
+    return "\n".join(value["value"] for row in response.json()["results"]["bindings"] for value in row.values())
+
+
+slow_query_log = SlowQueryLog(
+    settings.graphdb_slow_query_log_file,
+    settings.graphdb_slow_query_threshold_seconds,
+    settings.graphdb_slow_query_log_max_bytes,
+    settings.graphdb_slow_query_log_backup_count,
+    explain_query_plan if settings.graphdb_slow_query_explain else None
+)
+if settings.graphdb_slow_query_threshold_seconds > 0:
+    query_hooks.add(slow_query_log)
+
 
+def _start_execution(kind: str, query: str, operation_description: str):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"SPARQL {kind} for {operation_description}:\n{query}")
+    return QueryExecution(kind, operation_description, query), time.perf_counter()
+
+
+def _finish_execution(execution: QueryExecution, started: float, error: Optional[BaseException] = None):
+    execution.duration = time.perf_counter() - started
+    if error is not None and execution.error is None:
+        execution.error = str(error) or type(error).__name__
+    query_hooks.run(execution)
+
+
+@asynccontextmanager
+async def _profiled(kind: str, query: str, operation_description: str):
+    """Times the SPARQL request made in the block; the block fills in status, rows and bytes."""
+    execution, started = _start_execution(kind, query, operation_description)
     try:
-        results = sparql.query().convert()
-        return results["results"]["bindings"]
+        yield execution
+    except BaseException as e:
+        _finish_execution(execution, started, e)
+        raise
+    _finish_execution(execution, started)
+
+
+def _record_response(execution: QueryExecution, response: httpx.Response):
+    execution.status = response.status_code
+    execution.response_bytes = len(response.content)
+    if response.is_error:
+        execution.error = f"status {response.status_code}"
 
-    except Exception as e:
-        print(f"Error querying GraphDB: {e}")
-        print(f"Query used:\n{sparql_queries.get_taxonomy_hierarchy_query()}")
+
+async def _execute_sparql_select(query: str, operation_description: str):
+    try:
+        async with _profiled("select", query, operation_description) as execution:
+            response = await get_client().post(
+                settings.graphdb_query_endpoint,
+                data={"query": query},
+                headers={"Accept": "application/sparql-results+json"}
+            )
+            _record_response(execution, response)
+            response.raise_for_status()
+            bindings = response.json()["results"]["bindings"]
+            execution.rows = len(bindings)
+            return bindings
+    except httpx.HTTPStatusError as http_err:
+        error_detail = f"{http_err}. Response: {http_err.response.text}"
+        logger.error(f"Error querying GraphDB during {operation_description}: {error_detail}\nQuery used:\n{query}")
+        raise HTTPException(status_code=500, detail=f"Error when querying GraphDB: {error_detail}")
+    except httpx.HTTPError as e:
+        logger.error(f"Error querying GraphDB during {operation_description}: {e}\nQuery used:\n{query}")
         raise HTTPException(status_code=500, detail=f"Error when querying GraphDB: {e}")
 
 
-def build_hierarchy_tree(bindings):
+async def get_taxonomy_hierarchy():
+    return await _execute_sparql_select(sparql_queries.get_taxonomy_hierarchy_query(), "fetching taxonomy hierarchy")
+
+
+async def get_taxonomy_hierarchy_flat():
+    namespace = settings.base_concept_uri_prefix
+    # The three result sets are independent: fetch them concurrently over pooled connections.
+    edge_bindings, label_bindings, comment_bindings = await asyncio.gather(
+        _execute_sparql_select(sparql_queries.get_subclass_edges_query(namespace), "fetching subClassOf edges"),
+        _execute_sparql_select(sparql_queries.get_class_labels_query(namespace), "fetching class labels"),
+        _execute_sparql_select(sparql_queries.get_class_comments_query(namespace), "fetching class comments")
+    )
+    return {
+        "edge_bindings": edge_bindings,
+        "label_bindings": label_bindings,
+        "comment_bindings": comment_bindings,
+    }
+
+
+def _literal_from_binding(literal_binding):
+    return {"value": literal_binding["value"], "lang": literal_binding.get("xml:lang") or None}
+
+
+def _direct_parents(child_uri, parent_uris, parent_links):
+    # Drop shortcut edges (a parent that is also an ancestor of another parent),
+    # mirroring the FILTER NOT EXISTS of the grouped hierarchy query.
+    if len(parent_uris) == 1:
+        return parent_uris
+
+    redundant = set()
+    for parent_uri in parent_uris:
+        stack = list(parent_links.get(parent_uri, ()))
+        visited = {child_uri, parent_uri}
+        while stack:
+            ancestor_uri = stack.pop()
+            if ancestor_uri in visited:
+                continue
+            visited.add(ancestor_uri)
+            redundant.add(ancestor_uri)
+            stack.extend(parent_links.get(ancestor_uri, ()))
+
+    return [uri for uri in parent_uris if uri not in redundant] or parent_uris
+
+
+def _link_tree_nodes(nodes, parent_links):
+    """Attach every node to its primary parent and return the root nodes and the other parent links.
+
+    parent_links maps a child URI to the list of its parent URIs. Of the direct (non-shortcut)
+    parents, the greatest URI is the primary one, so the tree is stable across reloads; the
+    others are returned as (parent, child) pairs. Runs in O(nodes + edges) for single-parent
+    hierarchies. Each child is attached exactly once, so no membership check on the parent's
+    children is needed.
+    """
+    root_nodes = []
+    extra_links = []
+    for uri, node in nodes.items():
+        parent_uris = parent_links.get(uri)
+        if not parent_uris:
+            root_nodes.append(node)
+            continue
+        direct_parents = _direct_parents(uri, parent_uris, parent_links)
+        primary_parent = max(direct_parents)
+        nodes[primary_parent].attach(node)
+        extra_links.extend((parent_uri, uri) for parent_uri in dict.fromkeys(direct_parents)
+                           if parent_uri != primary_parent)
+    return root_nodes, extra_links
+
+
+def build_hierarchy_model_from_edges(edge_bindings, label_bindings, comment_bindings):
     nodes = {}
-    parent_child_links = {}
-    all_uris = set()
+    parent_links = {}
+
+    for binding in edge_bindings:
+        class_uri = binding["class"]["value"]
+        if class_uri not in nodes:
+            nodes[class_uri] = TreeNode(class_uri, get_uri_display_name(class_uri))
+
+        subclass_uri = binding.get("subClass", {}).get("value")
+        if not subclass_uri:
+            continue
+        if subclass_uri not in nodes:
+            nodes[subclass_uri] = TreeNode(subclass_uri, get_uri_display_name(subclass_uri))
+        parent_links.setdefault(subclass_uri, []).append(class_uri)
+
+    for binding in label_bindings:
+        node = nodes.get(binding["class"]["value"])
+        if node is not None:
+            node.labels.append(_literal_from_binding(binding["label"]))
+
+    for binding in comment_bindings:
+        node = nodes.get(binding["class"]["value"])
+        if node is not None:
+            node.definitions.append(_literal_from_binding(binding["comment"]))
+
+    root_nodes, extra_links = _link_tree_nodes(nodes, parent_links)
+    logger.debug(f"build_hierarchy_model_from_edges - {len(nodes)} nodes, {len(root_nodes)} root nodes, "
+                 f"{len(extra_links)} extra parent links.")
+    return TaxonomyTreeModel(nodes, root_nodes, extra_links)
+
+
+def build_hierarchy_tree_from_edges(edge_bindings, label_bindings, comment_bindings):
+    return build_hierarchy_model_from_edges(edge_bindings, label_bindings, comment_bindings).to_tree()
+
+
+async def _load_taxonomy_model():
+    mode = settings.graphdb_hierarchy_mode
+    started = time.perf_counter()
+    if mode == "grouped":
+        bindings = await get_taxonomy_hierarchy()
+        fetched = time.perf_counter()
+        # Built in a worker thread: a large taxonomy would otherwise stall every other request.
+        model = await asyncio.to_thread(build_hierarchy_model, bindings)
+    else:
+        edges = await get_taxonomy_hierarchy_flat()
+        fetched = time.perf_counter()
+        model = await asyncio.to_thread(build_hierarchy_model_from_edges, **edges)
+    built = time.perf_counter()
+
+    metrics.tree_load_duration.observe(fetched - started, mode=mode, stage="fetch")
+    metrics.tree_load_duration.observe(built - fetched, mode=mode, stage="build")
+    metrics.tree_nodes.observe(len(model.nodes))
+    metrics.tree_last_nodes.set(len(model.nodes), kind="concepts")
+    metrics.tree_last_nodes.set(len(model.roots), kind="roots")
+    metrics.tree_last_nodes.set(sum(len(parents) for parents in model.extra_parents.values()), kind="extra_links")
+    return model
+
+
+async def load_taxonomy_model():
+    """Loads the tree model from GraphDB; concurrent loads of the same tree version share one.
+
+    Keying by version means a caller never gets a load started before a write it has
+    seen acknowledged.
+    """
+    return await tree_loads.do((settings.graphdb_hierarchy_mode, tree_cache.version), _load_taxonomy_model)
+
+
+async def load_taxonomy_tree():
+    return (await load_taxonomy_model()).to_tree()
 
-    print("Debug: build_hierarchy_tree - Processing bindings...")
 
+async def get_cached_taxonomy_tree():
+    return await tree_cache.get(load_taxonomy_model)
+
+
+async def open_taxonomy_tree_stream():
+    return await tree_cache.open_stream(load_taxonomy_model)
+
+
+async def get_taxonomy_graph(root=None, max_depth=None, max_nodes=None, layout=False, offset=0):
+    """Serialized graph view (see build_graph_view) and its tree version; None body if root is unknown."""
+    params = (root, max_depth, max_nodes, layout, offset)
+    version = tree_cache.version
+    body = graph_view_cache.get(version, params)
+    if body is not None:
+        return body, version
+
+    lease = await tree_cache.acquire_model(load_taxonomy_model)
+    try:
+        view = await asyncio.to_thread(build_graph_view, lease.model, root, max_depth, max_nodes, layout, offset)
+    finally:
+        lease.release()
+    if view is None:
+        return None, lease.version
+    body = await asyncio.to_thread(serialize_graph_view, view, lease.version)
+    graph_view_cache.put(lease.version, params, body)
+    return body, lease.version
+
+
+async def get_taxonomy_dag():
+    """Serialized DAG form of the taxonomy (see TaxonomyTreeModel.to_dag) and its tree version."""
+    params = ("dag",)
+    version = tree_cache.version
+    body = graph_view_cache.get(version, params)
+    if body is not None:
+        return body, version
+
+    lease = await tree_cache.acquire_model(load_taxonomy_model)
+    try:
+        dag = await asyncio.to_thread(lease.model.to_dag)
+    finally:
+        lease.release()
+    body = await asyncio.to_thread(dumps_json, {"version": lease.version, **dag})
+    graph_view_cache.put(lease.version, params, body)
+    return body, lease.version
+
+
+async def _sync_with_tree(index):
+    # Catch an in-memory index up with the tree's change log; rebuild it after a reset,
+    # when too far behind, or when stale.
+    ttl = settings.taxonomy_tree_cache_ttl_seconds
+    stale = ttl > 0 and time.monotonic() - index.built_at >= ttl
+    if index.version is not None and not stale:
+        sync = tree_cache.changes_since(index.version)
+        if not sync["reset"]:
+            index.apply_changes(sync["changes"])
+            return
+
+    lease = await tree_cache.acquire_model(load_taxonomy_model)
+    try:
+        await asyncio.to_thread(index.rebuild, lease.model, lease.version)
+    finally:
+        lease.release()
+    # Writes that landed during the load are replayed (idempotently) on top of it.
+    sync = tree_cache.changes_since(lease.version)
+    if not sync["reset"]:
+        index.apply_changes(sync["changes"])
+
+
+async def search_concepts(query, lang=None, limit=20, under=None):
+    """Full-text search; with under set, only that concept and its descendants are returned."""
+    await _sync_with_tree(search_index)
+    accept = None
+    if under is not None:
+        await _sync_with_tree(hierarchy_index)
+
+        def accept(uri):
+            return hierarchy_index.is_descendant(uri, under)
+    return await asyncio.to_thread(search_index.search, query, lang, limit, accept)
+
+
+async def get_concept_hierarchy_info(concept_uri):
+    """Depth, number of children and descendants, and height of a concept; None if unknown."""
+    await _sync_with_tree(hierarchy_index)
+    return await asyncio.to_thread(hierarchy_index.describe, concept_uri)
+
+
+async def get_concept_ancestors(concept_uri):
+    await _sync_with_tree(hierarchy_index)
+    return await asyncio.to_thread(hierarchy_index.ancestors, concept_uri)
+
+
+async def get_concept_descendants(concept_uri, max_depth=None, offset=0, limit=None):
+    await _sync_with_tree(hierarchy_index)
+    return await asyncio.to_thread(hierarchy_index.descendants, concept_uri, max_depth, offset, limit)
+
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+RDFS_COMMENT = "http://www.w3.org/2000/01/rdf-schema#comment"
+RDFS_SUBCLASS_OF = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+
+
+def _concept_page(bindings, limit):
+    # Queries are asked for limit + 1 rows; the extra row only signals that another page exists.
+    items = [
+        {
+            "key": binding["class"]["value"],
+            "title": get_uri_display_name(binding["class"]["value"]),
+            "child_count": int(binding["childCount"]["value"])
+        }
+        for binding in bindings[:limit]
+    ]
+    next_cursor = items[-1]["key"] if len(bindings) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def get_root_concepts_page(cursor: Optional[str], limit: int):
+    query = sparql_queries.get_root_concepts_page_query(settings.base_concept_uri_prefix, cursor or "", limit + 1)
+    return _concept_page(await _execute_sparql_select(query, "fetching root concepts page"), limit)
+
+
+async def get_child_concepts_page(parent_uri: str, cursor: Optional[str], limit: int):
+    query = sparql_queries.get_child_concepts_page_query(parent_uri, settings.base_concept_uri_prefix,
+                                                         cursor or "", limit + 1)
+    return _concept_page(await _execute_sparql_select(query, f"fetching children of <{parent_uri}>"), limit)
+
+
+async def get_concept_details(concept_uri: str):
+    query = sparql_queries.get_concept_details_query(concept_uri, settings.base_concept_uri_prefix)
+    bindings = await _execute_sparql_select(query, f"fetching details of <{concept_uri}>")
+
+    details = {
+        "key": concept_uri,
+        "title": get_uri_display_name(concept_uri),
+        "parents": [],
+        "child_count": 0,
+        "definitions": [],
+        "labels": []
+    }
+    is_concept = False
     for binding in bindings:
-        class_uri = binding["class"]["value"]
-        all_uris.add(class_uri)
+        if "childCount" in binding:
+            details["child_count"] = int(binding["childCount"]["value"])
+            continue
+        prop = binding["property"]["value"]
+        if prop == RDF_TYPE:
+            is_concept = True
+        elif prop == RDFS_LABEL:
+            details["labels"].append(_literal_from_binding(binding["value"]))
+        elif prop == RDFS_COMMENT:
+            details["definitions"].append(_literal_from_binding(binding["value"]))
+        elif prop == RDFS_SUBCLASS_OF:
+            is_concept = True
+            details["parents"].append(binding["value"]["value"])
 
-        class_labels_info = binding.get("classLabelsInfo", {}).get("value")
-        class_comments_info = binding.get("classCommentsInfo", {}).get("value")
+    return details if is_concept else None
 
-        class_definitions = parse_concat_results(class_comments_info)
-        all_class_labels = parse_concat_results(class_labels_info)
-        class_title = get_uri_display_name(class_uri)
 
-        if class_uri not in nodes:
-            nodes[class_uri] = {
-                "key": class_uri,
-                "title": class_title,
-                "children": [],
-                "definitions": class_definitions,
-                "labels": all_class_labels
-            }
-        else:
-            nodes[class_uri]["title"] = class_title
-            nodes[class_uri]["definitions"] = class_definitions
-            nodes[class_uri]["labels"] = all_class_labels
-
-        if "subClass" in binding and binding["subClass"]["value"]:
-            subclass_uri = binding["subClass"]["value"]
-            all_uris.add(subclass_uri)
-            parent_child_links[subclass_uri] = class_uri
-
-            subclass_labels_info = binding.get("subClassLabelsInfo", {}).get("value")
-            subclass_comments_info = binding.get("subClassCommentsInfo", {}).get("value")
-
-            subclass_definitions = parse_concat_results(subclass_comments_info)
-            all_subclass_labels = parse_concat_results(subclass_labels_info)
-            subclass_title = get_uri_display_name(subclass_uri)
-
-            if subclass_uri not in nodes:
-                nodes[subclass_uri] = {
-                    "key": subclass_uri,
-                    "title": subclass_title,
-                    "children": [],
-                    "definitions": subclass_definitions,
-                    "labels": all_subclass_labels
-                }
-            else:
-                nodes[subclass_uri]["title"] = subclass_title
-                nodes[subclass_uri]["definitions"] = subclass_definitions
-                nodes[subclass_uri]["labels"] = all_subclass_labels
+def _record_concept_added(concept_uri, parent_concept_uri=None):
+    title = get_uri_display_name(concept_uri)
+    return tree_cache.apply(
+        {"op": "add_concept", "key": concept_uri, "title": title, "parent": parent_concept_uri},
+        lambda model: model.add_concept(concept_uri, title, parent_concept_uri)
+    )
+
+
+def _record_concept_deleted(concept_uri):
+    return tree_cache.apply(
+        {"op": "delete_concept", "key": concept_uri},
+        lambda model: model.delete_concept(concept_uri)
+    )
 
-    root_nodes = []
-    processed_children = set()
-
-    for child_uri, parent_uri in parent_child_links.items():
-        if parent_uri in nodes and child_uri in nodes:
-            if nodes[child_uri] not in nodes[parent_uri]["children"]:
-                nodes[parent_uri]["children"].append(nodes[child_uri])
-                processed_children.add(child_uri)
-            else:
-                print(f"Debug: Child {child_uri} already in parent {parent_uri}, skipping duplicate add.")
-        else:
-            print(f"Warning: Parent {parent_uri} or Child {child_uri} not found in nodes dict during linking.")
 
-    for uri in all_uris:
-        if uri not in parent_child_links:
-            if uri in nodes:
-                root_nodes.append(nodes[uri])
-            else:
-                print(f"Warning: Potential root node {uri} not found in nodes dictionary.")
+def _record_literal_change(op, concept_uri, field, value, lang):
+    literal = {"value": value, "lang": lang if lang and lang.strip() else None}
+    patch = TaxonomyTreeModel.add_literal if op == "add_literal" else TaxonomyTreeModel.delete_literal
+    return tree_cache.apply(
+        {"op": op, "key": concept_uri, "field": field, "literal": literal},
+        lambda model: patch(model, concept_uri, field, literal)
+    )
 
-    all_node_uris = set(nodes.keys())
-    linked_uris = set(parent_child_links.keys()) | set(parent_child_links.values())
-    identified_root_uris = {node['key'] for node in root_nodes}
-    orphans = all_node_uris - linked_uris - identified_root_uris
-    if orphans:
-        print(f"Warning: Found potential orphan nodes (not linked, not root): {orphans}")
 
-    print(f"Debug: build_hierarchy_tree - Identified {len(root_nodes)} root nodes.")
-    return root_nodes
+def build_hierarchy_model(bindings):
+    nodes = {}
+    parent_links = {}
+
+    for binding in bindings:
+        class_uri = binding["class"]["value"]
+        # Every row of a class repeats the same aggregated labels/comments: parse them once.
+        if class_uri not in nodes:
+            nodes[class_uri] = TreeNode(
+                class_uri,
+                get_uri_display_name(class_uri),
+                definitions=parse_concat_results(binding.get("classCommentsInfo", {}).get("value")),
+                labels=parse_concat_results(binding.get("classLabelsInfo", {}).get("value"))
+            )
 
+        subclass_uri = binding.get("subClass", {}).get("value")
+        if not subclass_uri:
+            continue
+        if subclass_uri not in nodes:
+            nodes[subclass_uri] = TreeNode(
+                subclass_uri,
+                get_uri_display_name(subclass_uri),
+                definitions=parse_concat_results(binding.get("subClassCommentsInfo", {}).get("value")),
+                labels=parse_concat_results(binding.get("subClassLabelsInfo", {}).get("value"))
+            )
+        parent_links.setdefault(subclass_uri, []).append(class_uri)
 
-def clear_graphdb_repository(graphdb_endpoint):
-    clear_query = sparql_queries.clear_repository_query()
-    print("SPARQL Query being sent (in POST body):", clear_query)
+    root_nodes, extra_links = _link_tree_nodes(nodes, parent_links)
+    logger.debug(f"build_hierarchy_model - {len(nodes)} nodes, {len(root_nodes)} root nodes, "
+                 f"{len(extra_links)} extra parent links.")
+    return TaxonomyTreeModel(nodes, root_nodes, extra_links)
 
-    headers = {'Content-Type': 'application/sparql-update'}
 
+def build_hierarchy_tree(bindings):
+    return build_hierarchy_model(bindings).to_tree()
+
+
+@_invalidates_tree_cache
+async def clear_graphdb_repository(graphdb_endpoint):
     try:
-        response = requests.post(graphdb_endpoint, data=clear_query,
-                                 headers=headers)
+        response = await _post_sparql_update(sparql_queries.clear_repository_query(), graphdb_endpoint,
+                                             "clearing the repository")
 
         if response.status_code == 200 or response.status_code == 204:
-            print("Репозиторий GraphDB успешно очищен (requests, POST body)")
+            logger.info("GraphDB repository cleared.")
             return True
         else:
-            print(f"Ошибка при очистке GraphDB репозитория (requests, POST body). Статус код: {response.status_code}")
-            print(f"Содержимое ответа: {response.content.decode('utf-8')}")
+            logger.error(f"Error clearing the GraphDB repository. Status: {response.status_code}. "
+                         f"Response: {response.text}")
             return False
 
-    except requests.exceptions.RequestException as e:
-        print(f"Ошибка соединения с GraphDB (requests, POST body): {e}")
+    except httpx.HTTPError as e:
+        logger.error(f"Connection error while clearing the GraphDB repository: {e}")
         return False
 
 
-def import_taxonomy_to_graphdb(file_path, graphdb_endpoint_statements, file_content_bytes=None, content_type=None):
-    headers = {}
-    data_to_send = None
+RDF_IMPORT_CONTENT_TYPES = {
+    ".ttl": "text/turtle",
+    ".rdf": "application/rdf+xml",
+    ".owl": "application/rdf+xml",
+    ".xml": "application/rdf+xml",
+    ".nt": "application/n-triples",
+}
 
-    if file_content_bytes and content_type:
-        data_to_send = file_content_bytes
-        headers['Content-Type'] = content_type
-    elif file_path:
-        with open(file_path, 'rb') as f:
-            data_to_send = f.read()
-        if file_path.endswith('.ttl'):
-            headers['Content-Type'] = 'text/turtle'
-        else:
-            raise ValueError("Unsupported file format for import (only .ttl)")
-    else:
-        raise ValueError("You must specify either the path to the file or the contents of the file to be imported.")
+
+def rdf_import_format(filename: str):
+    """Returns (content type, gzipped) for an importable RDF file name, e.g. 'taxonomy.ttl.gz'."""
+    name = filename.lower()
+    gzipped = name.endswith(".gz")
+    if gzipped:
+        name = name[:-len(".gz")]
+    for extension, content_type in RDF_IMPORT_CONTENT_TYPES.items():
+        if name.endswith(extension):
+            return content_type, gzipped
+    raise ValueError(f"Unsupported file format for import: {filename} "
+                     f"(supported: {', '.join(RDF_IMPORT_CONTENT_TYPES)}, optionally .gz-compressed)")
+
+
+async def _gunzip_chunks(chunks):
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+            # Concatenated gzip members: start a new decompressor on the leftover bytes.
+            chunk = decompressor.unused_data if decompressor.eof else b""
+            if chunk:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+async def _read_file_chunks(file_path, chunk_size):
+    with open(file_path, 'rb') as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+async def get_graph_size():
+    response = await get_client().get(settings.graphdb_size_endpoint,
+                                      params={'context': f'<{settings.graphdb_default_graph}>'})
+    response.raise_for_status()
+    return int(response.text)
+
+
+async def _graph_size_or_none():
+    try:
+        return await get_graph_size()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning(f"Could not read the taxonomy graph size from GraphDB: {e}")
+        return None
+
+
+@_invalidates_tree_cache
+async def import_taxonomy_stream_to_graphdb(chunks, content_type, graphdb_endpoint_statements, gzipped=False,
+                                            progress=None, count_triples=True):
+    """Streams RDF chunks to GraphDB's statements endpoint with chunked transfer encoding.
+
+    Nothing is buffered beyond one chunk; gzip input is decompressed on the fly.
+    progress, if given, is called with the number of input bytes consumed so far.
+    Returns throughput statistics of the load; triple counts need two extra size
+    requests, skipped when count_triples is False.
+    """
+    transferred = {"received": 0, "sent": 0}
+
+    async def counted(source, key):
+        async for chunk in source:
+            transferred[key] += len(chunk)
+            if progress is not None and key == "received":
+                progress(transferred["received"])
+            yield chunk
+
+    body = counted(chunks, "received")
+    if gzipped:
+        body = _gunzip_chunks(body)
+    body = counted(body, "sent")
 
     params = {'context': f'<{settings.graphdb_default_graph}>'}
+    triples_before = await _graph_size_or_none() if count_triples else None
+    started = time.perf_counter()
 
     try:
-        response = requests.post(graphdb_endpoint_statements, data=data_to_send, headers=headers, params=params)
+        response = await get_client().post(graphdb_endpoint_statements, content=body,
+                                           headers={'Content-Type': content_type}, params=params)
         response.raise_for_status()
-        logger.info(f"Taxonomy imported successfully to GraphDB (status {response.status_code}).")
-    except requests.exceptions.RequestException as e:
-        error_detail = f"Import error in GraphDB: {e}. Status: {e.response.status_code if 'response' in locals() else 'N/A'}. Answer: {response.text if 'response' in locals() and e.response.text else 'N/A'}"
+    except httpx.HTTPStatusError as e:
+        error_detail = f"Import error in GraphDB: {e}. Status: {e.response.status_code}. Answer: {e.response.text}"
+        logger.error(error_detail, exc_info=True)
+        raise HTTPException(status_code=500, detail=error_detail)
+    except (httpx.HTTPError, zlib.error) as e:
+        error_detail = f"Import error in GraphDB: {e}"
         logger.error(error_detail, exc_info=True)
         raise HTTPException(status_code=500, detail=error_detail)
 
+    seconds = time.perf_counter() - started
+    triples_after = await _graph_size_or_none() if count_triples else None
+    triples = triples_after - triples_before if None not in (triples_before, triples_after) else None
+    stats = {
+        "bytes_received": transferred["received"],
+        "bytes": transferred["sent"],
+        "triples": triples,
+        "seconds": round(seconds, 3),
+        "bytes_per_second": round(transferred["sent"] / seconds) if seconds else None,
+        "triples_per_second": round(triples / seconds) if triples is not None and seconds else None,
+    }
+    logger.info(f"Taxonomy imported successfully to GraphDB (status {response.status_code}): {stats}")
+    return stats
 
-def export_taxonomy(format_str):
-    sparql = SPARQLWrapper(settings.graphdb_query_endpoint)
-    sparql.setQuery(sparql_queries.export_taxonomy_query())
 
-    if format_str == "ttl":
-        sparql.setReturnFormat(TURTLE)
+async def import_taxonomy_to_graphdb(file_path, graphdb_endpoint_statements, file_content_bytes=None, content_type=None,
+                                     progress=None, count_triples=True):
+    if file_content_bytes and content_type:
+        async def content_chunks():
+            yield file_content_bytes
+        return await import_taxonomy_stream_to_graphdb(content_chunks(), content_type, graphdb_endpoint_statements,
+                                                       progress=progress, count_triples=count_triples)
+    elif file_path:
+        content_type, gzipped = rdf_import_format(file_path)
+        return await import_taxonomy_stream_to_graphdb(
+            _read_file_chunks(file_path, settings.import_chunk_size_bytes), content_type,
+            graphdb_endpoint_statements, gzipped=gzipped, progress=progress, count_triples=count_triples)
     else:
+        raise ValueError("You must specify either the path to the file or the contents of the file to be imported.")
+
+
+async def import_ntriples_batches_to_graphdb(batches, graphdb_endpoint_statements, progress=None):
+    """Loads (N-Triples bytes, counts) batches from an async iterator as they are produced.
+
+    Each batch is a separate load, so what has arrived is in GraphDB while later batches
+    are still being produced. progress, if given, is called with the running totals.
+    """
+    totals = {"statements": 0, "skipped_statements": 0, "triples": 0, "concepts": 0, "batches": 0}
+    started = time.perf_counter()
+
+    async for data, counts in batches:
+        if counts["triples"]:
+            await import_taxonomy_to_graphdb(None, graphdb_endpoint_statements, file_content_bytes=data,
+                                             content_type="application/n-triples", count_triples=False)
+            totals["batches"] += 1
+            totals.setdefault("first_batch_seconds", round(time.perf_counter() - started, 3))
+        for key in ("statements", "skipped_statements", "triples", "concepts"):
+            totals[key] += counts[key]
+        if progress is not None:
+            progress(dict(totals))
+
+    totals["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Streamed taxonomy imported to GraphDB: {totals}")
+    return totals
+
+
+# Format -> (media type, file extension) of the export.
+EXPORT_FORMATS = {
+    "ttl": ("text/turtle", "ttl"),
+    "rdf": ("application/rdf+xml", "rdf"),
+    "nt": ("application/n-triples", "nt"),
+    "jsonld": ("application/ld+json", "jsonld"),
+}
+# Imports load into the taxonomy graph, while concepts added through the API are inserted
+# into the unnamed default graph ("null" context): together they make up the taxonomy.
+EXPORT_CONTEXTS = (f"<{settings.graphdb_default_graph}>", "null")
+
+
+async def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def open_taxonomy_export(format_str, root_uri=None, gzipped=False):
+    """Streams an export (see _open_taxonomy_export); concurrent identical exports share one GraphDB response."""
+    if format_str not in EXPORT_FORMATS:
         raise ValueError("Unsupported export format")
+    key = (format_str, root_uri, gzipped, tree_cache.version)
+    return await exports.stream(key, lambda: _open_taxonomy_export(format_str, root_uri, gzipped))
+
+
+async def _open_taxonomy_export(format_str, root_uri=None, gzipped=False):
+    """Starts streaming the taxonomy, or the subtree rooted at root_uri, in the given format.
+
+    The whole taxonomy comes from GraphDB's statements endpoint restricted to the
+    taxonomy contexts; a subtree from a property-path CONSTRUCT rooted at the concept,
+    which follows every parent link and does not grow with the subtree. Either way
+    GraphDB's response is passed through chunk by chunk (compressed on the fly if
+    gzipped), so memory use does not grow with the export.
+    GraphDB errors are raised here, before the first byte is sent. Returns None if
+    root_uri is not a known concept.
+    """
+    headers = {"Accept": EXPORT_FORMATS[format_str][0]}
+    client = get_client()
+    execution = None
+
+    if root_uri is None:
+        params = [("context", context) for context in EXPORT_CONTEXTS] + [("infer", "false")]
+        request = client.build_request("GET", settings.graphdb_statements_endpoint, params=params, headers=headers)
+    else:
+        if not await _execute_sparql_select(sparql_queries.concept_exists_query(root_uri),
+                                            f"checking that <{root_uri}> exists"):
+            return None
+        query = sparql_queries.export_subtree_query(root_uri)
+        request = client.build_request("POST", settings.graphdb_query_endpoint, headers=headers,
+                                       data={"query": query, "infer": "false"})
+        # Streamed: profiled until the last byte, without a row count.
+        execution, started = _start_execution("construct", query, f"exporting the subtree of <{root_uri}>")
 
     try:
-        results = sparql.queryAndConvert()
-        return results.decode()
-    except Exception as e:
+        response = await client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        if execution is not None:
+            _finish_execution(execution, started, e)
         raise HTTPException(status_code=500, detail=f"Error when exporting from GraphDB: {e}")
+    if response.is_error:
+        await response.aread()
+        await response.aclose()
+        if execution is not None:
+            _record_response(execution, response)
+            _finish_execution(execution, started)
+        raise HTTPException(status_code=500, detail=f"Error when exporting from GraphDB: "
+                                                    f"status {response.status_code}: {response.text}")
+    if execution is not None:
+        execution.status = response.status_code
 
+    async def body():
+        error = None
+        try:
+            async for chunk in response.aiter_bytes():
+                if execution is not None:
+                    execution.response_bytes += len(chunk)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            await response.aclose()
+            if execution is not None:
+                _finish_execution(execution, started, error)
+
+    return _gzip_chunks(body()) if gzipped else body()
 
-def add_top_concept_to_graphdb(concept_uri, graphdb_endpoint):
-    sparql_query = sparql_queries.add_top_concept_query(concept_uri)
-    print("SPARQL Query being sent for add top concept:", sparql_query)
 
-    headers = {'Content-Type': 'application/sparql-update'}
+async def add_top_concept_to_graphdb(concept_uri, graphdb_endpoint):
+    sparql_query = sparql_queries.add_top_concept_query(concept_uri)
     try:
-        response = requests.post(graphdb_endpoint, data=sparql_query, headers=headers)
+        response = await _post_sparql_update(sparql_query, graphdb_endpoint, f"adding top concept <{concept_uri}>")
         if response.status_code != 200 and response.status_code != 204:
             raise Exception(
                 f"Error adding a top concept to GraphDB. Status code: {response.status_code}, Answer: {response.text}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=500, detail=f"GraphDB connection error when adding a top concept: {e}")
+    return _record_concept_added(concept_uri)
 
 
-def add_subconcept_to_graphdb(concept_uri, parent_concept_uri, graphdb_endpoint):
+async def add_subconcept_to_graphdb(concept_uri, parent_concept_uri, graphdb_endpoint):
     sparql_query = sparql_queries.add_subconcept_query(concept_uri, parent_concept_uri)
-    print("SPARQL Query being sent for add concept:", sparql_query)
-
-    headers = {'Content-Type': 'application/sparql-update'}
     try:
-        response = requests.post(graphdb_endpoint, data=sparql_query, headers=headers)
+        response = await _post_sparql_update(sparql_query, graphdb_endpoint,
+                                             f"adding concept <{concept_uri}> under <{parent_concept_uri}>")
         if response.status_code != 200 and response.status_code != 204:
             raise Exception(
                 f"Error adding a concept to GraphDB. Status code: {response.status_code}, Answer: {response.text}")
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"GraphDB connection error when adding a concept: {e}")
+    return _record_concept_added(concept_uri, parent_concept_uri)
+
+
+def order_subtree(concept_uri, edge_bindings):
+    """Orders the node/parent bindings of get_subtree_edges_query, parents before children.
+
+    Every subClassOf link inside the subtree is respected, not only primary ones, so
+    deleting in reverse order never removes a concept before one of its descendants.
+    Returns (concepts, length of the longest path below the concept, whether a concept
+    below it also has a parent outside the subtree).
+    """
+    nodes = {concept_uri: None}
+    parent_links = []
+    for binding in edge_bindings:
+        nodes[binding["node"]["value"]] = None
+        if "parent" in binding:
+            parent_links.append((binding["parent"]["value"], binding["node"]["value"]))
+
+    children = {}
+    pending_parents = dict.fromkeys(nodes, 0)
+    crosses = False
+    for parent, child in parent_links:
+        if child == concept_uri:
+            continue
+        if parent not in nodes:
+            crosses = True
+            continue
+        if parent != child:
+            children.setdefault(parent, []).append(child)
+            pending_parents[child] += 1
+
+    order = [concept_uri]
+    depths = {concept_uri: 0}
+    position = 0
+    while position < len(order):
+        uri = order[position]
+        position += 1
+        for child in children.get(uri, ()):
+            depths[child] = max(depths.get(child, 0), depths[uri] + 1)
+            pending_parents[child] -= 1
+            if pending_parents[child] == 0:
+                order.append(child)
+    # subClassOf cycles below the concept: still deleted, after everything else.
+    order.extend(uri for uri in nodes if uri not in depths)
+    return order, max(depths.values()), crosses
+
+
+async def resolve_concept_subtree(concept_uri):
+    """The concept and all its descendants along any parent link, parents before children.
+
+    Resolved from GraphDB with one property-path query of the subtree's subClassOf
+    edges, so it also covers concepts the in-memory indexes do not know yet.
+    Returns (concepts, depth, crosses) as order_subtree does.
+    """
+    bindings = await _execute_sparql_select(sparql_queries.get_subtree_edges_query(concept_uri),
+                                            f"resolving the subtree of <{concept_uri}>")
+    return order_subtree(concept_uri, bindings)
+
+
+async def _count_concept_triples(concept_uris):
+    """Number of the given concepts that have any triple, and of their outgoing triples."""
+    bindings = await _execute_sparql_select(sparql_queries.count_concept_triples_query(concept_uris),
+                                            "counting concept triples")
+    if not bindings:
+        return 0, 0
+    return int(bindings[0]["concepts"]["value"]), int(bindings[0]["triples"]["value"])
 
 
-def delete_concept_from_graphdb(concept_uri, graphdb_endpoint):
-    sparql_query = sparql_queries.delete_concept_query(concept_uri)
-    print("SPARQL Query being sent for delete concept:", sparql_query)
+def _batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
-    headers = {'Content-Type': 'application/sparql-update'}
+
+async def preview_concept_deletion(concept_uri, sample_size=20):
+    """What deleting the concept would remove, without changing anything."""
+    concepts, depth, _ = await resolve_concept_subtree(concept_uri)
+    found = triples = 0
+    for batch in _batches(concepts, settings.delete_batch_size):
+        batch_concepts, batch_triples = await _count_concept_triples(batch)
+        found += batch_concepts
+        triples += batch_triples
+    return {
+        "uri": concept_uri,
+        "exists": found > 0,
+        "concepts": found,
+        "triples": triples,
+        "depth": depth,
+        "sample": [{"key": uri, "title": get_uri_display_name(uri)} for uri in concepts[1:sample_size + 1]]
+    }
+
+
+async def delete_concept_subtree_from_graphdb(concept_uri, graphdb_endpoint):
+    """Deletes a concept and its descendants in bounded batches, deepest concepts first.
+
+    Unlike delete_concept_query, the subtree is resolved once and each update only
+    touches a fixed number of known concepts, so large subtrees cannot make GraphDB
+    time out. A concept is only deleted after all its descendants, so if a batch fails
+    what is left is still a tree. Returns the tree change and the numbers of removed concepts and triples.
+    """
+    concepts, _, crosses = await resolve_concept_subtree(concept_uri)
+    removed = {"concepts": 0, "triples": 0, "batches": 0}
     try:
-        response = requests.post(graphdb_endpoint, data=sparql_query, headers=headers)
-        if response.status_code != 200 and response.status_code != 204:
-            raise Exception(
-                f"Error when deleting a concept from GraphDB. Status code: {response.status_code}, Відповідь: {response.text}")
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"GraphDB connection error when deleting a concept: {e}")
+        for batch in _batches(concepts[::-1], settings.delete_batch_size):
+            concepts_found, triples = await _count_concept_triples(batch)
+            await _execute_sparql_update(sparql_queries.delete_concepts_query(batch), graphdb_endpoint,
+                                         f"deleting {len(batch)} concepts under <{concept_uri}>")
+            removed["batches"] += 1
+            removed["concepts"] += concepts_found
+            removed["triples"] += triples
+    except Exception:
+        if removed["batches"]:
+            tree_cache.invalidate()
+        raise
+    logger.info(f"Deleted <{concept_uri}> and its descendants: {removed}")
+    if crosses:
+        # Concepts that also had a parent elsewhere are gone too: the in-memory indexes,
+        # which only replay a delete along the removed concept's own subtree, must reload.
+        return tree_cache.invalidate(), removed
+    return _record_concept_deleted(concept_uri), removed
 
 
-def _execute_sparql_update(query: str, graphdb_endpoint: str, operation_description: str):
-    logger.debug(f"SPARQL Update Query for {operation_description}:\n{query}")
-    headers = {'Content-Type': 'application/sparql-update'}
+async def _post_sparql_update(query: str, graphdb_endpoint: str, operation_description: str) -> httpx.Response:
+    """Sends a SPARQL update through the query hooks; the caller handles the response status."""
+    async with _profiled("update", query, operation_description) as execution:
+        response = await get_client().post(graphdb_endpoint, content=query,
+                                           headers={'Content-Type': 'application/sparql-update'})
+        _record_response(execution, response)
+        return response
+
+
+async def _execute_sparql_update(query: str, graphdb_endpoint: str, operation_description: str):
     try:
-        response = requests.post(graphdb_endpoint, data=query, headers=headers)
+        response = await _post_sparql_update(query, graphdb_endpoint, operation_description)
         # GraphDB typically returns 204 No Content for successful updates
         if response.status_code == 200 or response.status_code == 204:
              logger.info(f"{operation_description} successful. Status: {response.status_code}")
              return True
         else:
-            response.raise_for_status() # Raise HTTPError for other error codes
-    except requests.exceptions.HTTPError as http_err:
+            response.raise_for_status() # Raise HTTPStatusError for other error codes
+    except httpx.HTTPStatusError as http_err:
         error_detail = (f"HTTP error during {operation_description}: {http_err}. "
                         f"Status: {http_err.response.status_code}. Response: {http_err.response.text}")
         logger.error(error_detail)
         raise HTTPException(status_code=http_err.response.status_code, detail=error_detail)
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error_detail = f"Connection error during {operation_description} with GraphDB: {e}"
         logger.error(error_detail)
         raise HTTPException(status_code=500, detail=error_detail)
     return False
 
 
-def add_rdfs_label_to_graphdb(concept_uri: str, label_value: str, label_lang: Optional[str], graphdb_endpoint: str):
+async def add_rdfs_label_to_graphdb(concept_uri: str, label_value: str, label_lang: Optional[str], graphdb_endpoint: str):
     sparql_query = sparql_queries.add_rdfs_label_query(concept_uri, label_value, label_lang)
-    _execute_sparql_update(sparql_query, graphdb_endpoint, f"adding rdfs:label '{label_value}@{label_lang if label_lang else ''}' to <{concept_uri}>")
+    await _execute_sparql_update(sparql_query, graphdb_endpoint, f"adding rdfs:label '{label_value}@{label_lang if label_lang else ''}' to <{concept_uri}>")
+    return _record_literal_change("add_literal", concept_uri, "labels", label_value, label_lang)
 
 
-def delete_rdfs_label_from_graphdb(concept_uri: str, label_value: str, label_lang: Optional[str], graphdb_endpoint: str):
+async def delete_rdfs_label_from_graphdb(concept_uri: str, label_value: str, label_lang: Optional[str], graphdb_endpoint: str):
     sparql_query = sparql_queries.delete_rdfs_label_query(concept_uri, label_value, label_lang)
-    _execute_sparql_update(sparql_query, graphdb_endpoint, f"deleting rdfs:label '{label_value}@{label_lang if label_lang else ''}' from <{concept_uri}>")
+    await _execute_sparql_update(sparql_query, graphdb_endpoint, f"deleting rdfs:label '{label_value}@{label_lang if label_lang else ''}' from <{concept_uri}>")
+    return _record_literal_change("delete_literal", concept_uri, "labels", label_value, label_lang)
 
 
-def add_rdfs_comment_to_graphdb(concept_uri: str, comment_value: str, comment_lang: Optional[str], graphdb_endpoint: str):
+async def add_rdfs_comment_to_graphdb(concept_uri: str, comment_value: str, comment_lang: Optional[str], graphdb_endpoint: str):
     sparql_query = sparql_queries.add_rdfs_comment_query(concept_uri, comment_value, comment_lang)
-    _execute_sparql_update(sparql_query, graphdb_endpoint, f"adding rdfs:comment to <{concept_uri}>")
+    await _execute_sparql_update(sparql_query, graphdb_endpoint, f"adding rdfs:comment to <{concept_uri}>")
+    return _record_literal_change("add_literal", concept_uri, "definitions", comment_value, comment_lang)
 
 
-def delete_rdfs_comment_from_graphdb(concept_uri: str, comment_value: str, comment_lang: Optional[str], graphdb_endpoint: str):
+async def delete_rdfs_comment_from_graphdb(concept_uri: str, comment_value: str, comment_lang: Optional[str], graphdb_endpoint: str):
     sparql_query = sparql_queries.delete_rdfs_comment_query(concept_uri, comment_value, comment_lang)
-    _execute_sparql_update(sparql_query, graphdb_endpoint, f"deleting rdfs:comment from <{concept_uri}>")
\ No newline at end of file
+    await _execute_sparql_update(sparql_query, graphdb_endpoint, f"deleting rdfs:comment from <{concept_uri}>")
+    return _record_literal_change("delete_literal", concept_uri, "definitions", comment_value, comment_lang)
+
+
+async def update_rdfs_label_in_graphdb(concept_uri: str, old_value: str, old_lang: Optional[str],
+                                       new_value: str, new_lang: Optional[str], graphdb_endpoint: str):
+    sparql_query = sparql_queries.update_rdfs_label_query(concept_uri, old_value, old_lang, new_value, new_lang)
+    await _execute_sparql_update(sparql_query, graphdb_endpoint, f"updating rdfs:label of <{concept_uri}>")
+    return [_record_literal_change("delete_literal", concept_uri, "labels", old_value, old_lang),
+            _record_literal_change("add_literal", concept_uri, "labels", new_value, new_lang)]
+
+
+async def update_rdfs_comment_in_graphdb(concept_uri: str, old_value: str, old_lang: Optional[str],
+                                         new_value: str, new_lang: Optional[str], graphdb_endpoint: str):
+    sparql_query = sparql_queries.update_rdfs_comment_query(concept_uri, old_value, old_lang, new_value, new_lang)
+    await _execute_sparql_update(sparql_query, graphdb_endpoint, f"updating rdfs:comment of <{concept_uri}>")
+    return [_record_literal_change("delete_literal", concept_uri, "definitions", old_value, old_lang),
+            _record_literal_change("add_literal", concept_uri, "definitions", new_value, new_lang)]
+
+
+_LANG_TAG_PATTERN = re.compile(r"^[a-zA-Z]{1,8}(-[a-zA-Z0-9]{1,8})*$")
+_IRI_FORBIDDEN_PATTERN = re.compile(r'[\s<>"{}|^`\\]')
+
+_BATCH_LITERAL_OPERATIONS = {
+    "add_label": ("labels", "add_literal", sparql_queries.add_rdfs_label_query),
+    "delete_label": ("labels", "delete_literal", sparql_queries.delete_rdfs_label_query),
+    "add_definition": ("definitions", "add_literal", sparql_queries.add_rdfs_comment_query),
+    "delete_definition": ("definitions", "delete_literal", sparql_queries.delete_rdfs_comment_query),
+}
+
+
+def _validate_iri(uri, field_name):
+    if not uri or ":" not in uri or _IRI_FORBIDDEN_PATTERN.search(uri):
+        raise ValueError(f"{field_name} is not a valid IRI: {uri!r}")
+
+
+def _validate_literal(literal, field_name):
+    if not literal["value"] or not literal["value"].strip():
+        raise ValueError(f"{field_name} value must not be empty")
+    lang = literal.get("lang")
+    if lang and lang.strip() and not _LANG_TAG_PATTERN.match(lang):
+        raise ValueError(f"{field_name} has an invalid language tag: {lang!r}")
+
+
+def _compile_batch_operation(operation):
+    """Returns the update queries of one batch operation and callables recording its tree changes.
+
+    Raises ValueError when the operation is invalid.
+    """
+    op = operation["op"]
+
+    if op == "add_concept":
+        concept_uri = f"{settings.base_concept_uri_prefix}{operation['concept_name']}"
+        _validate_iri(concept_uri, "concept_name")
+        parent_uri = operation.get("parent_concept_uri")
+        if parent_uri is None:
+            return ([sparql_queries.add_top_concept_query(concept_uri)],
+                    [lambda: _record_concept_added(concept_uri)])
+        _validate_iri(parent_uri, "parent_concept_uri")
+        return ([sparql_queries.add_subconcept_query(concept_uri, parent_uri)],
+                [lambda: _record_concept_added(concept_uri, parent_uri)])
+
+    concept_uri = operation["concept_uri"]
+    _validate_iri(concept_uri, "concept_uri")
+
+    if op == "delete_concept":
+        return ([sparql_queries.delete_concept_query(concept_uri)],
+                [lambda: _record_concept_deleted(concept_uri)])
+
+    if op in ("update_label", "update_definition"):
+        old_literal, new_literal = operation["old_literal"], operation["new_literal"]
+        _validate_literal(old_literal, "old_literal")
+        _validate_literal(new_literal, "new_literal")
+        field, build_query = (("labels", sparql_queries.update_rdfs_label_query) if op == "update_label"
+                              else ("definitions", sparql_queries.update_rdfs_comment_query))
+        return ([build_query(concept_uri, old_literal["value"], old_literal.get("lang"),
+                             new_literal["value"], new_literal.get("lang"))],
+                [lambda: _record_literal_change("delete_literal", concept_uri, field,
+                                                old_literal["value"], old_literal.get("lang")),
+                 lambda: _record_literal_change("add_literal", concept_uri, field,
+                                                new_literal["value"], new_literal.get("lang"))])
+
+    field, change_op, build_query = _BATCH_LITERAL_OPERATIONS[op]
+    literal = operation["literal"]
+    _validate_literal(literal, "literal")
+    return ([build_query(concept_uri, literal["value"], literal.get("lang"))],
+            [lambda: _record_literal_change(change_op, concept_uri, field, literal["value"], literal.get("lang"))])
+
+
+async def execute_batch(operations, graphdb_endpoint):
+    """Validates every operation, then applies all of them in one SPARQL update request.
+
+    Nothing is sent to GraphDB unless every operation is valid.
+    """
+    results = []
+    queries = []
+    recorders = []
+    for index, operation in enumerate(operations):
+        try:
+            operation_queries, operation_recorders = _compile_batch_operation(operation)
+        except ValueError as e:
+            results.append({"index": index, "op": operation["op"], "status": "invalid", "error": str(e)})
+            continue
+        results.append({"index": index, "op": operation["op"], "status": "ok"})
+        queries.extend(operation_queries)
+        recorders.extend(operation_recorders)
+
+    if any(result["status"] != "ok" for result in results):
+        return {"applied": False, "results": results, "changes": []}
+
+    # As for a single delete (see delete_concept_subtree_from_graphdb), a deleted subtree
+    # that also lies below a parent outside it cannot be replayed as a delete change.
+    crosses = False
+    for operation in operations:
+        if operation["op"] == "delete_concept" and not crosses:
+            _, _, crosses = await resolve_concept_subtree(operation["concept_uri"])
+
+    await _execute_sparql_update(sparql_queries.combine_update_queries(queries), graphdb_endpoint,
+                                 f"applying a batch of {len(operations)} operations")
+    if crosses:
+        return {"applied": True, "results": results, "changes": [tree_cache.invalidate()]}
+    return {"applied": True, "results": results, "changes": [record() for record in recorders]}
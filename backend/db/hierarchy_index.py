@@ -0,0 +1,294 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from db.tree_model import TaxonomyTreeModel
+
+
+class HierarchyIndex:
+    """In-memory nested-set index of the concept hierarchy.
+
+    Concepts are numbered in depth-first pre-order, so the descendants of a concept
+    are exactly the positions enter < p < exit: subtree size and "is X below Y" are
+    O(1), listing descendants is a slice, and ancestors are a walk up the parent links
+    (at most depth steps). Depths are kept in an array aligned with the order.
+
+    Concepts with several parents are numbered under their primary parent only; their
+    other parent links (the model's extra_parents/extra_children) are followed as well
+    by every query. Subtrees that contain no such link keep the O(1)/slice answers
+    above; the others are walked along every link (a prefix count over the order tells
+    the two apart in O(1)).
+
+    Like the search index, it follows the tree cache's change log (see apply_changes).
+    Edits update the parent/children links at once; the numbering, which an insertion
+    or deletion shifts for much of the tree, is recomputed lazily on the next query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None
+        self.built_at = 0.0
+        self._titles: Dict[str, str] = {}
+        self._parents: Dict[str, Optional[str]] = {}
+        # Keyed by child URI, like TreeNode.children: ordered, O(1) removal.
+        self._children: Dict[str, Dict[str, None]] = {}
+        self._roots: Dict[str, None] = {}
+        # Non-primary parent links, in both directions.
+        self._extra_parents: Dict[str, Dict[str, None]] = {}
+        self._extra_children: Dict[str, Dict[str, None]] = {}
+        self._order: List[str] = []
+        self._depths: List[int] = []
+        self._enter: Dict[str, int] = {}
+        self._exit: Dict[str, int] = {}
+        # _linked[p]: number of concepts before position p that have extra children.
+        self._linked: List[int] = [0]
+        self._dirty = False
+
+    @property
+    def size(self) -> int:
+        return len(self._titles)
+
+    def rebuild(self, model: TaxonomyTreeModel, version: int):
+        """Replaces the whole index with the hierarchy of a freshly loaded model."""
+        index = HierarchyIndex()
+        for node in model.nodes.values():
+            index._titles[node.key] = node.title
+            index._parents[node.key] = node.parent.key if node.parent is not None else None
+            index._children[node.key] = dict.fromkeys(node.children)
+        index._roots = dict.fromkeys(model.roots)
+        index._extra_parents = {key: dict(parents) for key, parents in model.extra_parents.items()}
+        index._extra_children = {key: dict(children) for key, children in model.extra_children.items()}
+        index._renumber()
+
+        with self._lock:
+            # A concurrent sync may already have brought the index further.
+            if self.version is not None and self.version > version:
+                return
+            self._titles, self._parents, self._children, self._roots = (
+                index._titles, index._parents, index._children, index._roots)
+            self._extra_parents, self._extra_children = index._extra_parents, index._extra_children
+            self._order, self._depths, self._enter, self._exit = index._order, index._depths, index._enter, index._exit
+            self._linked = index._linked
+            self._dirty = False
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def _renumber(self):
+        order, depths, enter, exit_ = [], [], {}, {}
+        stack = [(key, 0, False) for key in reversed(self._roots)]
+        while stack:
+            key, depth, children_done = stack.pop()
+            if children_done:
+                exit_[key] = len(order)
+                continue
+            enter[key] = len(order)
+            order.append(key)
+            depths.append(depth)
+            stack.append((key, depth, True))
+            stack.extend((child, depth + 1, False) for child in reversed(self._children.get(key, ())))
+        linked = [0]
+        for key in order:
+            linked.append(linked[-1] + (1 if key in self._extra_children else 0))
+        self._order, self._depths, self._enter, self._exit = order, depths, enter, exit_
+        self._linked = linked
+        self._dirty = False
+
+    def _ensure_numbered(self):
+        if self._dirty:
+            self._renumber()
+
+    def apply_changes(self, changes: List[dict]):
+        """Replays tree changes newer than the index's version; already applied ones are skipped."""
+        with self._lock:
+            for change in changes:
+                if self.version is not None and change["version"] <= self.version:
+                    continue
+                self._apply(change)
+                self.version = change["version"]
+
+    def _apply(self, change):
+        op = change["op"]
+        if op == "add_concept":
+            key, parent = change["key"], change.get("parent")
+            if key in self._titles or (parent is not None and parent not in self._titles):
+                return
+            self._titles[key] = change["title"]
+            self._parents[key] = parent
+            self._children[key] = {}
+            if parent is None:
+                self._roots[key] = None
+            else:
+                self._children[parent][key] = None
+            self._dirty = True
+        elif op == "delete_concept":
+            key = change["key"]
+            if key not in self._titles:
+                return
+            parent = self._parents.get(key)
+            if parent is None:
+                self._roots.pop(key, None)
+            else:
+                self._children[parent].pop(key, None)
+            stack = [key]
+            while stack:
+                current = stack.pop()
+                stack.extend(self._children.pop(current, ()))
+                self._titles.pop(current, None)
+                self._parents.pop(current, None)
+                self._unlink_extra(current)
+            self._dirty = True
+
+    def _unlink_extra(self, key):
+        # graphdb_ops resets the tree instead of logging a delete that removes concepts
+        # with a parent outside the subtree, so only the links themselves are left to drop.
+        for child in self._extra_children.pop(key, ()):
+            parents = self._extra_parents.get(child)
+            if parents is not None:
+                parents.pop(key, None)
+                if not parents:
+                    del self._extra_parents[child]
+        for parent in self._extra_parents.pop(key, ()):
+            children = self._extra_children.get(parent)
+            if children is not None:
+                children.pop(key, None)
+                if not children:
+                    del self._extra_children[parent]
+
+    def _has_extra_links(self, enter, exit_):
+        return self._linked[exit_] > self._linked[enter]
+
+    def _all_children(self, key):
+        yield from self._children.get(key, ())
+        yield from self._extra_children.get(key, ())
+
+    def _all_parents(self, key):
+        if self._parents.get(key) is not None:
+            yield self._parents[key]
+        yield from self._extra_parents.get(key, ())
+
+    def _walk_down(self, key):
+        """The concepts below key along every link, as (concept, shortest distance), key first.
+
+        The others follow in the order of the primary numbering, each listed once.
+        """
+        distances = {key: 0}
+        level = [key]
+        while level:
+            next_level = []
+            for current in level:
+                for child in self._all_children(current):
+                    if child not in distances:
+                        distances[child] = distances[current] + 1
+                        next_level.append(child)
+            level = next_level
+        del distances[key]
+        # A concept reached through an extra link may be numbered before key itself.
+        return [(key, 0)] + sorted(distances.items(), key=lambda item: self._enter[item[0]])
+
+    def _height(self, key):
+        # Longest path down along every link; iterative post-order, cycles ignored.
+        heights = {}
+        stack = [(key, False)]
+        while stack:
+            current, children_done = stack.pop()
+            if children_done:
+                heights[current] = max((heights.get(child, 0) + 1 for child in self._all_children(current)),
+                                       default=0)
+                continue
+            if current in heights:
+                continue
+            heights[current] = 0
+            stack.append((current, True))
+            stack.extend((child, False) for child in self._all_children(current) if child not in heights)
+        return heights[key]
+
+    def _entry(self, key, position):
+        return {"key": key, "title": self._titles[key], "depth": self._depths[position]}
+
+    def describe(self, key: str) -> Optional[dict]:
+        """Depth, subtree size and height of a concept, or None if it is unknown."""
+        with self._lock:
+            self._ensure_numbered()
+            enter = self._enter.get(key)
+            if enter is None:
+                return None
+            exit_ = self._exit[key]
+            children = len(self._children[key]) + len(self._extra_children.get(key, ()))
+            if not self._has_extra_links(enter, exit_):
+                return {
+                    **self._entry(key, enter),
+                    "children": children,
+                    "descendants": exit_ - enter - 1,
+                    "height": max(self._depths[enter:exit_]) - self._depths[enter]
+                }
+            return {
+                **self._entry(key, enter),
+                "children": children,
+                "descendants": len(self._walk_down(key)) - 1,
+                "height": self._height(key)
+            }
+
+    def _all_ancestors(self, key):
+        """Every concept above key along any parent link, nearest first."""
+        found = {}
+        level = [key]
+        while level:
+            next_level = []
+            for current in level:
+                for parent in self._all_parents(current):
+                    if parent not in found and parent != key:
+                        found[parent] = None
+                        next_level.append(parent)
+            level = next_level
+        return list(found)
+
+    def ancestors(self, key: str) -> Optional[List[dict]]:
+        """Ancestors of a concept along every parent link, top-level concepts first, or None if it is unknown."""
+        with self._lock:
+            self._ensure_numbered()
+            if key not in self._enter:
+                return None
+            ancestors = [self._entry(parent, self._enter[parent]) for parent in self._all_ancestors(key)]
+            ancestors.reverse()
+            # Stable: on a single-parent path this is just the path from the top.
+            ancestors.sort(key=lambda entry: entry["depth"])
+            return ancestors
+
+    def descendants(self, key: str, max_depth: Optional[int] = None, offset: int = 0,
+                    limit: Optional[int] = None) -> Optional[dict]:
+        """A page of a concept's descendants in pre-order, optionally at most max_depth levels below it.
+
+        Returns None if the concept is unknown.
+        """
+        with self._lock:
+            self._ensure_numbered()
+            enter = self._enter.get(key)
+            if enter is None:
+                return None
+            exit_ = self._exit[key]
+            if self._has_extra_links(enter, exit_):
+                positions = [self._enter[current] for current, distance in self._walk_down(key)[1:]
+                             if max_depth is None or distance <= max_depth]
+            elif max_depth is None:
+                positions = range(enter + 1, exit_)
+            else:
+                deepest = self._depths[enter] + max_depth
+                positions = [position for position in range(enter + 1, exit_) if self._depths[position] <= deepest]
+            end = len(positions) if limit is None else offset + limit
+            return {
+                "total": len(positions),
+                "descendants": [self._entry(self._order[position], position) for position in positions[offset:end]]
+            }
+
+    def is_descendant(self, key: str, ancestor: str) -> bool:
+        """Whether key is ancestor itself or lies below it, along any parent link."""
+        with self._lock:
+            self._ensure_numbered()
+            position, enter = self._enter.get(key), self._enter.get(ancestor)
+            if position is None or enter is None:
+                return False
+            if enter <= position < self._exit[ancestor]:
+                return True
+            if not self._has_extra_links(enter, self._exit[ancestor]):
+                return False
+            return ancestor in self._all_ancestors(key)
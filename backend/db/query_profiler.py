@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import re
+import time
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Normalization for fingerprints: queries differing only in IRIs, literals, numbers,
+# VALUES rows or layout share one fingerprint.
+_COMMENT = re.compile(r"#[^\n]*")
+_IRI = re.compile(r"<[^<>\s]*>")
+_STRING = re.compile(r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'')
+_LANG_OR_DATATYPE = re.compile(r'(?<=")(?:@[A-Za-z]+(?:-[A-Za-z0-9]+)*|\^\^(?:<\?>|[\w-]*:[\w-]*))')
+_NUMBER = re.compile(r"(?<![\w?$:])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_VALUES_BLOCK = re.compile(r"(\bVALUES\s+(?:\?\w+|\([^)]*\))\s*)\{[^{}]*\}", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_WHERE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+# GraphDB answers a SELECT that reads from this pseudo-graph with the query plan instead of results.
+EXPLAIN_GRAPH = "http://www.ontotext.com/explain"
+
+
+def normalize_query(query: str) -> str:
+    # Strings and IRIs first: either may contain "#".
+    text = _IRI.sub("<?>", _STRING.sub('"?"', query))
+    text = _COMMENT.sub(" ", text)
+    text = _LANG_OR_DATATYPE.sub("", text)
+    text = _NUMBER.sub("?", text)
+    text = _VALUES_BLOCK.sub(r"\1{ ? }", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def fingerprint_query(query: str) -> str:
+    """Short stable id of the query's shape, e.g. to group a slow query's executions."""
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
+
+def explain_query(query: str) -> Optional[str]:
+    """The SELECT rewritten to return GraphDB's plan, or None if it has no WHERE clause."""
+    where = _WHERE.search(query)
+    if where is None:
+        return None
+    return f"{query[:where.start()]}FROM <{EXPLAIN_GRAPH}>\n{query[where.start():]}"
+
+
+class QueryExecution:
+    """What one SPARQL request to GraphDB did; passed to every query hook once it finished."""
+
+    __slots__ = ("kind", "description", "query", "fingerprint", "started_at", "duration", "rows",
+                 "response_bytes", "status", "error")
+
+    def __init__(self, kind: str, description: str, query: str):
+        self.kind = kind
+        self.description = description
+        self.query = query
+        self.fingerprint = fingerprint_query(query)
+        self.started_at = time.time()
+        self.duration = 0.0
+        # Result rows of a SELECT; None for updates and streamed results.
+        self.rows: Optional[int] = None
+        self.response_bytes = 0
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "description": self.description,
+            "fingerprint": self.fingerprint,
+            "duration_ms": round(self.duration * 1000, 3),
+            "rows": self.rows,
+            "response_bytes": self.response_bytes,
+            "status": self.status,
+            "error": self.error
+        }
+
+
+QueryHook = Callable[[QueryExecution], Optional[Awaitable]]
+
+
+class QueryHooks:
+    """Callbacks run after every SPARQL execution (see QueryExecution).
+
+    A hook may return an awaitable; it is run as a background task, so hooks never
+    delay the request that ran the query. A failing hook is logged and otherwise ignored.
+    """
+
+    def __init__(self):
+        self._hooks: List[QueryHook] = []
+        # The event loop only keeps weak references to tasks.
+        self._tasks = set()
+
+    def add(self, hook: QueryHook):
+        self._hooks.append(hook)
+
+    def remove(self, hook: QueryHook):
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def run(self, execution: QueryExecution):
+        if logger.isEnabledFor(logging.DEBUG):
+            fields = " ".join(f"{name}={json.dumps(value, ensure_ascii=False)}"
+                              for name, value in execution.as_dict().items())
+            logger.debug(f"sparql {fields}", extra={"sparql": execution.as_dict()})
+        for hook in list(self._hooks):
+            try:
+                pending = hook(execution)
+            except Exception:
+                logger.exception(f"SPARQL query hook {hook!r} failed.")
+                continue
+            if pending is not None:
+                task = asyncio.ensure_future(pending)
+                self._tasks.add(task)
+                task.add_done_callback(self._finished)
+
+    def _finished(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("SPARQL query hook failed.", exc_info=task.exception())
+
+    async def drain(self):
+        """Waits for the background work of hooks, e.g. before shutting down."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class SlowQueryLog:
+    """Query hook writing executions slower than threshold_seconds to a rotating JSON-lines file.
+
+    With explain_plan set (a coroutine function taking the query and returning the plan
+    text, or None), SELECTs are logged with GraphDB's plan, fetched after the fact.
+    """
+
+    def __init__(self, path: str, threshold_seconds: float, max_bytes: int, backup_count: int,
+                 explain_plan: Optional[Callable[[str], Awaitable[Optional[str]]]] = None):
+        self.path = path
+        self.threshold_seconds = threshold_seconds
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._explain_plan = explain_plan
+        self._file_logger: Optional[logging.Logger] = None
+
+    def _writer(self) -> logging.Logger:
+        # Opened on the first slow query, so an idle log creates no file.
+        if self._file_logger is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self._max_bytes,
+                                                           backupCount=self._backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            file_logger = logging.getLogger(f"{__name__}.slow_queries")
+            file_logger.handlers = [handler]
+            file_logger.setLevel(logging.INFO)
+            file_logger.propagate = False
+            self._file_logger = file_logger
+        return self._file_logger
+
+    def __call__(self, execution: QueryExecution):
+        if self.threshold_seconds <= 0 or execution.duration < self.threshold_seconds:
+            return None
+        logger.warning(f"Slow SPARQL {execution.kind} ({execution.description}): "
+                       f"{execution.duration:.3f}s, fingerprint {execution.fingerprint}.")
+        if self._explain_plan is not None and execution.kind == "select" and execution.error is None:
+            return self._write_explained(execution)
+        self._write(execution)
+        return None
+
+    async def _write_explained(self, execution: QueryExecution):
+        try:
+            plan = await self._explain_plan(execution.query)
+        except Exception as e:
+            plan = f"(explain failed: {e})"
+        self._write(execution, plan)
+
+    def _write(self, execution: QueryExecution, plan: Optional[str] = None):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(execution.started_at)) + "Z",
+            **execution.as_dict(),
+            "query": execution.query
+        }
+        if plan is not None:
+            entry["plan"] = plan
+        self._writer().info(json.dumps(entry, ensure_ascii=False))
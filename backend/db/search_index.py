@@ -0,0 +1,276 @@
+import re
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, List, Optional
+
+from db.tree_model import TaxonomyTreeModel
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Apostrophes are part of Ukrainian words (м'ясо, сім’я): drop them rather than split on them.
+_APOSTROPHES = str.maketrans("", "", "'’ʼ`")
+
+# Relevance of a query token found in each field; prefix matches of the last token count less.
+FIELD_WEIGHTS = {"labels": 3.0, "title": 2.0, "definitions": 1.0}
+PREFIX_MATCH_FACTOR = 0.6
+EXACT_LABEL_BONUS = 10.0
+LABEL_PREFIX_BONUS = 5.0
+# Bounds the work of very short prefixes ("с" may expand to thousands of tokens).
+MAX_PREFIX_EXPANSION = 500
+
+
+def fold_text(text: str) -> str:
+    """Case- and diacritic-insensitive form of a text: й matches и, ї matches і, é matches e."""
+    decomposed = unicodedata.normalize("NFKD", text.translate(_APOSTROPHES))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(fold_text(text))
+
+
+class _TrieNode:
+    __slots__ = ("children", "token")
+
+    def __init__(self):
+        self.children = {}
+        self.token = None
+
+
+class TokenTrie:
+    """Prefix tree over the indexed tokens. Removed tokens are unmarked, not pruned."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def add(self, token: str):
+        node = self._root
+        for char in token:
+            node = node.children.setdefault(char, _TrieNode())
+        node.token = token
+
+    def discard(self, token: str):
+        node = self._root
+        for char in token:
+            node = node.children.get(char)
+            if node is None:
+                return
+        node.token = None
+
+    def iter_prefix(self, prefix: str, limit: int):
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return
+        stack = [node]
+        found = 0
+        while stack and found < limit:
+            node = stack.pop()
+            if node.token is not None:
+                found += 1
+                yield node.token
+            stack.extend(node.children.values())
+
+
+class _IndexedConcept:
+    __slots__ = ("key", "title", "parent", "children", "labels", "definitions")
+
+    def __init__(self, key, title, parent=None, labels=None, definitions=None):
+        self.key = key
+        self.title = title
+        self.parent = parent
+        self.children = set()
+        self.labels = list(labels or [])
+        self.definitions = list(definitions or [])
+
+
+class TaxonomySearchIndex:
+    """In-memory full-text index over concept labels, definitions and local names.
+
+    Texts are folded (case, diacritics, apostrophes) and tokenized; each language has
+    an inverted index (token -> concept -> matching fields) and a trie of its tokens for
+    prefix queries. Untagged literals and local names are indexed under language "".
+    The index keeps its own copy of the hierarchy to report ancestor paths, and is kept
+    current by replaying the tree cache's change log (see apply_changes).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None
+        self.built_at = 0.0
+        self._concepts: Dict[str, _IndexedConcept] = {}
+        # lang -> token -> concept URI -> field -> number of literals of that field containing the token
+        self._postings: Dict[str, Dict[str, Dict[str, Dict[str, int]]]] = {}
+        self._tries: Dict[str, TokenTrie] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self._concepts)
+
+    def _index_text(self, uri, field, lang, text, delta):
+        lang = (lang or "").lower()
+        postings = self._postings.setdefault(lang, {})
+        trie = self._tries.setdefault(lang, TokenTrie())
+        for token in set(tokenize(text)):
+            concepts = postings.setdefault(token, {})
+            fields = concepts.setdefault(uri, {})
+            count = fields.get(field, 0) + delta
+            if count > 0:
+                fields[field] = count
+                if delta > 0:
+                    trie.add(token)
+                continue
+            fields.pop(field, None)
+            if not fields:
+                concepts.pop(uri, None)
+            if not concepts:
+                postings.pop(token, None)
+                trie.discard(token)
+
+    def _index_concept(self, concept, delta):
+        self._index_text(concept.key, "title", None, concept.title, delta)
+        for field in ("labels", "definitions"):
+            for literal in getattr(concept, field):
+                self._index_text(concept.key, field, literal.get("lang"), literal["value"], delta)
+
+    def rebuild(self, model: TaxonomyTreeModel, version: int):
+        """Replaces the whole index with the content of a freshly loaded model."""
+        index = TaxonomySearchIndex()
+        for node in model.nodes.values():
+            index._concepts[node.key] = _IndexedConcept(node.key, node.title,
+                                                        node.parent.key if node.parent is not None else None,
+                                                        node.labels, node.definitions)
+        for concept in index._concepts.values():
+            parent = index._concepts.get(concept.parent)
+            if parent is not None:
+                parent.children.add(concept.key)
+            index._index_concept(concept, +1)
+
+        with self._lock:
+            # A concurrent sync may already have brought the index further.
+            if self.version is not None and self.version > version:
+                return
+            self._concepts, self._postings, self._tries = index._concepts, index._postings, index._tries
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def apply_changes(self, changes: List[dict]):
+        """Replays tree changes newer than the index's version; already applied ones are skipped."""
+        with self._lock:
+            for change in changes:
+                if self.version is not None and change["version"] <= self.version:
+                    continue
+                self._apply(change)
+                self.version = change["version"]
+
+    def _apply(self, change):
+        op = change["op"]
+        if op == "add_concept":
+            if change["key"] in self._concepts:
+                return
+            concept = _IndexedConcept(change["key"], change["title"], change.get("parent"))
+            self._concepts[concept.key] = concept
+            parent = self._concepts.get(concept.parent)
+            if parent is not None:
+                parent.children.add(concept.key)
+            self._index_concept(concept, +1)
+        elif op == "delete_concept":
+            concept = self._concepts.get(change["key"])
+            if concept is None:
+                return
+            parent = self._concepts.get(concept.parent)
+            if parent is not None:
+                parent.children.discard(concept.key)
+            stack = [concept]
+            while stack:
+                current = stack.pop()
+                self._index_concept(current, -1)
+                self._concepts.pop(current.key, None)
+                stack.extend(self._concepts[key] for key in current.children if key in self._concepts)
+        elif op in ("add_literal", "delete_literal"):
+            concept = self._concepts.get(change["key"])
+            if concept is None:
+                return
+            literals = getattr(concept, change["field"])
+            literal = change["literal"]
+            if op == "add_literal" and literal not in literals:
+                literals.append(literal)
+                self._index_text(concept.key, change["field"], literal.get("lang"), literal["value"], +1)
+            elif op == "delete_literal" and literal in literals:
+                literals.remove(literal)
+                self._index_text(concept.key, change["field"], literal.get("lang"), literal["value"], -1)
+
+    def _path(self, concept):
+        path = []
+        parent = self._concepts.get(concept.parent)
+        while parent is not None and len(path) < len(self._concepts):
+            path.append({"key": parent.key, "title": parent.title})
+            parent = self._concepts.get(parent.parent)
+        path.reverse()
+        return path
+
+    def search(self, query: str, lang: Optional[str] = None, limit: int = 20,
+               accept: Optional[Callable[[str], bool]] = None) -> dict:
+        """Concepts matching every query token (the last one also as a prefix), best first.
+
+        accept, if given, filters the matching concept URIs before ranking.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {"total": 0, "hits": []}
+
+        with self._lock:
+            langs = [lang.lower(), ""] if lang else list(self._postings)
+            scores = None
+            for position, token in enumerate(tokens):
+                is_last = position == len(tokens) - 1
+                token_scores = {}
+                for language in langs:
+                    postings = self._postings.get(language)
+                    if not postings:
+                        continue
+                    matches = [(token, 1.0)] if token in postings else []
+                    if is_last:
+                        matches += [(match, PREFIX_MATCH_FACTOR)
+                                    for match in self._tries[language].iter_prefix(token, MAX_PREFIX_EXPANSION)
+                                    if match != token]
+                    for match, factor in matches:
+                        for uri, fields in postings.get(match, {}).items():
+                            score = factor * max(FIELD_WEIGHTS[field] for field in fields)
+                            if score > token_scores.get(uri, 0.0):
+                                token_scores[uri] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {uri: scores[uri] + score for uri, score in token_scores.items() if uri in scores}
+                if not scores:
+                    return {"total": 0, "hits": []}
+
+            folded_query = " ".join(tokens)
+            ranked = []
+            for uri, score in scores.items():
+                concept = self._concepts.get(uri)
+                if concept is None or (accept is not None and not accept(uri)):
+                    continue
+                bonus = 0.0
+                for literal in concept.labels:
+                    if lang and (literal.get("lang") or "").lower() not in (lang.lower(), ""):
+                        continue
+                    folded_label = " ".join(tokenize(literal["value"]))
+                    if folded_label == folded_query:
+                        bonus = max(bonus, EXACT_LABEL_BONUS)
+                    elif folded_label.startswith(folded_query):
+                        bonus = max(bonus, LABEL_PREFIX_BONUS)
+                ranked.append((-(score + bonus), len(concept.title), uri, concept))
+            ranked.sort(key=lambda entry: entry[:3])
+
+            hits = [{
+                "key": concept.key,
+                "title": concept.title,
+                "score": round(-negative_score, 3),
+                "labels": concept.labels,
+                "definitions": concept.definitions,
+                "path": self._path(concept)
+            } for negative_score, _, _, concept in ranked[:limit]]
+            return {"total": len(ranked), "hits": hits}
@@ -50,24 +50,184 @@ def get_taxonomy_hierarchy_query():
         """
 
 
+def get_subclass_edges_query(namespace="http://example.org/taxonomy/"):
+    # Explicit statements only: GraphDB's RDFS inference would otherwise materialize
+    # the transitive and reflexive closure of rdfs:subClassOf.
+    return f"""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT ?class ?subClass
+        FROM <http://www.ontotext.com/explicit>
+        WHERE {{
+          ?class a rdfs:Class .
+          FILTER STRSTARTS(STR(?class), "{namespace}")
+          OPTIONAL {{
+            ?subClass rdfs:subClassOf ?class .
+            FILTER (?class != ?subClass)
+            FILTER STRSTARTS(STR(?subClass), "{namespace}")
+          }}
+        }}
+    """
+
+
+def get_class_labels_query(namespace="http://example.org/taxonomy/"):
+    return f"""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT DISTINCT ?class ?label
+        WHERE {{
+          ?class a rdfs:Class ;
+                 rdfs:label ?label .
+          FILTER STRSTARTS(STR(?class), "{namespace}")
+        }}
+    """
+
+
+def get_class_comments_query(namespace="http://example.org/taxonomy/"):
+    return f"""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT DISTINCT ?class ?comment
+        WHERE {{
+          ?class a rdfs:Class ;
+                 rdfs:comment ?comment .
+          FILTER STRSTARTS(STR(?class), "{namespace}")
+        }}
+    """
+
+
+def get_root_concepts_page_query(namespace="http://example.org/taxonomy/", after="", limit=100):
+    # The page is selected first and child counts are aggregated over that page only.
+    escaped_after = _escape_sparql_literal_value(after)
+    return f"""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT ?class (COUNT(DISTINCT ?child) AS ?childCount)
+        FROM <http://www.ontotext.com/explicit>
+        WHERE {{
+          {{
+            SELECT DISTINCT ?class
+            WHERE {{
+              ?class a rdfs:Class .
+              FILTER STRSTARTS(STR(?class), "{namespace}")
+              FILTER (STR(?class) > "{escaped_after}")
+              FILTER NOT EXISTS {{
+                ?class rdfs:subClassOf ?parent .
+                ?parent a rdfs:Class .
+                FILTER (?parent != ?class)
+                FILTER STRSTARTS(STR(?parent), "{namespace}")
+              }}
+            }}
+            ORDER BY STR(?class)
+            LIMIT {int(limit)}
+          }}
+          OPTIONAL {{
+            ?child rdfs:subClassOf ?class .
+            FILTER (?child != ?class)
+            FILTER STRSTARTS(STR(?child), "{namespace}")
+          }}
+        }}
+        GROUP BY ?class
+        ORDER BY STR(?class)
+    """
+
+
+def get_child_concepts_page_query(parent_uri, namespace="http://example.org/taxonomy/", after="", limit=100):
+    escaped_after = _escape_sparql_literal_value(after)
+    return f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT ?class (COUNT(DISTINCT ?child) AS ?childCount)
+        FROM <http://www.ontotext.com/explicit>
+        WHERE {{
+          {{
+            SELECT DISTINCT ?class
+            WHERE {{
+              ?class rdfs:subClassOf <{parent_uri}> .
+              FILTER (?class != <{parent_uri}>)
+              FILTER STRSTARTS(STR(?class), "{namespace}")
+              FILTER (STR(?class) > "{escaped_after}")
+            }}
+            ORDER BY STR(?class)
+            LIMIT {int(limit)}
+          }}
+          OPTIONAL {{
+            ?child rdfs:subClassOf ?class .
+            FILTER (?child != ?class)
+            FILTER STRSTARTS(STR(?child), "{namespace}")
+          }}
+        }}
+        GROUP BY ?class
+        ORDER BY STR(?class)
+    """
+
+
+def get_concept_details_query(concept_uri, namespace="http://example.org/taxonomy/"):
+    return f"""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT ?property ?value ?childCount
+        FROM <http://www.ontotext.com/explicit>
+        WHERE {{
+          {{
+            VALUES ?property {{ rdf:type rdfs:label rdfs:comment }}
+            <{concept_uri}> ?property ?value .
+          }}
+          UNION
+          {{
+            <{concept_uri}> rdfs:subClassOf ?value .
+            BIND(rdfs:subClassOf AS ?property)
+            FILTER (?value != <{concept_uri}>)
+            FILTER STRSTARTS(STR(?value), "{namespace}")
+          }}
+          UNION
+          {{
+            SELECT (COUNT(DISTINCT ?child) AS ?childCount)
+            WHERE {{
+              ?child rdfs:subClassOf <{concept_uri}> .
+              FILTER (?child != <{concept_uri}>)
+              FILTER STRSTARTS(STR(?child), "{namespace}")
+            }}
+          }}
+        }}
+    """
+
+
 def clear_repository_query():
     return """
         CLEAR ALL
     """
 
 
-def export_taxonomy_query():
-    return """
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+def export_subtree_query(root_uri):
+    # Resolved by GraphDB along every subClassOf link, so the query stays the same size whatever
+    # the subtree's; only the root's link to its own parent is left out.
+    return f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX ex: <http://example.org/taxonomy/>
 
-        CONSTRUCT {
+        CONSTRUCT {{
           ?s ?p ?o .
-        }
-        WHERE {
+        }}
+        WHERE {{
+          ?s rdfs:subClassOf* <{root_uri}> .
           ?s ?p ?o .
-        }
+          FILTER (?s != <{root_uri}> || ?p != rdfs:subClassOf)
+        }}
+    """
+
+
+def concept_exists_query(concept_uri):
+    return f"""
+        SELECT ?p
+        WHERE {{
+          <{concept_uri}> ?p ?o .
+        }}
+        LIMIT 1
     """
 
 
@@ -97,20 +257,60 @@ def add_subconcept_query(concept_uri, parent_uri):
 
 
 def delete_concept_query(concept_uri):
+    # Every subject of an rdfs:subClassOf pointing into the subtree is itself in the subtree,
+    # so deleting the outgoing triples of its concepts also removes the links to them.
     return f"""
         PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
 
         DELETE {{
-          ?node ?p ?o .                     
-          ?s rdfs:subClassOf ?node .       
+          ?node ?p ?o .
+        }}
+        WHERE {{
+          ?node rdfs:subClassOf* <{concept_uri}> .
+          ?node ?p ?o .
         }}
+    """
+
+
+def get_subtree_edges_query(concept_uri):
+    # Explicit statements only: with the inferred closure every ancestor of the concept
+    # would look like a parent outside the subtree.
+    return f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        SELECT DISTINCT ?node ?parent
+        FROM <http://www.ontotext.com/explicit>
+        WHERE {{
+          ?node rdfs:subClassOf* <{concept_uri}> .
+          OPTIONAL {{ ?node rdfs:subClassOf ?parent . }}
+        }}
+    """
+
+
+def count_concept_triples_query(concept_uris):
+    # Explicit statements only, i.e. what delete_concepts_query removes; the statements
+    # GraphDB inferred from them are retracted with them and not counted.
+    values = " ".join(f"<{uri}>" for uri in concept_uris)
+    return f"""
+        SELECT (COUNT(DISTINCT ?node) AS ?concepts) (COUNT(*) AS ?triples)
+        FROM <http://www.ontotext.com/explicit>
         WHERE {{
-          BIND(<{concept_uri}> AS ?root)
-          ?node rdfs:subClassOf* ?root .
-          OPTIONAL {{ ?node ?p ?o . }}
-          OPTIONAL {{ ?s rdfs:subClassOf ?node . }}
+          VALUES ?node {{ {values} }}
+          ?node ?p ?o .
         }}
+    """
 
+
+def delete_concepts_query(concept_uris):
+    values = " ".join(f"<{uri}>" for uri in concept_uris)
+    return f"""
+        DELETE {{
+          ?node ?p ?o .
+        }}
+        WHERE {{
+          VALUES ?node {{ {values} }}
+          ?node ?p ?o .
+        }}
     """
 
 
@@ -175,3 +375,38 @@ def delete_rdfs_comment_query(concept_uri, comment_value, comment_lang):
           <{concept_uri}> rdfs:comment {literal_to_delete} .
         }}
     """
+
+
+def _rdf_literal(value, lang):
+    escaped_value = _escape_sparql_literal_value(value)
+    if lang and lang.strip():
+        return f'"{escaped_value}"@{lang}'
+    return f'"{escaped_value}"'
+
+
+def _replace_literal_query(concept_uri, predicate, old_value, old_lang, new_value, new_lang):
+    # One DELETE/INSERT operation: the old and new values are swapped atomically.
+    return f"""
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        DELETE {{
+          <{concept_uri}> {predicate} {_rdf_literal(old_value, old_lang)} .
+        }}
+        INSERT {{
+          <{concept_uri}> {predicate} {_rdf_literal(new_value, new_lang)} .
+        }}
+        WHERE {{}}
+    """
+
+
+def update_rdfs_label_query(concept_uri, old_value, old_lang, new_value, new_lang):
+    return _replace_literal_query(concept_uri, "rdfs:label", old_value, old_lang, new_value, new_lang)
+
+
+def update_rdfs_comment_query(concept_uri, old_value, old_lang, new_value, new_lang):
+    return _replace_literal_query(concept_uri, "rdfs:comment", old_value, old_lang, new_value, new_lang)
+
+
+def combine_update_queries(queries):
+    # A SPARQL update request is a ';'-separated sequence of operations, each with its own
+    # prologue; GraphDB executes the whole request in a single transaction.
+    return " ;\n".join(query.strip() for query in queries)
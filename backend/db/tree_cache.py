@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+from typing import Awaitable, Callable, Iterator, NamedTuple
+
+from db.tree_model import TaxonomyTreeModel
+
+logger = logging.getLogger(__name__)
+
+
+class CachedTree(NamedTuple):
+    body: bytes
+    etag: str
+    version: int
+
+
+class TreeStream(NamedTuple):
+    chunks: Iterator[bytes]
+    etag: str
+    version: int
+
+
+class ModelLease(NamedTuple):
+    model: TaxonomyTreeModel
+    version: int
+    release: Callable[[], None]
+
+
+class TaxonomyTreeCache:
+    """In-process cache of the taxonomy tree model and its serialized JSON body.
+
+    Every write bumps a monotonically increasing version and is recorded in a bounded
+    change log. Writes that can be expressed as a patch are applied to the cached model
+    in place; anything else (imports, failed writes) drops the model and records a
+    "reset" change, telling clients to refetch the whole tree.
+    A build that was started before a write is returned to its caller but never stored.
+
+    The lock is never held across an await. The model is serialized from a worker
+    thread, lazily for streams and at once for the cached body, while other requests
+    may write; a write arriving while a model is being serialized detaches that model
+    instead of patching it, and the next read reloads from GraphDB.
+    """
+
+    def __init__(self, ttl_seconds: float, change_log_size: int):
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._model = None
+        self._body = None
+        self._etag = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._version = 0
+        self._changes = deque(maxlen=change_log_size)
+        # Distinguishes versions of this process from those handed out before a restart.
+        self._epoch = uuid.uuid4().hex[:12]
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _is_fresh(self) -> bool:
+        if self._model is None:
+            return False
+        return self._ttl_seconds <= 0 or time.monotonic() - self._built_at < self._ttl_seconds
+
+    def _serialize(self, model: TaxonomyTreeModel, version: int) -> CachedTree:
+        body = b"".join(model.iter_json())
+        return CachedTree(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"', version=version)
+
+    def stream_etag(self, version=None, variant: str = "") -> str:
+        """Version-based ETag for streamed trees, known without loading or serializing anything.
+
+        variant tells apart different representations of the same version.
+        """
+        version = self._version if version is None else version
+        suffix = f"-{variant}" if variant else ""
+        return f'"{self._epoch}-{version}{suffix}"'
+
+    async def acquire_model(self, loader: Callable[[], Awaitable[TaxonomyTreeModel]]) -> ModelLease:
+        """Returns the cached model (loading it if needed), protected from patches until released.
+
+        Meant for reading the model from a worker thread: writes arriving before
+        release() detach the model instead of patching it under the reader.
+        """
+        with self._lock:
+            model = self._model if self._is_fresh() else None
+            generation = self._generation
+            version = self._version
+            if model is not None:
+                model.readers += 1
+
+        if model is None:
+            model = await loader()
+            with self._lock:
+                if generation == self._generation:
+                    self._model = model
+                    self._body = self._etag = None
+                    self._built_at = time.monotonic()
+                model.readers += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    model.readers -= 1
+
+        return ModelLease(model=model, version=version, release=release)
+
+    async def open_stream(self, loader: Callable[[], Awaitable[TaxonomyTreeModel]]) -> TreeStream:
+        lease = await self.acquire_model(loader)
+
+        def chunks():
+            try:
+                yield from lease.model.iter_json()
+            finally:
+                lease.release()
+
+        stream = chunks()
+        # A generator that is never started does not run its finally block.
+        weakref.finalize(stream, lease.release)
+        return TreeStream(chunks=stream, etag=self.stream_etag(lease.version), version=lease.version)
+
+    async def get(self, loader: Callable[[], Awaitable[TaxonomyTreeModel]]) -> CachedTree:
+        with self._lock:
+            if self._is_fresh() and self._body is not None:
+                return CachedTree(body=self._body, etag=self._etag, version=self._version)
+
+        lease = await self.acquire_model(loader)
+        try:
+            cached = await asyncio.to_thread(self._serialize, lease.model, lease.version)
+        finally:
+            lease.release()
+
+        with self._lock:
+            # Not stored if a write detached or replaced the model in the meantime.
+            if self._model is lease.model and self._version == lease.version:
+                self._body, self._etag = cached.body, cached.etag
+            else:
+                logger.debug("Taxonomy tree changed while serializing; result not cached.")
+        return cached
+
+    def _record(self, change: dict) -> dict:
+        self._generation += 1
+        self._version += 1
+        change = {"version": self._version, **change}
+        self._changes.append(change)
+        return change
+
+    def _reset(self) -> dict:
+        self._model = None
+        self._body = self._etag = None
+        return self._record({"op": "reset"})
+
+    def apply(self, change: dict, patch: Callable[[TaxonomyTreeModel], bool]) -> dict:
+        """Records a change and patches the cached model with it, if one is loaded."""
+        with self._lock:
+            if self._model is not None and self._model.readers:
+                self._model = None
+            elif self._model is not None and not patch(self._model):
+                logger.debug(f"Could not patch cached taxonomy tree with {change}; dropping it.")
+                return self._reset()
+            self._body = self._etag = None
+            return self._record(change)
+
+    def invalidate(self) -> dict:
+        with self._lock:
+            return self._reset()
+
+    def changes_since(self, since: int) -> dict:
+        with self._lock:
+            changes = [change for change in self._changes if change["version"] > since]
+            # The log is bounded: a client older than its first entry can no longer catch up.
+            missed = since < self._version and (not changes or changes[0]["version"] != since + 1)
+            reset = missed or since > self._version or any(change["op"] == "reset" for change in changes)
+            return {
+                "version": self._version,
+                "reset": reset,
+                "changes": [] if reset else changes
+            }
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
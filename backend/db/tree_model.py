@@ -0,0 +1,207 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: a faster encoder producing the same compact UTF-8 output
+    orjson = None
+
+
+def dumps_json(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TreeNode:
+    __slots__ = ("key", "title", "parent", "children", "definitions", "labels")
+
+    def __init__(self, key, title, definitions=None, labels=None):
+        self.key = key
+        self.title = title
+        self.parent = None
+        # Keyed by child URI: ordered, O(1) membership and removal.
+        self.children = {}
+        self.definitions = definitions if definitions is not None else []
+        self.labels = labels if labels is not None else []
+
+    def attach(self, child):
+        child.parent = self
+        self.children[child.key] = child
+
+    def to_dict(self):
+        # Iterative post-order walk: deep hierarchies must not hit the recursion limit.
+        converted = {}
+        stack = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            converted[id(node)] = {
+                "key": node.key,
+                "title": node.title,
+                "children": [converted.pop(id(child)) for child in node.children.values()],
+                "definitions": node.definitions,
+                "labels": node.labels
+            }
+        return converted[id(self)]
+
+
+class TaxonomyTreeModel:
+    """Mutable in-memory taxonomy tree: node index by URI plus parent pointers.
+
+    A concept with several parents (a polyhierarchy) appears once in the tree, under
+    its primary parent; its other parent links are kept in extra_parents/extra_children
+    and only show up in the DAG form (to_dag).
+
+    The patch methods return False when a change cannot be applied faithfully
+    (unknown concept, concept gaining a second parent, ...); callers then drop
+    the model and reload it from GraphDB.
+    """
+
+    def __init__(self, nodes, roots, extra_links=()):
+        self.nodes = nodes
+        self.roots = {root.key: root for root in roots}
+        # Child URI -> its non-primary parent URIs, and the reverse; dicts for ordered O(1) removal.
+        self.extra_parents = {}
+        self.extra_children = {}
+        for parent_uri, child_uri in extra_links:
+            self.extra_parents.setdefault(child_uri, {})[parent_uri] = None
+            self.extra_children.setdefault(parent_uri, {})[child_uri] = None
+        # Number of streams currently serializing this model; it must not be patched meanwhile.
+        self.readers = 0
+
+    def to_tree(self):
+        return [root.to_dict() for root in self.roots.values()]
+
+    def to_dag(self):
+        """Shared node table plus parent -> child edge list: every concept and every link exactly once.
+
+        Nodes are referenced by their position in "nodes"; "edges" is a flat
+        [parent, child, parent, child, ...] list of those positions, primary links first.
+        """
+        positions = {key: position for position, key in enumerate(self.nodes)}
+        edges = []
+        for node in self.nodes.values():
+            if node.parent is not None:
+                edges.extend((positions[node.parent.key], positions[node.key]))
+        for child_uri, parent_uris in self.extra_parents.items():
+            for parent_uri in parent_uris:
+                edges.extend((positions[parent_uri], positions[child_uri]))
+        return {
+            "nodes": [{
+                "key": node.key,
+                "title": node.title,
+                "definitions": node.definitions,
+                "labels": node.labels
+            } for node in self.nodes.values()],
+            "edges": edges,
+            "roots": [positions[key] for key in self.roots]
+        }
+
+    def iter_json(self, chunk_size=65536):
+        """Yields the same JSON document as dumps_json(self.to_tree()), in chunks of about chunk_size bytes.
+
+        Nodes are encoded one at a time, so no nested dict copy of the tree is ever built.
+        """
+        pending = [b"["]
+        pending_size = 1
+        # Each frame: iterator over the children still to emit, bytes closing the enclosing node.
+        stack = [(iter(self.roots.values()), b"]")]
+        first = True
+        while stack:
+            children, closing = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                piece = closing
+                first = False
+            else:
+                piece = b"".join((
+                    b"{" if first else b",{",
+                    b'"key":', dumps_json(node.key),
+                    b',"title":', dumps_json(node.title),
+                    b',"children":['
+                ))
+                stack.append((
+                    iter(node.children.values()),
+                    b'],"definitions":' + dumps_json(node.definitions) + b',"labels":' + dumps_json(node.labels) + b"}"
+                ))
+                first = True
+
+            pending.append(piece)
+            pending_size += len(piece)
+            if pending_size >= chunk_size:
+                yield b"".join(pending)
+                pending = []
+                pending_size = 0
+
+        if pending:
+            yield b"".join(pending)
+
+    def add_concept(self, concept_uri, title, parent_uri=None):
+        if concept_uri in self.nodes:
+            return False
+        node = TreeNode(concept_uri, title)
+        if parent_uri is None:
+            self.roots[concept_uri] = node
+        else:
+            parent = self.nodes.get(parent_uri)
+            if parent is None:
+                return False
+            parent.attach(node)
+        self.nodes[concept_uri] = node
+        return True
+
+    def delete_concept(self, concept_uri):
+        node = self.nodes.get(concept_uri)
+        if node is None:
+            return True
+
+        removed = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            removed.append(current)
+            stack.extend(current.children.values())
+        removed_keys = {current.key for current in removed}
+        # Cascading deletes remove everything below the concept along any parent link (see
+        # graphdb_ops.resolve_concept_subtree), including concepts whose primary parent lies
+        # outside this subtree; those cannot be patched out here, so reload instead.
+        if any(child_uri not in removed_keys
+               for key in removed_keys for child_uri in self.extra_children.get(key, ())):
+            return False
+
+        if node.parent is None:
+            self.roots.pop(concept_uri, None)
+        else:
+            node.parent.children.pop(concept_uri, None)
+        for key in removed_keys:
+            self.nodes.pop(key, None)
+            self.extra_children.pop(key, None)
+            for parent_uri in self.extra_parents.pop(key, ()):
+                siblings = self.extra_children.get(parent_uri)
+                if siblings is not None:
+                    siblings.pop(key, None)
+                    if not siblings:
+                        self.extra_children.pop(parent_uri)
+        return True
+
+    def add_literal(self, concept_uri, field, literal):
+        node = self.nodes.get(concept_uri)
+        if node is None:
+            return False
+        literals = getattr(node, field)
+        if literal not in literals:
+            literals.append(literal)
+        return True
+
+    def delete_literal(self, concept_uri, field, literal):
+        node = self.nodes.get(concept_uri)
+        if node is None:
+            return False
+        literals = getattr(node, field)
+        if literal in literals:
+            literals.remove(literal)
+        return True
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_INLINE_WHITESPACE_PATTERN = re.compile(r"[^\S\n]+")
+_BLANK_LINES_PATTERN = re.compile(r"\n\s*\n\s*")
+
+
+def normalize_corpus_text(text: str) -> str:
+    """Canonical form of a corpus: NFC, single spaces, "\\n" line ends, at most one blank line in a row.
+
+    Re-uploads of one corpus often differ only in these; paragraph breaks are kept,
+    since the corpus is split into chunks on them.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _INLINE_WHITESPACE_PATTERN.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+
+def make_cache_key(corpus_text: str, model_name: str, prompt_version: int,
+                   part: Optional[Tuple[int, int]] = None) -> str:
+    """part is the (index, total) of a corpus chunk, whose prompt differs from the whole corpus's."""
+    digest = hashlib.sha256()
+    fields = [model_name, str(prompt_version), normalize_corpus_text(corpus_text)]
+    if part is not None:
+        fields.append(f"part {part[0]} of {part[1]}")
+    for field in fields:
+        digest.update(field.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMResultCache:
+    """Persistent, content-addressed cache of generated taxonomies: one file per key.
+
+    The total size is capped; when a write goes over it, the least recently used
+    entries are deleted. Recency survives restarts through the files' modification
+    times, which a hit refreshes. A max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Key -> size in bytes, least recently used first; loaded from disk on first use.
+        self._entries: Optional[OrderedDict] = None
+        self._total_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.ttl")
+
+    def _load_index(self):
+        if self._entries is not None:
+            return
+        files = []
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            for entry in os.scandir(self._directory):
+                if entry.is_file() and entry.name.endswith(".ttl"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-len(".ttl")], stat.st_size))
+        except OSError as e:
+            logger.warning(f"LLM result cache disabled: cannot use {self._directory}: {e}")
+            self._max_bytes = 0
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(files))
+        self._total_bytes = sum(self._entries.values())
+        logger.info(f"LLM result cache: {len(self._entries)} entries, {self._total_bytes} bytes in {self._directory}.")
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+            if not self.enabled or key not in self._entries:
+                return None
+            path = self._path(key)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    value = f.read()
+                os.utime(path)
+            except OSError as e:
+                logger.warning(f"Dropping unreadable LLM cache entry {key}: {e}")
+                self._total_bytes -= self._entries.pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str):
+        if not self.enabled:
+            return
+        data = value.encode("utf-8")
+        if len(data) > self._max_bytes:
+            return
+        with self._lock:
+            self._load_index()
+            if not self.enabled:
+                return
+            # Write then rename, so a crash never leaves a truncated entry behind.
+            fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.warning(f"Could not write LLM cache entry {key}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._total_bytes > self._max_bytes:
+                evicted, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                try:
+                    os.remove(self._path(evicted))
+                except FileNotFoundError:
+                    pass
@@ -1,18 +1,43 @@
-import google.generativeai as genai
+import asyncio
 import logging
+import re
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import rdflib
+from rdflib.namespace import RDF, RDFS
+
+from core import metrics
 from core.config import settings
+from llm.cache import LLMResultCache, make_cache_key, normalize_corpus_text
+from llm.providers import get_provider
+from llm.turtle_stream import TurtleStatementSplitter
 
 
 logger = logging.getLogger(__name__)
 
-genai.configure(api_key=settings.gemini_api_key)
+# Bump whenever the prompt changes in a way that changes the output: it is part of the cache key.
+PROMPT_VERSION = 1
 
+result_cache = LLMResultCache(settings.llm_cache_dir, settings.llm_cache_max_bytes)
+
+# Gemini's tokenizer averages about 3 characters per token on Ukrainian (Cyrillic) text
+# and about 4 on English; budgeting with the lower figure keeps chunks within the limit.
+_CHARS_PER_TOKEN = 3
 
-async def generate_taxonomy_with_llm(corpus_text: str) -> str:
-    model = genai.GenerativeModel(settings.gemini_model_name)
-    logger.info(f"Using Gemini model: {settings.gemini_model_name}")
 
-    prompt = f"""
+def estimate_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def build_taxonomy_prompt(corpus_text: str, part: Optional[Tuple[int, int]] = None) -> str:
+    part_note = ""
+    if part is not None:
+        part_note = (f"\n    Note: this is part {part[0]} of {part[1]} of a larger corpus. The partial taxonomies will be merged, "
+                     f"so name each concept with an English CamelCase local name that describes it unambiguously.\n")
+
+    return f"""
     You are an expert in ontologies and natural language processing. Your task is to analyze the provided corpus of texts in Ukrainian and create a hierarchical taxonomy from it.
     The taxonomy must be presented in Turtle (TTL) format.
 
@@ -34,7 +59,7 @@ async def generate_taxonomy_with_llm(corpus_text: str) -> str:
     4.  **Hierarchy:** Create a logical hierarchy of concepts (2-4 levels deep) identified in the text. There should be both general (top-level) concepts and more specific subclasses.
     5.  **Quality:** Strive to identify key entities, notions, processes, roles, etc., described in the text. Avoid overly general or overly specific (singular) concepts if they do not form a hierarchy. (Note: Original had item 6, I renumbered to 5 as there was no item 5).
     6.  **TTL Only:** Your response must contain ONLY TTL data, without any explanations, Markdown comments, or other text before or after the TTL block. Start your response directly with `@prefix`.
-    
+    {part_note}
     Example structure for one concept:
     ```ttl
     ex:SomeConceptName
@@ -53,65 +78,282 @@ async def generate_taxonomy_with_llm(corpus_text: str) -> str:
     Your response (TTL only):
     """
 
-    logger.info(f"Sending prompt to Gemini. Corpus length: {len(corpus_text)} chars.")
 
+def split_corpus(corpus_text: str, max_tokens: int) -> List[str]:
+    """Packs paragraphs greedily into chunks of at most max_tokens (estimated).
+
+    Paragraphs that are too long on their own are split on sentences, then on characters.
+    """
+    max_chars = max(max_tokens * _CHARS_PER_TOKEN, 1)
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", corpus_text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?…])\s+", paragraph):
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks = []
+    current = []
+    current_size = 0
+    for piece in pieces:
+        if current and current_size + len(piece) + 2 > max_chars:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_size = 0
+        current.append(piece)
+        current_size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def extract_ttl(response_text: str) -> str:
+    ttl_data = response_text.strip()
+    if not ttl_data.startswith("@prefix"):
+        logger.warning("LLM response did not start with @prefix. Attempting to clean.")
+
+        ttl_start_index = ttl_data.find("@prefix")
+        if ttl_start_index == -1:
+            logger.error(
+                f"LLM response did not contain @prefix. Cannot extract TTL. Response starts with: {ttl_data[:500]}")
+            raise ValueError("The LLM returned a response in an unexpected format (missing @prefix).")
+
+        ttl_data = ttl_data[ttl_start_index:]
+
+        ttl_end_index_markdown = ttl_data.find("\n```")
+        if ttl_end_index_markdown != -1:
+            logger.warning(
+                f"Found potential markdown end at index {ttl_end_index_markdown}. Truncating response.")
+            ttl_data = ttl_data[:ttl_end_index_markdown]
+
+        if not ttl_data.strip():
+            logger.error("Extracted TTL data is empty after cleaning.")
+            raise ValueError("Failed to extract valid TTL data from the LLM response.")
+    return ttl_data
+
+
+def _cache_key(corpus_text: str, part: Optional[Tuple[int, int]] = None) -> str:
+    return make_cache_key(corpus_text, f"{settings.llm_provider}:{get_provider().model_name}", PROMPT_VERSION, part)
+
+
+def _record_llm_call(mode: str, started: float, outcome: str, prompt: str, response: str = ""):
+    metrics.llm_call_duration.observe(time.perf_counter() - started,
+                                      provider=settings.llm_provider, mode=mode, outcome=outcome)
+    metrics.llm_tokens.inc(estimate_tokens(prompt), provider=settings.llm_provider, kind="prompt")
+    metrics.llm_tokens.inc(estimate_tokens(response), provider=settings.llm_provider, kind="completion")
+
+
+async def _get_cached(key: str) -> Optional[str]:
+    cached = await asyncio.to_thread(result_cache.get, key)
+    metrics.llm_cache_lookups.inc(result="miss" if cached is None else "hit")
+    return cached
+
+
+async def _generate_uncached(corpus_text: str, part: Optional[Tuple[int, int]]) -> str:
+    prompt = build_taxonomy_prompt(corpus_text, part)
+    logger.info(f"Sending prompt to the LLM. Corpus length: {len(corpus_text)} chars"
+                + (f" (part {part[0]} of {part[1]})." if part else "."))
+    started = time.perf_counter()
     try:
-        generation_config = genai.types.GenerationConfig(
-            max_output_tokens=settings.gemini_max_output_tokens
-        )
-
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-        ]
-
-        response = await model.generate_content_async(
-            prompt,
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
-
-        if response.parts:
-            full_response_text = response.text.strip()
-            logger.debug(f"Raw LLM response (full): \n{full_response_text}")
-            ttl_data = full_response_text
-
-            if len(response.text) >= settings.gemini_max_output_tokens:
-                logger.warning(f"LLM response might have been truncated by max_output_tokens ({settings.gemini_max_output_tokens}).")
-
-            if not ttl_data.startswith("@prefix"):
-                logger.warning("LLM response did not start with @prefix. Attempting to clean.")
-
-                ttl_start_index = ttl_data.find("@prefix")
-                if ttl_start_index == -1:
-                    logger.error(
-                        f"LLM response did not contain @prefix. Cannot extract TTL. Response starts with: {ttl_data[:500]}")
-                    raise ValueError("The LLM returned a response in an unexpected format (missing @prefix).")
-
-                ttl_data = ttl_data[ttl_start_index:]
-
-                ttl_end_index_markdown = ttl_data.find("\n```")
-                if ttl_end_index_markdown != -1:
-                    logger.warning(
-                        f"Found potential markdown end at index {ttl_end_index_markdown}. Truncating response.")
-                    ttl_data = ttl_data[:ttl_end_index_markdown]
-
-                if not ttl_data.strip():
-                    logger.error("Extracted TTL data is empty after cleaning.")
-                    raise ValueError("Failed to extract valid TTL data from the LLM response.")
-
-            logger.info(f"LLM generated taxonomy: {ttl_data}")
-            return ttl_data
-        else:
-            logger.error(f"LLM response was empty or blocked. Feedback: {response.prompt_feedback}")
-            block_reason = response.prompt_feedback.block_reason if response.prompt_feedback else "Unknown"
-            block_message = f"LLM did not return the content or the request was blocked. Reason: {block_reason}"
-            if response.prompt_feedback and response.prompt_feedback.safety_ratings:
-                block_message += f" Safety Ratings: {response.prompt_feedback.safety_ratings}"
-            raise ValueError(block_message)
-
-    except Exception as e:
-        logger.exception(f"Error calling Gemini API: {e}")
+        response = await get_provider().generate(prompt)
+    except Exception:
+        _record_llm_call("generate", started, "error", prompt)
         raise
+    _record_llm_call("generate", started, "ok", prompt, response)
+    return extract_ttl(response)
+
+
+async def _stream_uncached(prompt: str):
+    started = time.perf_counter()
+    parts = []
+    outcome = "error"
+    try:
+        async for piece in get_provider().stream(prompt):
+            parts.append(piece)
+            yield piece
+        outcome = "ok"
+    finally:
+        # A consumer that stops early (client gone) still counts what was received.
+        _record_llm_call("stream", started, outcome, prompt, "".join(parts))
+
+
+async def _generate_partial_taxonomy(corpus_text: str, part: Optional[Tuple[int, int]] = None) -> str:
+    key = _cache_key(corpus_text, part)
+    cached = await _get_cached(key)
+    if cached is not None:
+        logger.info(f"LLM result cache hit for {len(corpus_text)} chars of corpus (key {key[:12]}).")
+        return cached
+
+    ttl_data = await _generate_uncached(corpus_text, part)
+    await asyncio.to_thread(result_cache.put, key, ttl_data)
+    return ttl_data
+
+
+def _label_key(literal):
+    return literal.language, " ".join(str(literal).split()).casefold()
+
+
+def _select_merged_parent(concept, parent_votes, parent_links, linked_parent):
+    """Most voted parent after dropping shortcut edges; candidates that would close a cycle are skipped."""
+    candidates = list(parent_votes)
+    redundant = set()
+    for candidate in candidates:
+        stack = list(parent_links.get(candidate, ()))
+        visited = {concept, candidate}
+        while stack:
+            ancestor = stack.pop()
+            if ancestor in visited:
+                continue
+            visited.add(ancestor)
+            redundant.add(ancestor)
+            stack.extend(parent_links.get(ancestor, ()))
+    candidates = [candidate for candidate in candidates if candidate not in redundant] or candidates
+
+    # Counter keeps first-seen order, so ties go to the parent proposed first.
+    for candidate in sorted(candidates, key=lambda candidate: -parent_votes[candidate]):
+        ancestor = candidate
+        while ancestor is not None and ancestor != concept:
+            ancestor = linked_parent.get(ancestor)
+        if ancestor is None:
+            return candidate
+    return None
+
+
+def merge_taxonomies(ttl_parts: List[str]) -> str:
+    """Merges partial Turtle taxonomies into one.
+
+    Concepts are deduplicated by URI and by label (same text in the same language,
+    ignoring case and whitespace), keeping the first URI seen. Each concept keeps
+    one label and one comment per language and a single parent: the one most chunks
+    agree on, never an ancestor of another proposed parent, never closing a cycle.
+    """
+    graphs = []
+    for index, ttl in enumerate(ttl_parts, start=1):
+        graph = rdflib.Graph()
+        try:
+            graph.parse(data=ttl, format="turtle")
+        except Exception as e:
+            logger.warning(f"Skipping partial taxonomy {index} of {len(ttl_parts)}: it is not valid Turtle ({e}).")
+            continue
+        graphs.append(graph)
+    if not graphs:
+        raise ValueError("None of the partial taxonomies generated by the LLM is valid Turtle.")
+
+    canonical = {}
+    by_label = {}
+    for graph in graphs:
+        for concept in graph.subjects(RDF.type, RDFS.Class):
+            if concept in canonical:
+                continue
+            keys = [_label_key(label) for label in graph.objects(concept, RDFS.label)
+                    if isinstance(label, rdflib.Literal)]
+            target = next((by_label[key] for key in keys if key in by_label), concept)
+            canonical[concept] = target
+            for key in keys:
+                by_label.setdefault(key, target)
+
+    merged = rdflib.Graph()
+    literals = {}
+    parent_votes = {}
+    for graph in graphs:
+        for prefix, namespace in graph.namespaces():
+            merged.bind(prefix, namespace, override=False)
+        for subject, predicate, obj in graph:
+            subject = canonical.get(subject, subject)
+            obj = canonical.get(obj, obj)
+            if predicate == RDFS.subClassOf:
+                if subject != obj:
+                    parent_votes.setdefault(subject, Counter())[obj] += 1
+            elif predicate in (RDFS.label, RDFS.comment) and isinstance(obj, rdflib.Literal):
+                literals.setdefault((subject, predicate, obj.language), obj)
+            else:
+                merged.add((subject, predicate, obj))
+
+    for (subject, predicate, _), literal in literals.items():
+        merged.add((subject, predicate, literal))
+
+    parent_links = {concept: list(votes) for concept, votes in parent_votes.items()}
+    linked_parent = {}
+    for concept, votes in parent_votes.items():
+        parent = _select_merged_parent(concept, votes, parent_links, linked_parent)
+        if parent is not None:
+            linked_parent[concept] = parent
+            merged.add((concept, RDFS.subClassOf, parent))
+
+    logger.info(f"Merged {len(graphs)} partial taxonomies into {len(set(canonical.values()))} concepts "
+                f"({len(canonical) - len(set(canonical.values()))} duplicates by label).")
+    return merged.serialize(format="turtle")
+
+
+async def generate_taxonomy_with_llm(corpus_text: str) -> str:
+    # Normalized before splitting, so that chunk boundaries and cache keys are stable across re-uploads.
+    corpus_text = normalize_corpus_text(corpus_text)
+    chunks = split_corpus(corpus_text, settings.llm_chunk_max_tokens - estimate_tokens(build_taxonomy_prompt("")))
+    if len(chunks) <= 1:
+        ttl_data = await _generate_partial_taxonomy(corpus_text)
+        logger.info(f"LLM generated taxonomy: {ttl_data}")
+        return ttl_data
+
+    logger.info(f"Corpus of ~{estimate_tokens(corpus_text)} tokens split into {len(chunks)} chunks; "
+                f"generating up to {settings.llm_max_concurrency} at a time.")
+    semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
+    async def generate_chunk(index, chunk):
+        async with semaphore:
+            return await _generate_partial_taxonomy(chunk, part=(index, len(chunks)))
+
+    ttl_parts = await asyncio.gather(*(generate_chunk(index, chunk) for index, chunk in enumerate(chunks, start=1)))
+    ttl_data = await asyncio.to_thread(merge_taxonomies, ttl_parts)
+    logger.info(f"LLM generated taxonomy ({len(chunks)} chunks merged): {len(ttl_data)} chars.")
+    return ttl_data
+
+
+async def _single_piece(text: str):
+    yield text
+
+
+async def stream_taxonomy_statements(corpus_text: str):
+    """Yields the Turtle statements of the generated taxonomy as soon as each one is complete.
+
+    Directives come first, as in the response. A corpus too large for one prompt cannot
+    be streamed: it is generated chunk by chunk and merged, then split into statements.
+    A trailing incomplete statement (truncated response) is dropped.
+    """
+    corpus_text = normalize_corpus_text(corpus_text)
+    chunks = split_corpus(corpus_text, settings.llm_chunk_max_tokens - estimate_tokens(build_taxonomy_prompt("")))
+
+    key = None
+    if len(chunks) > 1:
+        logger.info(f"Corpus of ~{estimate_tokens(corpus_text)} tokens does not fit one prompt; "
+                    f"streaming the merged taxonomy of {len(chunks)} chunks instead.")
+        pieces = _single_piece(await generate_taxonomy_with_llm(corpus_text))
+    else:
+        key = _cache_key(corpus_text)
+        cached = await _get_cached(key)
+        if cached is not None:
+            logger.info(f"LLM result cache hit for {len(corpus_text)} chars of corpus (key {key[:12]}).")
+            pieces, key = _single_piece(cached), None
+        else:
+            logger.info(f"Streaming prompt to the LLM. Corpus length: {len(corpus_text)} chars.")
+            pieces = _stream_uncached(build_taxonomy_prompt(corpus_text))
+
+    splitter = TurtleStatementSplitter()
+    response_parts = []
+    async for piece in pieces:
+        response_parts.append(piece)
+        for statement in splitter.feed(piece):
+            yield statement
+    statements, tail = splitter.close()
+    for statement in statements:
+        yield statement
+
+    if not splitter.started:
+        raise ValueError("The LLM returned a response in an unexpected format (missing @prefix).")
+    if tail:
+        logger.warning(f"Dropping incomplete trailing statement of the LLM response: {tail[:200]}")
+    if key is not None:
+        await asyncio.to_thread(result_cache.put, key, extract_ttl("".join(response_parts)))
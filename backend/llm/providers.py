@@ -0,0 +1,276 @@
+import asyncio
+import json
+import logging
+import re
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider(ABC):
+    """A text generation backend. Providers connect lazily, on their first request."""
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def model_name(self) -> str:
+        """Identifies the model in cache keys: results of different models are never mixed up."""
+
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        """The whole response to the prompt."""
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        yield await self.generate(prompt)
+
+    async def close(self):
+        pass
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self):
+        self._genai = None
+
+    @property
+    def model_name(self) -> str:
+        return settings.gemini_model_name
+
+    def _model(self):
+        if self._genai is None:
+            if not settings.gemini_api_key:
+                raise ValueError("GEMINI_API_KEY is not set; configure it or choose another LLM_PROVIDER.")
+            import google.generativeai as genai
+            genai.configure(api_key=settings.gemini_api_key)
+            self._genai = genai
+        logger.info(f"Using Gemini model: {settings.gemini_model_name}")
+        return self._genai.GenerativeModel(settings.gemini_model_name)
+
+    def _request_options(self):
+        generation_config = self._genai.types.GenerationConfig(
+            max_output_tokens=settings.gemini_max_output_tokens
+        )
+
+        safety_settings = [
+            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        ]
+        return {"generation_config": generation_config, "safety_settings": safety_settings}
+
+    @staticmethod
+    def _blocked_response_error(prompt_feedback):
+        logger.error(f"LLM response was empty or blocked. Feedback: {prompt_feedback}")
+        block_reason = prompt_feedback.block_reason if prompt_feedback else "Unknown"
+        block_message = f"LLM did not return the content or the request was blocked. Reason: {block_reason}"
+        if prompt_feedback and prompt_feedback.safety_ratings:
+            block_message += f" Safety Ratings: {prompt_feedback.safety_ratings}"
+        return ValueError(block_message)
+
+    async def generate(self, prompt: str) -> str:
+        try:
+            model = self._model()
+            response = await model.generate_content_async(prompt, **self._request_options())
+
+            if response.parts:
+                full_response_text = response.text.strip()
+                logger.debug(f"Raw LLM response (full): \n{full_response_text}")
+
+                if len(response.text) >= settings.gemini_max_output_tokens:
+                    logger.warning(f"LLM response might have been truncated by max_output_tokens ({settings.gemini_max_output_tokens}).")
+
+                return full_response_text
+            else:
+                raise self._blocked_response_error(response.prompt_feedback)
+
+        except Exception as e:
+            logger.exception(f"Error calling Gemini API: {e}")
+            raise
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        try:
+            model = self._model()
+            response = await model.generate_content_async(prompt, stream=True, **self._request_options())
+            received = 0
+            async for chunk in response:
+                if chunk.parts:
+                    received += len(chunk.text)
+                    yield chunk.text
+            if not received:
+                raise self._blocked_response_error(response.prompt_feedback)
+
+        except Exception as e:
+            logger.exception(f"Error calling Gemini API: {e}")
+            raise
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any server speaking the OpenAI chat completions API: vLLM, Ollama, llama.cpp, LM Studio, ..."""
+
+    name = "openai"
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def model_name(self) -> str:
+        return f"{settings.openai_base_url}#{settings.openai_model_name}"
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {}
+            if settings.openai_api_key:
+                headers["Authorization"] = f"Bearer {settings.openai_api_key}"
+            self._client = httpx.AsyncClient(base_url=settings.openai_base_url.rstrip("/") + "/",
+                                             headers=headers,
+                                             timeout=httpx.Timeout(settings.openai_timeout_seconds, connect=10))
+        return self._client
+
+    def _payload(self, prompt: str, stream: bool):
+        return {
+            "model": settings.openai_model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": settings.openai_max_output_tokens,
+            "stream": stream
+        }
+
+    async def generate(self, prompt: str) -> str:
+        logger.info(f"Using OpenAI-compatible model {settings.openai_model_name} at {settings.openai_base_url}")
+        try:
+            response = await self._get_client().post("chat/completions", json=self._payload(prompt, stream=False))
+            response.raise_for_status()
+            choice = response.json()["choices"][0]
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            logger.exception(f"Error calling the OpenAI-compatible API: {e}")
+            raise ValueError(f"LLM request failed: {e}")
+
+        if choice.get("finish_reason") == "length":
+            logger.warning(f"LLM response was truncated by max_tokens ({settings.openai_max_output_tokens}).")
+        content = (choice.get("message") or {}).get("content")
+        if not content:
+            raise ValueError(f"LLM did not return any content (finish reason: {choice.get('finish_reason')}).")
+        return content.strip()
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        logger.info(f"Using OpenAI-compatible model {settings.openai_model_name} at {settings.openai_base_url} (streaming)")
+        try:
+            async with self._get_client().stream("POST", "chat/completions",
+                                                 json=self._payload(prompt, stream=True)) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        except (httpx.HTTPError, ValueError) as e:
+            logger.exception(f"Error calling the OpenAI-compatible API: {e}")
+            raise ValueError(f"LLM request failed: {e}")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StubProvider(LLMProvider):
+    """Deterministic local stand-in for an LLM, for offline tests and load tests.
+
+    The most frequent words of the prompt's corpus become concepts, topped up with
+    synthetic ones up to llm_stub_concepts. The first few are top-level concepts and
+    every later concept hangs under an earlier one, llm_stub_branching per parent, so
+    chunks of one corpus yield overlapping taxonomies with conflicting parents.
+    Responses take llm_stub_latency_seconds, spread over the pieces when streamed.
+    """
+
+    name = "stub"
+
+    _CORPUS_PATTERN = re.compile(r"--- START OF CORPUS ---(.*)--- END OF CORPUS ---", re.DOTALL)
+    _WORD_PATTERN = re.compile(r"[^\W\d_]{5,}")
+    _ROOTS = 3
+    _PIECE_SIZE = 64
+
+    @property
+    def model_name(self) -> str:
+        return f"stub-{settings.llm_stub_concepts}-{settings.llm_stub_branching}"
+
+    @staticmethod
+    def _local_name(word):
+        return f"c{zlib.crc32(word.encode('utf-8')):08x}"
+
+    @staticmethod
+    def _escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"')
+
+    def _taxonomy(self, prompt: str) -> str:
+        match = self._CORPUS_PATTERN.search(prompt)
+        corpus_text = match.group(1) if match else prompt
+        counts = Counter(word.lower() for word in self._WORD_PATTERN.findall(corpus_text))
+        words = [word for word, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0]))]
+        words = words[:settings.llm_stub_concepts]
+        words += [f"термін{n}" for n in range(settings.llm_stub_concepts - len(words))]
+
+        lines = [
+            "@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .",
+            "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .",
+            "@prefix ex: <http://example.org/taxonomy/document-corpus/> .",
+            ""
+        ]
+        for index, word in enumerate(words):
+            escaped = self._escape(word)
+            lines.append(f"ex:{self._local_name(word)} a rdfs:Class ;")
+            if index >= self._ROOTS:
+                parent = words[(index - self._ROOTS) // max(settings.llm_stub_branching, 1)]
+                lines.append(f"    rdfs:subClassOf ex:{self._local_name(parent)} ;")
+            lines.append(f'    rdfs:label "{escaped}"@uk ;')
+            lines.append(f'    rdfs:label "{self._escape(word.capitalize())}"@en ;')
+            lines.append(f'    rdfs:comment "Поняття «{escaped}» ({counts.get(word, 0)} згадок)."@uk ;')
+            lines.append(f'    rdfs:comment "Concept \\"{escaped}\\" ({counts.get(word, 0)} mentions)."@en .')
+        return "\n".join(lines) + "\n"
+
+    async def generate(self, prompt: str) -> str:
+        if settings.llm_stub_latency_seconds:
+            await asyncio.sleep(settings.llm_stub_latency_seconds)
+        return self._taxonomy(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        ttl_data = self._taxonomy(prompt)
+        pieces = [ttl_data[i:i + self._PIECE_SIZE] for i in range(0, len(ttl_data), self._PIECE_SIZE)]
+        for piece in pieces:
+            if settings.llm_stub_latency_seconds:
+                await asyncio.sleep(settings.llm_stub_latency_seconds / len(pieces))
+            yield piece
+
+
+_PROVIDERS = {provider.name: provider for provider in (GeminiProvider, OpenAICompatibleProvider, StubProvider)}
+_provider: Optional[LLMProvider] = None
+
+
+def get_provider() -> LLMProvider:
+    """Returns the provider selected by LLM_PROVIDER, created on first use."""
+    global _provider
+    if _provider is None:
+        _provider = _PROVIDERS[settings.llm_provider]()
+        logger.info(f"LLM provider: {_provider.name} ({_provider.model_name}).")
+    return _provider
+
+
+async def close_provider():
+    global _provider
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
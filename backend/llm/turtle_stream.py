@@ -0,0 +1,110 @@
+from typing import List, Optional, Tuple
+
+
+class TurtleStatementSplitter:
+    """Splits Turtle text arriving in arbitrary pieces into complete top-level statements.
+
+    A statement ends at a "." outside strings, IRIs, comments and brackets that is
+    followed by whitespace, a comment or the end of the input, so decimals and dotted
+    local names do not end it. As in extract_ttl, anything before the first "@prefix"
+    is ignored and a closing Markdown fence ends the document.
+    Directives ("@prefix ... .") are returned as statements too.
+    """
+
+    _START_MARKER = "@prefix"
+
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self._position = 0
+        self._statement_start = 0
+        self._quote: Optional[str] = None
+        self._in_iri = False
+        self._in_comment = False
+        self._depth = 0
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def feed(self, text: str) -> List[str]:
+        if self._finished:
+            return []
+        self._buffer += text
+        if not self._started:
+            start = self._buffer.find(self._START_MARKER)
+            if start == -1:
+                # Keep just enough to recognize a marker split across pieces.
+                self._buffer = self._buffer[-(len(self._START_MARKER) - 1):]
+                return []
+            self._started = True
+            self._buffer = self._buffer[start:]
+        return self._scan(final=False)
+
+    def close(self) -> Tuple[List[str], str]:
+        """Returns the remaining complete statements and the incomplete tail, if any."""
+        statements = self._scan(final=True) if self._started and not self._finished else []
+        tail = self._buffer[self._statement_start:].strip()
+        self._finished = True
+        return statements, tail
+
+    def _scan(self, final: bool) -> List[str]:
+        statements = []
+        buffer = self._buffer
+        i = self._position
+        end = len(buffer)
+        while i < end:
+            char = buffer[i]
+            if self._in_comment:
+                if char == "\n":
+                    self._in_comment = False
+            elif self._quote is not None:
+                if char == "\\":
+                    if i + 1 >= end and not final:
+                        break
+                    i += 1
+                elif buffer.startswith(self._quote, i):
+                    i += len(self._quote) - 1
+                    self._quote = None
+                elif len(self._quote) == 3 and char == self._quote[0] and end - i < 3 and not final:
+                    # Possibly the start of the closing triple quote, split across pieces.
+                    break
+            elif self._in_iri:
+                if char == ">":
+                    self._in_iri = False
+            elif char == "#":
+                self._in_comment = True
+            elif char in "\"'":
+                if end - i < 3 and not final:
+                    break
+                self._quote = char * 3 if buffer.startswith(char * 3, i) else char
+                i += len(self._quote) - 1
+            elif char == "<":
+                self._in_iri = True
+            elif char in "[(":
+                self._depth += 1
+            elif char in "])":
+                self._depth -= 1
+            elif char == "`" and end - i < 3 and not final:
+                break
+            elif char == "`" and buffer.startswith("```", i):
+                self._finished = True
+                buffer = buffer[:i]
+                break
+            elif char == "." and self._depth <= 0:
+                if i + 1 >= end and not final:
+                    break
+                if i + 1 >= end or buffer[i + 1].isspace() or buffer[i + 1] == "#":
+                    statement = buffer[self._statement_start:i + 1].strip()
+                    if statement:
+                        statements.append(statement)
+                    self._statement_start = i + 1
+                    self._depth = 0
+            i += 1
+
+        # Drop what has been emitted, so the buffer only ever holds one partial statement.
+        self._buffer = buffer[self._statement_start:]
+        self._position = i - self._statement_start
+        self._statement_start = 0
+        return statements
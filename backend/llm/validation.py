@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import re
+import time
+from typing import List, Tuple
+
+import rdflib
+from rdflib.namespace import RDF, RDFS
+
+from llm.turtle_stream import TurtleStatementSplitter
+
+logger = logging.getLogger(__name__)
+
+_TURTLE_DIRECTIVE_PATTERN = re.compile(r"(@prefix|@base|prefix|base)\s", re.IGNORECASE)
+
+
+def is_turtle_directive(statement: str) -> bool:
+    return _TURTLE_DIRECTIVE_PATTERN.match(statement) is not None
+
+
+def parse_turtle_statements(directives: List[str], statements: List[str]) -> Tuple[rdflib.Graph, int]:
+    """Parses Turtle statements under the given directives; statements that do not parse on their own are skipped."""
+    header = "\n".join(directives) + "\n"
+    graph = rdflib.Graph()
+    try:
+        graph.parse(data=header + "\n".join(statements), format="turtle")
+        return graph, 0
+    except Exception:
+        graph = rdflib.Graph()
+    skipped = 0
+    for statement in statements:
+        try:
+            graph.parse(data=header + statement, format="turtle")
+        except Exception as e:
+            skipped += 1
+            logger.warning(f"Skipping invalid Turtle statement ({e}): {statement[:200]}")
+    return graph, skipped
+
+
+def normalize_taxonomy_graph(graph: rdflib.Graph) -> dict:
+    """Enforces the taxonomy structure in place and returns what was found and fixed.
+
+    Both ends of every rdfs:subClassOf are declared rdfs:Class; self-loops and
+    subClassOf/label/comment statements with the wrong kind of object are removed.
+    Concepts without a label are only reported: the tree falls back to their local name.
+    """
+    removed = 0
+    for subject, predicate, obj in list(graph.triples((None, RDFS.subClassOf, None))):
+        if subject == obj or not isinstance(obj, rdflib.URIRef):
+            graph.remove((subject, predicate, obj))
+            removed += 1
+    for predicate in (RDFS.label, RDFS.comment):
+        for subject, _, obj in list(graph.triples((None, predicate, None))):
+            if not isinstance(obj, rdflib.Literal):
+                graph.remove((subject, predicate, obj))
+                removed += 1
+
+    declared = set(graph.subjects(RDF.type, RDFS.Class))
+    undeclared = set()
+    for subject, _, obj in graph.triples((None, RDFS.subClassOf, None)):
+        undeclared.update(uri for uri in (subject, obj) if uri not in declared)
+    for uri in undeclared:
+        graph.add((uri, RDF.type, RDFS.Class))
+
+    concepts = declared | undeclared
+    unlabeled = sum(1 for concept in concepts if (concept, RDFS.label, None) not in graph)
+    return {
+        "concepts": len(concepts),
+        "declared_classes": len(undeclared),
+        "removed_triples": removed,
+        "unlabeled_concepts": unlabeled
+    }
+
+
+def validate_taxonomy_ttl(ttl_data: str) -> Tuple[rdflib.Graph, dict]:
+    """Parses LLM-produced Turtle, repairing what can be repaired, and checks the taxonomy structure.
+
+    If the document does not parse as a whole (typically a response cut off by the
+    output token limit), it is split into statements: the trailing incomplete one is
+    dropped and any other statement that does not parse is skipped.
+    Raises ValueError if nothing usable is left.
+    """
+    report = {"repaired": False, "dropped_tail": False, "skipped_statements": 0}
+    graph = rdflib.Graph()
+    try:
+        graph.parse(data=ttl_data, format="turtle")
+    except Exception as e:
+        logger.warning(f"LLM output is not valid Turtle as a whole ({e}); repairing statement by statement.")
+        splitter = TurtleStatementSplitter()
+        statements = splitter.feed(ttl_data)
+        closing_statements, tail = splitter.close()
+        statements += closing_statements
+        directives = [statement for statement in statements if is_turtle_directive(statement)]
+        body = [statement for statement in statements if not is_turtle_directive(statement)]
+        graph, skipped = parse_turtle_statements(directives, body)
+        report.update(repaired=True, dropped_tail=bool(tail), skipped_statements=skipped)
+        if tail:
+            logger.warning(f"Dropped incomplete trailing statement of the LLM output: {tail[:200]}")
+
+    report.update(normalize_taxonomy_graph(graph))
+    report["triples"] = len(graph)
+    if not report["concepts"]:
+        raise ValueError("The LLM output contains no rdfs:Class concepts.")
+    if report["unlabeled_concepts"]:
+        logger.warning(f"{report['unlabeled_concepts']} concepts in the LLM output have no rdfs:label.")
+    logger.info(f"Validated LLM taxonomy: {report}")
+    return graph, report
+
+
+def to_ntriples(graph: rdflib.Graph) -> bytes:
+    return graph.serialize(format="nt", encoding="utf-8")
+
+
+async def validated_ntriples_batches(statements, batch_size: int = 200, flush_interval_seconds: float = 2.0):
+    """Groups Turtle statements from an async iterator into validated N-Triples batches.
+
+    A batch is emitted once it has batch_size statements or flush_interval_seconds have
+    passed since the previous one, so the first concepts can be loaded within seconds.
+    Yields (N-Triples bytes, counts) pairs; invalid statements are skipped, not fatal.
+    """
+    directives = []
+    batch = []
+    last_flush = time.perf_counter()
+
+    def flush():
+        graph, skipped = parse_turtle_statements(directives, batch)
+        counts = {"statements": len(batch), "skipped_statements": skipped}
+        counts.update(normalize_taxonomy_graph(graph))
+        # Parents declared by this batch's repair usually come with their own statement in
+        # another batch: count only the concepts the batch itself declares.
+        counts["concepts"] -= counts["declared_classes"]
+        counts["triples"] = len(graph)
+        batch.clear()
+        return to_ntriples(graph), counts
+
+    async for statement in statements:
+        if is_turtle_directive(statement):
+            directives.append(statement)
+            continue
+        batch.append(statement)
+        now = time.perf_counter()
+        if len(batch) >= batch_size or now - last_flush >= flush_interval_seconds:
+            yield await asyncio.to_thread(flush)
+            last_flush = now
+    if batch:
+        yield await asyncio.to_thread(flush)
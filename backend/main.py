@@ -1,10 +1,38 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from api.routers import taxonomy_router
+from api.middleware import RequestMetricsMiddleware
+from api.routers import taxonomy_router, jobs_router
+from core import metrics
+from core.config import settings
+from core.jobs import job_manager
+from core.singleflight import all_stats as coalescing_stats
+from db import graphdb_client, graphdb_ops
+from llm.providers import close_provider
+
+logging.basicConfig(level=settings.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# httpx logs every GraphDB request at INFO; SPARQL requests are logged by graphdb_ops at DEBUG.
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await graphdb_client.start_client()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await close_provider()
+    # Slow-query explains still in flight need the GraphDB client.
+    await graphdb_ops.query_hooks.drain()
+    await graphdb_client.close_client()
+
 
 app = FastAPI(
     title="Taxonomy Builder",
-    description="API for building and managing RDF-like taxonomies."
+    description="API for building and managing RDF-like taxonomies.",
+    lifespan=lifespan
 )
 
 origins = [
@@ -22,12 +50,26 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["ETag", "X-Taxonomy-Version"]
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(taxonomy_router.router)
+app.include_router(jobs_router.router)
 
 
 @app.get("/", tags=["Root/Status"])
 async def root_status():
     return {"status": "ok", "message": "Taxonomy API is running"}
+
+
+@app.get("/status/coalescing", tags=["Root/Status"])
+async def coalescing_status():
+    """Per read path: requests, GraphDB executions, requests served by another's execution, in flight."""
+    return coalescing_stats()
+
+
+@app.get("/metrics", tags=["Root/Status"])
+async def metrics_endpoint():
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,144 @@
+"""Concepts with several parents: every hierarchy query must follow all their parent links.
+
+Fixture (D has two parents; C is its primary one only because its URI is larger):
+
+    A ── B ──┐
+    └─── C ──┴── D ── E
+
+The RDF fixtures are laid out as GraphDB with RDFS inference serves them: the explicit
+statements in the explicit pseudo-graph, and the default graph adding the subClassOf closure.
+"""
+import pytest
+import rdflib
+from rdflib.namespace import RDF, RDFS
+
+from db import graphdb_ops, sparql_queries
+from db.hierarchy_index import HierarchyIndex
+
+NS = "http://example.org/taxonomy/"
+EXPLICIT = rdflib.URIRef("http://www.ontotext.com/explicit")
+A, B, C, D, E = (NS + name for name in "ABCDE")
+LINKS = [(B, A), (C, A), (D, B), (D, C), (E, D)]
+
+
+def _bindings(result):
+    """rdflib SELECT results in the shape of GraphDB's SPARQL JSON bindings."""
+    return [{str(var): {"value": str(row[var])} for var in result.vars if row[var] is not None}
+            for row in result]
+
+
+def _inferred_dataset(concepts, links):
+    dataset = rdflib.Dataset()
+    explicit = dataset.graph(EXPLICIT)
+    for uri in concepts:
+        explicit.add((rdflib.URIRef(uri), RDF.type, RDFS.Class))
+        explicit.add((rdflib.URIRef(uri), RDFS.label, rdflib.Literal(uri[len(NS):], lang="en")))
+    for child, parent in links:
+        explicit.add((rdflib.URIRef(child), RDFS.subClassOf, rdflib.URIRef(parent)))
+
+    default = dataset.default_context
+    default += explicit
+    parents = {}
+    for child, parent in links:
+        parents.setdefault(child, set()).add(parent)
+    for uri in concepts:
+        # Reflexive and transitive closure, as materialized by GraphDB.
+        above, stack = {uri}, [uri]
+        while stack:
+            for parent in parents.get(stack.pop(), ()):
+                if parent not in above:
+                    above.add(parent)
+                    stack.append(parent)
+        for ancestor in above:
+            default.add((rdflib.URIRef(uri), RDFS.subClassOf, rdflib.URIRef(ancestor)))
+        default.add((rdflib.URIRef(uri), RDF.type, RDFS.Resource))
+    return dataset
+
+
+@pytest.fixture
+def graph():
+    return _inferred_dataset((A, B, C, D, E), LINKS)
+
+
+@pytest.fixture
+def index():
+    edges = [{"class": {"value": uri}} for uri in (A, B, C, D, E)]
+    edges += [{"class": {"value": parent}, "subClass": {"value": child}} for child, parent in LINKS]
+    model = graphdb_ops.build_hierarchy_model_from_edges(edges, [], [])
+    assert model.nodes[D].parent.key == C
+    hierarchy = HierarchyIndex()
+    hierarchy.rebuild(model, version=0)
+    return hierarchy
+
+
+def test_descendants_follow_extra_parent_links(index):
+    assert [entry["key"] for entry in index.descendants(B)["descendants"]] == [D, E]
+    assert index.descendants(B, max_depth=1)["total"] == 1
+    assert index.describe(B)["descendants"] == 2
+    assert index.describe(B)["height"] == 2
+    assert index.is_descendant(E, B)
+    assert not index.is_descendant(C, B)
+
+
+def test_descendants_numbered_before_the_concept():
+    # Y is numbered before X and is G's primary parent, so G comes before X in the numbering.
+    x, y, g, h = (NS + name for name in ("X", "Y", "G", "H"))
+    edges = [{"class": {"value": A}, "subClass": {"value": y}}, {"class": {"value": A}, "subClass": {"value": x}},
+             {"class": {"value": y}, "subClass": {"value": g}}, {"class": {"value": x}, "subClass": {"value": g}},
+             {"class": {"value": g}, "subClass": {"value": h}}]
+    hierarchy = HierarchyIndex()
+    hierarchy.rebuild(graphdb_ops.build_hierarchy_model_from_edges(edges, [], []), version=0)
+    assert [entry["key"] for entry in hierarchy.descendants(x)["descendants"]] == [g, h]
+
+
+def test_ancestors_follow_extra_parent_links(index):
+    assert {entry["key"] for entry in index.ancestors(E)} == {A, B, C, D}
+    assert index.ancestors(E)[0]["key"] == A
+    assert index.ancestors(E)[-1]["key"] == D
+
+
+def test_deleting_a_concept_drops_its_extra_links(index):
+    index.apply_changes([{"version": 1, "op": "delete_concept", "key": C}])
+    assert index.describe(D) is None
+    assert index.descendants(B)["total"] == 0
+    assert not index.is_descendant(E, B)
+
+
+def test_delete_removes_concepts_below_any_parent(graph):
+    bindings = _bindings(graph.query(sparql_queries.get_subtree_edges_query(B)))
+    concepts, depth, crosses = graphdb_ops.order_subtree(B, bindings)
+    assert set(concepts) == {B, D, E}
+    assert concepts.index(D) < concepts.index(E)
+    assert depth == 2
+    # D also lies below C, outside the subtree: the in-memory tree has to be reloaded.
+    assert crosses
+
+    # GraphDB retracts the inferred statements along with the explicit ones.
+    explicit = graph.graph(EXPLICIT)
+    for batch in graphdb_ops._batches(concepts[::-1], 2):
+        explicit.update(sparql_queries.delete_concepts_query(batch))
+    remaining = {str(node) for node in explicit.all_nodes()}
+    assert not remaining & {B, D, E}
+    assert {A, C} <= remaining
+
+
+def test_deletion_counts_only_explicit_statements(graph):
+    result = graph.query(sparql_queries.count_concept_triples_query([B, D, E]))
+    row = _bindings(result)[0]
+    # Type, label and subClassOf links: 3 + 3 + 4, none of the inferred closure.
+    assert (int(row["concepts"]["value"]), int(row["triples"]["value"])) == (3, 10)
+
+
+def test_single_parent_subtree_ignores_the_inferred_closure():
+    # A ── B ── D ── E: the closure links D and E to A, which must not count as outside parents.
+    graph = _inferred_dataset((A, B, D, E), [(B, A), (D, B), (E, D)])
+    bindings = _bindings(graph.query(sparql_queries.get_subtree_edges_query(B)))
+    assert graphdb_ops.order_subtree(B, bindings) == ([B, D, E], 2, False)
+
+
+def test_subtree_export_includes_concepts_below_any_parent(graph):
+    # Exports are requested with infer=false.
+    exported = graph.graph(EXPLICIT).query(sparql_queries.export_subtree_query(B)).graph
+    assert {str(subject) for subject in exported.subjects()} == {B, D, E}
+    # The root is exported without its own parent link.
+    assert (rdflib.URIRef(B), RDFS.subClassOf, rdflib.URIRef(A)) not in exported
@@ -9,7 +9,9 @@ import {
     updateConceptLabel,
     addConceptDefinition,
     deleteConceptDefinition,
-    updateConceptDefinition
+    updateConceptDefinition,
+    fetchConceptAncestors,
+    fetchConceptSubtreeCount
 } from '../services/api';
 import DefaultButton from "./buttons/DefaultButton.jsx";
 import NewSubConceptModal from "./modals/NewSubConceptModal.jsx";
@@ -72,6 +74,9 @@ function ConceptDetails({concept, refreshTaxonomyTree, setSelectedConcept}) {
     const [editingDefinition, setEditingDefinition] = useState(null);
     const [isAddingDefinition, setIsAddingDefinition] = useState(false);
 
+    // Where the concept sits along every parent link, from the server's hierarchy index.
+    const [hierarchy, setHierarchy] = useState(null);
+
     useEffect(() => {
         if (concept) {
             setConceptName(concept.title);
@@ -84,6 +89,27 @@ function ConceptDetails({concept, refreshTaxonomyTree, setSelectedConcept}) {
         setIsAddingDefinition(false);
     }, [concept]);
 
+    // The selected concept is replaced after every edit of the tree, so the counts follow edits.
+    useEffect(() => {
+        setHierarchy(null);
+        if (!concept) {
+            return;
+        }
+        let cancelled = false;
+        Promise.all([fetchConceptAncestors(concept.key), fetchConceptSubtreeCount(concept.key)])
+            .then(([{ancestors}, info]) => {
+                if (!cancelled) {
+                    setHierarchy({...info, ancestors});
+                }
+            })
+            .catch(() => {
+                // Details are still shown without the hierarchy summary.
+            });
+        return () => {
+            cancelled = true;
+        };
+    }, [concept]);
+
     const handleApiError = (action, error) => {
         console.error(`Error ${action}:`, error);
         alert(`Error ${action}. Check console.`);
@@ -211,6 +237,16 @@ function ConceptDetails({concept, refreshTaxonomyTree, setSelectedConcept}) {
                     <p className="text-white font-inter text-sm not-italic font-light leading-normal">
                         {concept.key}
                     </p>
+                    {hierarchy && hierarchy.ancestors.length > 0 && (
+                        <p className="text-white font-inter text-sm not-italic font-light leading-normal">
+                            Ancestors: {hierarchy.ancestors.map(ancestor => ancestor.title).join(', ')}
+                        </p>
+                    )}
+                    {hierarchy && (
+                        <p className="text-white font-inter text-sm not-italic font-light leading-normal">
+                            Subclasses: {hierarchy.children} · descendants: {hierarchy.descendants} · depth: {hierarchy.depth}
+                        </p>
+                    )}
                 </div>
             </div>
             <div className="flex items-start gap-4 self-stretch">
@@ -379,6 +415,7 @@ function ConceptDetails({concept, refreshTaxonomyTree, setSelectedConcept}) {
             />
             <DeleteConceptModal
                 show={showDeleteConceptModal}
+                conceptUri={concept.key}
                 onClose={handleDeleteConcept}
                 onDiscard={() => setShowDeleteConceptModal(false)}
             />
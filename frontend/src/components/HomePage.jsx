@@ -2,7 +2,7 @@ import React, {useState} from 'react';
 import {useNavigate} from 'react-router-dom';
 import HomePageHeader from './headers/HomePageHeader.jsx';
 import HomePageButton from './buttons/HomePageButton.jsx';
-import {clearRepository, createTaxonomyFromCorpusLLM, importTaxonomyFromFile} from "../services/api.js";
+import {cancelJob, clearRepository, createTaxonomyFromCorpusLLM, importTaxonomyFromFile} from "../services/api.js";
 import ImportModal from "./modals/ImportModal.jsx";
 import AddFilesModal from "./modals/AddFilesModal.jsx";
 
@@ -12,6 +12,8 @@ function HomePage({setTaxonomyData}) {
     const [loading, setLoading] = useState(false);
     const [showImportForm, setShowImportForm] = useState(false);
     const [showAddFilesForm, setShowAddFilesForm] = useState(false);
+    // Latest state of the running import or generation job.
+    const [job, setJob] = useState(null);
 
     const handleCreateTaxonomy = async () => {
         setLoading(true);
@@ -28,13 +30,21 @@ function HomePage({setTaxonomyData}) {
         }
     };
 
+    const handleCancelJob = async () => {
+        try {
+            await cancelJob(job.id);
+        } catch (error) {
+            console.error("Помилка при скасуванні завдання:", error);
+        }
+    };
+
     const handleImport = async (file, taxonomySetter) => {
         setLoading(true);
         try {
             await clearRepository();
             console.log("Репозиторій очищено перед імпортом");
 
-            await importTaxonomyFromFile(file);
+            await importTaxonomyFromFile(file, setJob);
             console.log("Таксономія імпортована успішно");
 
             if (taxonomySetter) {
@@ -45,10 +55,15 @@ function HomePage({setTaxonomyData}) {
             navigate('/editor');
 
         } catch (error) {
+            if (error.jobStatus === 'cancelled') {
+                console.log("Імпорт таксономії скасовано");
+                return;
+            }
             console.error("Помилка при імпорті таксономії:", error);
             alert("Помилка при імпорті таксономії. Перевірте консоль.");
         } finally {
             setLoading(false);
+            setJob(null);
         }
     };
 
@@ -62,7 +77,7 @@ function HomePage({setTaxonomyData}) {
             await clearRepository();
             console.log("Репозиторій очищено перед створенням таксономії з корпусу.");
 
-            await createTaxonomyFromCorpusLLM(files);
+            await createTaxonomyFromCorpusLLM(files, setJob);
             console.log("Таксономія з корпусу успішно створена та імпортована.");
 
             if (setTaxonomyData) {
@@ -73,10 +88,15 @@ function HomePage({setTaxonomyData}) {
             navigate('/editor');
 
         } catch (error) {
+            if (error.jobStatus === 'cancelled') {
+                console.log("Створення таксономії з корпусу скасовано");
+                return;
+            }
             console.error("Помилка при створенні таксономії з корпусу:", error);
            alert(`Помилка при створенні таксономії з корпусу: ${error.message || "Перевірте консоль."}`);
         } finally {
             setLoading(false);
+            setJob(null);
         }
     };
 
@@ -108,12 +128,16 @@ function HomePage({setTaxonomyData}) {
                 onClose={() => setShowImportForm(false)}
                 onImport={(file) => handleImport(file, setTaxonomyData)}
                 setTaxonomyData={setTaxonomyData}
+                job={job}
+                onCancelJob={handleCancelJob}
             />
 
             <AddFilesModal
                 show={showAddFilesForm}
                 onClose={() => setShowAddFilesForm(false)}
                 onCreate={handleCreateTaxonomyFromCorpus}
+                job={job}
+                onCancelJob={handleCancelJob}
             />
 
         </div>
@@ -1,12 +1,15 @@
 import ConceptDetails from './ConceptDetails';
 import TreeView from "./visualisation/TreeView.jsx";
-import React, {useEffect, useState} from "react";
-import {fetchTaxonomyTree, exportTaxonomy, clearRepository} from '../services/api';
+import React, {useEffect, useRef, useState} from "react";
+import {fetchTaxonomyTree, fetchTaxonomyChanges, exportTaxonomy, clearRepository, searchConcepts} from '../services/api';
+import {applyTaxonomyChanges} from '../services/taxonomyChanges';
 import EditorHeader from "./headers/EditorHeader.jsx";
 import {useNavigate} from 'react-router-dom';
 import ExportModal from "./modals/ExportModal.jsx";
 import CloseConfirmationModal from "./modals/CloseConfirmationModal.jsx";
 
+const SEARCH_DEBOUNCE_MS = 250;
+const SEARCH_LIMIT = 100;
 
 const findConceptInTreeRecursively = (nodes, key) => {
     if (!nodes || !Array.isArray(nodes) || !key) return null;
@@ -26,19 +29,27 @@ function TaxonomyEditor({setTaxonomyData}) {
     const [treeData, setTreeData] = useState([]);
     const [loading, setLoading] = useState(true);
     const [refreshTree, setRefreshTree] = useState(false);
+    // Version of treeData on the server, and the tree itself for the asynchronous change sync below.
+    const treeVersion = useRef(null);
+    const treeRef = useRef([]);
+    const pendingSync = useRef(Promise.resolve());
     const navigate = useNavigate();
 
     const [showExportModal, setShowExportModal] = useState(false);
     const [showCloseConfirmationModal, setShowCloseConfirmationModal] = useState(false);
     const [searchQuery, setSearchQuery] = useState("");
+    // The server's search index answer for a query: matches labels in every language, not only titles.
+    const [searchMatches, setSearchMatches] = useState({query: "", keys: null});
 
     useEffect(() => {
         (async () => {
             setLoading(true);
             try {
-                const newTreeData = await fetchTaxonomyTree();
+                const {tree: newTreeData, version} = await fetchTaxonomyTree();
+                treeVersion.current = version;
 
                 if (newTreeData && newTreeData.length > 0) {
+                    treeRef.current = newTreeData;
                     setTreeData(newTreeData);
                     setTaxonomyData(newTreeData);
                     if (selectedConcept && selectedConcept.key) {
@@ -46,12 +57,15 @@ function TaxonomyEditor({setTaxonomyData}) {
                         setSelectedConcept(updatedSelectedConceptInstance);
                     } else { /* empty */ }
                 } else {
+                    treeRef.current = [];
                     setTreeData([]);
                     setTaxonomyData([]);
                     setSelectedConcept(null);
                 }
             } catch (error) {
                 console.error("Ошибка при загрузке таксономии:", error);
+                treeVersion.current = null;
+                treeRef.current = [];
                 setTreeData([]);
                 setTaxonomyData([]);
                 setSelectedConcept(null);
@@ -65,6 +79,29 @@ function TaxonomyEditor({setTaxonomyData}) {
         // eslint-disable-next-line react-hooks/exhaustive-deps
     }, [refreshTree, setTaxonomyData]);
 
+    // Searched again after edits too: the server's index follows the tree's changes.
+    useEffect(() => {
+        const query = searchQuery.trim();
+        if (!query) {
+            return;
+        }
+        let cancelled = false;
+        const timeoutId = setTimeout(async () => {
+            try {
+                const {hits} = await searchConcepts(query, null, SEARCH_LIMIT);
+                if (!cancelled) {
+                    setSearchMatches({query, keys: new Set(hits.map(hit => hit.key))});
+                }
+            } catch (error) {
+                console.error("Помилка при пошуку концептів:", error);
+            }
+        }, SEARCH_DEBOUNCE_MS);
+        return () => {
+            cancelled = true;
+            clearTimeout(timeoutId);
+        };
+    }, [searchQuery, treeData]);
+
     const handleConceptSelect = (concept) => {
         console.log("TaxonomyEditor handleConceptSelect:", concept.title, concept.key);
         setSelectedConcept(concept);
@@ -89,8 +126,39 @@ function TaxonomyEditor({setTaxonomyData}) {
         }
     };
 
+    // After an edit, download only the changes since treeVersion and apply them to the tree;
+    // the whole tree is reloaded when the server reports a reset or a change cannot be applied.
+    const syncTaxonomyTree = async () => {
+        if (treeVersion.current === null) {
+            setRefreshTree(true);
+            return;
+        }
+        try {
+            const {version, reset, changes} = await fetchTaxonomyChanges(treeVersion.current);
+            const patchedTree = reset ? null : applyTaxonomyChanges(treeRef.current, changes);
+            if (patchedTree === null) {
+                setRefreshTree(true);
+                return;
+            }
+            treeVersion.current = version;
+            if (changes.length === 0) {
+                return;
+            }
+            treeRef.current = patchedTree;
+            setTreeData(patchedTree);
+            setTaxonomyData(patchedTree);
+            setSelectedConcept(selected => (selected && selected.key
+                ? findConceptInTreeRecursively(patchedTree, selected.key)
+                : selected));
+        } catch (error) {
+            console.error("Помилка при оновленні таксономії за змінами:", error);
+            setRefreshTree(true);
+        }
+    };
+
     const refreshTaxonomyTree = () => {
-        setRefreshTree(true);
+        // One sync at a time, so each one starts from the version the previous one reached.
+        pendingSync.current = pendingSync.current.then(syncTaxonomyTree);
     };
 
     const handleSearchChange = (newValue) => {
@@ -114,6 +182,7 @@ function TaxonomyEditor({setTaxonomyData}) {
                     onSelect={handleConceptSelect}
                     loading={loading}
                     searchQuery={searchQuery}
+                    searchMatches={searchMatches.query === searchQuery.trim() ? searchMatches.keys : null}
                 />
 
                 <ConceptDetails
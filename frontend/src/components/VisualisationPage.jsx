@@ -1,63 +1,92 @@
-import React, {useEffect, useState, useRef, useCallback} from 'react';
+import React, {useEffect, useMemo, useState, useRef, useCallback} from 'react';
 import ForceGraph2D from 'react-force-graph-2d';
 import BackButton from "./buttons/BackButton.jsx";
+import {fetchTaxonomyGraph} from "../services/api.js";
 
-function transformDataForGraph(taxonomyTree) {
-    if (!taxonomyTree || taxonomyTree.length === 0) {
+function transformGraphView(graphView) {
+    if (!graphView || graphView.nodes.length === 0) {
         return {nodes: [], links: []};
     }
 
-    const nodes = [];
+    const parentOf = {};
     const links = [];
-    const addedNodeIds = new Set();
-
-    function processNode(nodeData, parentId) {
-        if (!nodeData || !nodeData.key) return;
-
-        if (!addedNodeIds.has(nodeData.key)) {
-            nodes.push({
-                id: nodeData.key,
-                name: nodeData.title || nodeData.key.split(/[#/]/).pop() || nodeData.key,
-                val: (nodeData.children && nodeData.children.length > 0) ? 8 : 4,
-                labels: nodeData.labels,
-                definitions: nodeData.definitions,
-                group: parentId ? (parentId.split(/[#/]/).pop() || 'child') : 'root',
-            });
-            addedNodeIds.add(nodeData.key);
-        }
-
-        if (parentId) {
-            links.push({
-                source: parentId,
-                target: nodeData.key,
-            });
-        }
-
-        if (nodeData.children && nodeData.children.length > 0) {
-            nodeData.children.forEach(child => processNode(child, nodeData.key));
-        }
+    for (let i = 0; i < graphView.edges.length; i += 2) {
+        const source = graphView.edges[i];
+        const target = graphView.edges[i + 1];
+        parentOf[target] = source;
+        links.push({source, target});
+    }
+    // Extra parent links of concepts with several parents.
+    const crossEdges = graphView.crossEdges || [];
+    for (let i = 0; i < crossEdges.length; i += 2) {
+        links.push({source: crossEdges[i], target: crossEdges[i + 1], cross: true});
     }
 
-    taxonomyTree.forEach(rootNode => processNode(rootNode, null));
+    const nodes = graphView.nodes.map(node => ({
+        id: node.id,
+        key: node.key,
+        name: node.title,
+        aggregate: !!node.aggregate,
+        parentKey: parentOf[node.id] !== undefined ? graphView.nodes[parentOf[node.id]].key : null,
+        // Set on the aggregate of hidden top-level concepts: where their page starts.
+        nextOffset: node.nextOffset,
+        hiddenConcepts: node.hiddenConcepts,
+        descendants: node.descendants,
+        val: node.aggregate || node.children > 0 ? 8 : 4,
+        group: node.aggregate ? 'aggregate' : `depth-${node.depth}`,
+        // Server-computed initial coordinates: the simulation starts close to its final state.
+        x: node.x,
+        y: node.y,
+    }));
 
     return {nodes, links};
 }
 
+const formatLiterals = literals => literals.map(literal => (literal.lang ? `${literal.value}@${literal.lang}` : literal.value)).join('; ');
+
 
 function VisualisationPage({taxonomyData}) {
     const [graphData, setGraphData] = useState({nodes: [], links: []});
+    const [graphRoot, setGraphRoot] = useState(null);
+    // Top-level concepts skipped when the whole taxonomy does not fit one view.
+    const [rootsOffset, setRootsOffset] = useState(0);
     const graphContainerRef = useRef(null);
     const fgRef = useRef();
     const [dimensions, setDimensions] = useState({width: 0, height: 0});
 
+    // The graph view carries no labels or definitions; the tooltips take them from the editor's tree.
+    const conceptsByKey = useMemo(() => {
+        const concepts = new Map();
+        const stack = [...(taxonomyData || [])];
+        while (stack.length > 0) {
+            const concept = stack.pop();
+            concepts.set(concept.key, concept);
+            stack.push(...(concept.children || []));
+        }
+        return concepts;
+    }, [taxonomyData]);
+
     useEffect(() => {
-        if (taxonomyData) {
-            const transformed = transformDataForGraph(taxonomyData);
-            setGraphData(transformed);
-        } else {
+        if (!taxonomyData || taxonomyData.length === 0) {
             setGraphData({nodes: [], links: []});
+            return;
         }
-    }, [taxonomyData]);
+        let cancelled = false;
+        fetchTaxonomyGraph({root: graphRoot, layout: true, offset: graphRoot ? 0 : rootsOffset})
+            .then(graphView => {
+                if (!cancelled) {
+                    setGraphData(transformGraphView(graphView));
+                }
+            })
+            .catch(() => {
+                if (!cancelled) {
+                    setGraphData({nodes: [], links: []});
+                }
+            });
+        return () => {
+            cancelled = true;
+        };
+    }, [taxonomyData, graphRoot, rootsOffset]);
 
     useEffect(() => {
         const updateDimensions = () => {
@@ -85,7 +114,16 @@ function VisualisationPage({taxonomyData}) {
     }, []);
 
     const handleNodeClick = useCallback(node => {
-        // Example: Center on node and zoom
+        if (node.aggregate) {
+            if (node.nextOffset !== undefined) {
+                // Hidden top-level concepts have no parent to re-root at: show the next page of them.
+                setRootsOffset(node.nextOffset);
+            } else {
+                // Expand the collapsed children by re-rooting the view at their parent.
+                setGraphRoot(node.parentKey);
+            }
+            return;
+        }
         if (fgRef.current) {
             fgRef.current.centerAt(node.x, node.y, 1000);
             fgRef.current.zoom(2.5, 1000);
@@ -99,6 +137,17 @@ function VisualisationPage({taxonomyData}) {
             <div className="fixed top-8 left-18 z-50">
                 <BackButton to="/editor"/>
             </div>
+            {(graphRoot || rootsOffset > 0) && (
+                <button
+                    className="fixed top-8 right-18 z-50 text-white font-inter text-lg font-light underline"
+                    onClick={() => {
+                        setGraphRoot(null);
+                        setRootsOffset(0);
+                    }}
+                >
+                    Show whole taxonomy
+                </button>
+            )}
             <div
                 ref={graphContainerRef}
                 className="w-full flex-grow flex items-center justify-center"
@@ -111,28 +160,18 @@ function VisualisationPage({taxonomyData}) {
                         nodeLabel={node => {
                             const lines = [];
                             lines.push(`<strong>Name:</strong> ${node.name}`);
-                            lines.push(`<strong>URI:</strong> ${node.id}`);
-
-                            if (node.labels && node.labels.length > 0) {
-                                const labelsString = node.labels.map(l => {
-                                    let labelPart = l.value;
-                                    if (l.lang) {
-                                        labelPart += `@${l.lang}`;
-                                    }
-                                    return labelPart;
-                                }).join('; ');
-                                lines.push(`<strong>Labels:</strong> ${labelsString}`);
-                            }
-
-                            if (node.definitions && node.definitions.length > 0) {
-                                const definitionsString = node.definitions.map(d => {
-                                    let defPart = d.value;
-                                    if (d.lang) {
-                                        defPart += `@${d.lang}`;
-                                    }
-                                    return defPart;
-                                }).join('; ');
-                                lines.push(`<strong>Definitions:</strong> ${definitionsString}`);
+                            if (node.aggregate) {
+                                lines.push(`${node.hiddenConcepts} hidden concepts, click to expand`);
+                            } else {
+                                lines.push(`<strong>URI:</strong> ${node.key}`);
+                                const concept = conceptsByKey.get(node.key);
+                                if (concept && concept.labels && concept.labels.length > 0) {
+                                    lines.push(`<strong>Labels:</strong> ${formatLiterals(concept.labels)}`);
+                                }
+                                if (concept && concept.definitions && concept.definitions.length > 0) {
+                                    lines.push(`<strong>Definitions:</strong> ${formatLiterals(concept.definitions)}`);
+                                }
+                                lines.push(`<strong>Descendants:</strong> ${node.descendants}`);
                             }
                             return lines.join('<br />');
                         }}
@@ -141,9 +180,10 @@ function VisualisationPage({taxonomyData}) {
                         linkDirectionalArrowLength={3.5}
                         linkDirectionalArrowRelPos={1}
                         linkCurvature={0.1}
+                        linkLineDash={link => (link.cross ? [2, 2] : null)}
                         width={dimensions.width}
                         height={dimensions.height}
-                        cooldownTicks={150}
+                        cooldownTicks={50}
                         onEngineStop={() => {
                             if (fgRef.current && graphData.nodes.length > 0) {
                                 fgRef.current.zoomToFit(600, 50);
@@ -1,8 +1,9 @@
 import React, {useState} from 'react';
 import CloseIcon from "../icons/CloseIcon.jsx";
 import DefaultButton from "../buttons/DefaultButton.jsx";
+import JobProgress from "./JobProgress.jsx";
 
-function AddFilesModal({show, onClose, onCreate}) {
+function AddFilesModal({show, onClose, onCreate, job, onCancelJob}) {
     const [selectedFiles, setSelectedFiles] = useState([]);
     const [error, setError] = useState('');
 
@@ -118,10 +119,12 @@ function AddFilesModal({show, onClose, onCreate}) {
                         )}
                         {error && <p className="text-red-500 text-sm mt-2">{error}</p>}
 
+                    <JobProgress job={job} onCancel={onCancelJob}/>
+
                     <div className="self-end">
                         <DefaultButton
                             onClick={handleSubmit}
-                            disabled={selectedFiles.length === 0}
+                            disabled={selectedFiles.length === 0 || !!job}
                         >
                             Create taxonomy
                         </DefaultButton>
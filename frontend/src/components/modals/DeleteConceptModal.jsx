@@ -1,8 +1,29 @@
-import React from 'react';
+import React, {useEffect, useState} from 'react';
 import DefaultButton from '../buttons/DefaultButton.jsx';
 import CloseIcon from "../icons/CloseIcon.jsx";
+import {previewDeleteConcept} from "../../services/api.js";
+
+function DeleteConceptModal({show, onClose, onDiscard, conceptUri}) {
+    const [preview, setPreview] = useState(null);
+
+    useEffect(() => {
+        setPreview(null);
+        if (!show || !conceptUri) {
+            return;
+        }
+        let cancelled = false;
+        previewDeleteConcept(conceptUri)
+            .then(result => {
+                if (!cancelled) {
+                    setPreview(result);
+                }
+            })
+            .catch(() => {});
+        return () => {
+            cancelled = true;
+        };
+    }, [show, conceptUri]);
 
-function DeleteConceptModal({show, onClose, onDiscard}) {
     if (!show) {
         return null;
     }
@@ -18,6 +39,11 @@ function DeleteConceptModal({show, onClose, onDiscard}) {
 
                 <div className="flex pt-4 pb-6 px-8 flex-col items-start gap-6 self-stretch">
                     <p className="text-white font-inter text-sm not-italic font-light leading-normal">When you delete a concept, all its descendants are deleted.</p>
+                    {preview && (
+                        <p className="text-white font-inter text-sm not-italic font-light leading-normal">
+                            {preview.concepts - 1} descendant concepts and {preview.triples} statements will be removed.
+                        </p>
+                    )}
 
                     <div className="self-end">
                         <DefaultButton onClick={onClose}>
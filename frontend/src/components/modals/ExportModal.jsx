@@ -32,6 +32,9 @@ function ExportModal({show, onClose, onExport}) {
                                 defaultValue="ttl"
                             >
                                 <option className="text-[#060606] font-inter text-base not-italic font-light leading-normal" value="ttl">Turtle (.ttl)</option>
+                                <option className="text-[#060606] font-inter text-base not-italic font-light leading-normal" value="rdf">RDF/XML (.rdf)</option>
+                                <option className="text-[#060606] font-inter text-base not-italic font-light leading-normal" value="nt">N-Triples (.nt)</option>
+                                <option className="text-[#060606] font-inter text-base not-italic font-light leading-normal" value="jsonld">JSON-LD (.jsonld)</option>
                             </select>
 
 
@@ -1,13 +1,12 @@
 import React, {useState} from 'react';
 import CloseIcon from "../icons/CloseIcon.jsx";
 import DefaultButton from "../buttons/DefaultButton.jsx";
-import {useNavigate} from 'react-router-dom';
+import JobProgress from "./JobProgress.jsx";
 
-function ImportModal({show, onClose, onImport, setTaxonomyData}) {
+function ImportModal({show, onClose, onImport, setTaxonomyData, job, onCancelJob}) {
     const [selectedFile, setSelectedFile] = useState(null);
     const [error, setError] = useState('');
     const [fileNameText, setFileNameText] = useState("Select file");
-    const navigate = useNavigate();
 
     if (!show) {
         return null;
@@ -29,8 +28,8 @@ function ImportModal({show, onClose, onImport, setTaxonomyData}) {
     const handleImport = async () => {
         if (selectedFile) {
             try {
+                // The editor is opened by onImport once the import job succeeds; not after a cancel.
                 await onImport(selectedFile, setTaxonomyData);
-                navigate('/editor');
             } catch (error) {
                 console.error("Помилка імпорту:", error);
                 setError("Помилка імпорту таксономії.");
@@ -73,10 +72,12 @@ function ImportModal({show, onClose, onImport, setTaxonomyData}) {
                     </div>
                     {error && <p className="text-red-500">{error}</p>}
 
+                    <JobProgress job={job} onCancel={onCancelJob}/>
+
                     <div className="self-end">
                         <DefaultButton
                             onClick={handleImport}
-                            disabled={!selectedFile}
+                            disabled={!selectedFile || !!job}
                         >
                             Import
                         </DefaultButton>
@@ -0,0 +1,30 @@
+import React from 'react';
+import DefaultButton from "../buttons/DefaultButton.jsx";
+
+// Progress of a running background job (see waitForJob), with a button to cancel it.
+function JobProgress({job, onCancel}) {
+    if (!job) {
+        return null;
+    }
+    const percent = Math.round((job.progress || 0) * 100);
+
+    return (
+        <div className="flex flex-col gap-2 self-stretch">
+            <div className="h-2 self-stretch rounded-md bg-[rgba(248,248,248,0.2)] overflow-hidden">
+                <div className="h-full bg-[rgba(178,255,0,0.80)]" style={{width: `${percent}%`}}/>
+            </div>
+            <div className="flex justify-between items-center gap-4 self-stretch">
+                <p className="text-white font-inter text-sm not-italic font-light leading-normal">
+                    {job.message || job.status} ({percent}%)
+                </p>
+                {(job.status === 'queued' || job.status === 'running') && (
+                    <DefaultButton onClick={onCancel} className="text-sm">
+                        Cancel
+                    </DefaultButton>
+                )}
+            </div>
+        </div>
+    );
+}
+
+export default JobProgress;
@@ -5,14 +5,15 @@ import {addTopConcept} from "../../services/api.js";
 import ButtonWithIcon from "../buttons/ButtonWithIcon.jsx";
 import AddIcon from "../icons/AddIcon.jsx";
 
-const filterTree = (nodes, query) => {
+// matchedKeys: the concepts found by the server's search; until it answers, titles are matched locally.
+const filterTree = (nodes, query, matchedKeys) => {
     if (!query) {
         return nodes;
     }
     const lowerCaseQuery = query.toLowerCase();
 
     function filterNode(node) {
-        const nodeMatches = node.title.toLowerCase().includes(lowerCaseQuery);
+        const nodeMatches = matchedKeys ? matchedKeys.has(node.key) : node.title.toLowerCase().includes(lowerCaseQuery);
 
         const filteredChildren = (node.children || [])
             .map(filterNode)
@@ -40,15 +41,15 @@ const getAllKeys = (nodes) => {
     return keys;
 };
 
-function TreeView({treeData, refreshTaxonomyTree, onSelect, loading, searchQuery}) {
+function TreeView({treeData, refreshTaxonomyTree, onSelect, loading, searchQuery, searchMatches}) {
     const [expandedNodes, setExpandedNodes] = useState(new Set());
     const [selectedNodeKey, setSelectedNodeKey] = useState(null);
     const [showNewConceptModal, setShowNewConceptModal] = useState(false);
 
     const filteredData = useMemo(() => {
         console.log("Filtering tree with query:", searchQuery);
-        return filterTree(treeData, searchQuery);
-    }, [treeData, searchQuery]);
+        return filterTree(treeData, searchQuery, searchMatches);
+    }, [treeData, searchQuery, searchMatches]);
 
     useEffect(() => {
         if (searchQuery && filteredData.length > 0) {
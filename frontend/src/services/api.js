@@ -3,17 +3,85 @@ import { saveAs } from 'file-saver';
 
 const API_BASE_URL = 'http://127.0.0.1:8000/';
 
+// The tree and its version, from which fetchTaxonomyChanges can catch up after edits.
 export const fetchTaxonomyTree = async () => {
     try {
-        const response = await axios.get(`${API_BASE_URL}taxonomy-tree`).then();
+        const response = await axios.get(`${API_BASE_URL}taxonomy-tree`);
+        const version = response.headers['x-taxonomy-version'];
 
-        return response.data;
+        return {tree: response.data, version: version !== undefined ? Number(version) : null};
     } catch (error) {
         console.error("Ошибка при запросе к API таксономии:", error);
         throw error;
     }
 };
 
+export const fetchTaxonomyChanges = async (sinceVersion) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}taxonomy-tree/changes`, {
+            params: { since: sinceVersion }
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при отриманні змін таксономії (axios):", error);
+        throw error;
+    }
+};
+
+export const fetchTaxonomyGraph = async ({root = null, maxDepth = null, maxNodes = null, layout = true, offset = 0} = {}) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}taxonomy-graph`, {
+            params: {
+                root: root || undefined,
+                max_depth: maxDepth ?? undefined,
+                max_nodes: maxNodes ?? undefined,
+                layout,
+                offset: offset || undefined
+            }
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при отриманні графа таксономії (axios):", error);
+        throw error;
+    }
+};
+
+export const fetchConceptAncestors = async (conceptUri) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}concept/ancestors`, {
+            params: {uri: conceptUri}
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при отриманні предків концепту (axios):", error);
+        throw error;
+    }
+};
+
+export const fetchConceptSubtreeCount = async (conceptUri) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}concept/subtree-count`, {
+            params: {uri: conceptUri}
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при підрахунку піддерева концепту (axios):", error);
+        throw error;
+    }
+};
+
+export const searchConcepts = async (query, lang = null, limit = 20, under = null) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}search`, {
+            params: { q: query, lang: lang || undefined, limit, under: under || undefined }
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при пошуку концептів (axios):", error);
+        throw error;
+    }
+};
+
 export const clearRepository = async () => {
     try {
         const response = await axios.post(`${API_BASE_URL}clear_repository`);
@@ -24,7 +92,89 @@ export const clearRepository = async () => {
     }
 }
 
-export const importTaxonomyFromFile = async (file) => {
+const JOB_POLL_INTERVAL_MS = 1000;
+
+const fetchJob = async (jobId) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}jobs/${jobId}`);
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при отриманні статусу завдання (axios):", error);
+        throw error;
+    }
+};
+
+export const cancelJob = async (jobId) => {
+    try {
+        const response = await axios.post(`${API_BASE_URL}jobs/${jobId}/cancel`);
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при скасуванні завдання (axios):", error);
+        throw error;
+    }
+};
+
+const JOB_FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled'];
+
+// Subscribes to a background job's server-sent events; returns a function that closes the subscription.
+// onError is called if the stream breaks before the job finishes.
+const watchJob = (jobId, onEvent, onError) => {
+    const source = new EventSource(`${API_BASE_URL}jobs/${jobId}/events`);
+    const handle = (event) => onEvent(JSON.parse(event.data));
+    source.addEventListener('progress', handle);
+    source.addEventListener('done', (event) => {
+        handle(event);
+        source.close();
+    });
+    source.onerror = () => {
+        source.close();
+        if (onError) {
+            onError();
+        }
+    };
+    return () => source.close();
+};
+
+const pollJob = async (jobId, onProgress) => {
+    for (;;) {
+        const job = await fetchJob(jobId);
+        if (onProgress) {
+            onProgress(job);
+        }
+        if (JOB_FINISHED_STATUSES.includes(job.status)) {
+            return job;
+        }
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+};
+
+// Follows a background job until it finishes and resolves with its result. Updates are pushed
+// through the job's event stream; if the stream is unavailable, the job is polled instead.
+// A failed or cancelled job rejects with an error whose jobStatus is the final status.
+const waitForJob = async (jobId, onProgress) => {
+    let job = await new Promise((resolve) => {
+        watchJob(jobId, (update) => {
+            if (onProgress) {
+                onProgress(update);
+            }
+            if (JOB_FINISHED_STATUSES.includes(update.status)) {
+                resolve(update);
+            }
+        }, () => resolve(null));
+    });
+    if (job === null) {
+        job = await pollJob(jobId, onProgress);
+    }
+    if (job.status === 'succeeded') {
+        const response = await axios.get(`${API_BASE_URL}jobs/${jobId}/result`);
+        return response.data;
+    }
+    const error = new Error(job.error || `Завдання завершилось зі статусом ${job.status}`);
+    error.jobStatus = job.status;
+    throw error;
+};
+
+export const importTaxonomyFromFile = async (file, onProgress) => {
     const formData = new FormData();
     formData.append('file', file);
 
@@ -34,14 +184,14 @@ export const importTaxonomyFromFile = async (file) => {
                 'Content-Type': 'multipart/form-data',
             },
         });
-        return response.data;
+        return await waitForJob(response.data.job_id, onProgress);
     } catch (error) {
         console.error("Помилка при імпорті таксономії з файлу (axios):", error);
         throw error;
     }
 };
 
-export const createTaxonomyFromCorpusLLM = async (files) => {
+export const createTaxonomyFromCorpusLLM = async (files, onProgress, stream = false) => {
     const formData = new FormData();
     files.forEach((file) => {
         // FastAPI expects multiple files under the same key 'files'
@@ -52,23 +202,30 @@ export const createTaxonomyFromCorpusLLM = async (files) => {
         const response = await axios.post(`${API_BASE_URL}create_taxonomy_from_corpus_llm`, formData, {
             headers: {
             },
+            params: stream ? { stream: true } : undefined,
         });
-        return response.data;
+        return await waitForJob(response.data.job_id, onProgress);
     } catch (error) {
+        if (error.jobStatus) {
+            throw error;
+        }
         console.error("Помилка при створенні таксономії з корпусу (axios):", error.response ? error.response.data : error.message);
         const errorMessage = error.response?.data?.detail || error.message || 'Невідома помилка сервера.';
         throw new Error(errorMessage);
     }
 };
 
-export const exportTaxonomy = async (format) => {
+const EXPORT_EXTENSIONS = {ttl: 'ttl', rdf: 'rdf', nt: 'nt', jsonld: 'jsonld'};
+
+export const exportTaxonomy = async (format, {root = null, gzip = false} = {}) => {
     try {
-        const response = await axios.get(`${API_BASE_URL}export_taxonomy?format=${format}`, {
+        const response = await axios.get(`${API_BASE_URL}export_taxonomy`, {
+            params: {format, root: root || undefined, gzip},
             responseType: 'blob',
         });
 
         const blob = response.data;
-        const filename = format === 'ttl' ? 'taxonomy.ttl' : 'taxonomy.rdf';
+        const filename = `taxonomy.${EXPORT_EXTENSIONS[format]}${gzip ? '.gz' : ''}`;
         saveAs(blob, filename);
 
     } catch (error) {
@@ -114,6 +271,18 @@ export const deleteConcept = async (conceptUri) => {
     }
 };
 
+export const previewDeleteConcept = async (conceptUri) => {
+    try {
+        const response = await axios.get(`${API_BASE_URL}delete_concept/preview`, {
+            params: {uri: conceptUri}
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Помилка при оцінці видалення концепту (axios):", error);
+        throw error;
+    }
+};
+
 export const addConceptLabel = async (conceptUri, value, lang) => {
     try {
         const response = await axios.post(`${API_BASE_URL}add_concept_label`, {
@@ -0,0 +1,74 @@
+// Replays the server's tree change log (GET /taxonomy-tree/changes) on the client-side tree,
+// so an edit costs a few change records instead of a full tree download.
+
+const sameLiteral = (a, b) => a.value === b.value && (a.lang || null) === (b.lang || null);
+
+// Returns the patched tree (the given one is not modified), or null when a change cannot be
+// applied faithfully (a reset, an unknown concept...): the caller then reloads the whole tree.
+export const applyTaxonomyChanges = (tree, changes) => {
+    const roots = structuredClone(tree || []);
+    const nodes = new Map();
+    const parents = new Map();
+    const stack = roots.map(node => [node, null]);
+    while (stack.length > 0) {
+        const [node, parent] = stack.pop();
+        nodes.set(node.key, node);
+        parents.set(node.key, parent);
+        (node.children || []).forEach(child => stack.push([child, node]));
+    }
+
+    for (const change of changes) {
+        switch (change.op) {
+            case 'add_concept': {
+                if (nodes.has(change.key)) {
+                    break;
+                }
+                const node = {key: change.key, title: change.title, children: [], definitions: [], labels: []};
+                const parent = change.parent ? nodes.get(change.parent) : null;
+                if (change.parent && !parent) {
+                    return null;
+                }
+                (parent ? parent.children : roots).push(node);
+                nodes.set(node.key, node);
+                parents.set(node.key, parent);
+                break;
+            }
+            case 'delete_concept': {
+                const node = nodes.get(change.key);
+                if (!node) {
+                    break;
+                }
+                const parent = parents.get(change.key);
+                const siblings = parent ? parent.children : roots;
+                siblings.splice(siblings.indexOf(node), 1);
+                const removed = [node];
+                while (removed.length > 0) {
+                    const current = removed.pop();
+                    nodes.delete(current.key);
+                    parents.delete(current.key);
+                    removed.push(...(current.children || []));
+                }
+                break;
+            }
+            case 'add_literal':
+            case 'delete_literal': {
+                const node = nodes.get(change.key);
+                if (!node) {
+                    return null;
+                }
+                const literals = node[change.field] || (node[change.field] = []);
+                const index = literals.findIndex(literal => sameLiteral(literal, change.literal));
+                if (change.op === 'add_literal' && index === -1) {
+                    literals.push(change.literal);
+                } else if (change.op === 'delete_literal' && index !== -1) {
+                    literals.splice(index, 1);
+                }
+                break;
+            }
+            default:
+                // "reset" (imports, clears, edits the server could not patch) or an unknown operation.
+                return null;
+        }
+    }
+    return roots;
+};